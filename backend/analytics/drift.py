@@ -6,57 +6,93 @@ import os
 import numpy as np
 import json
 from datetime import datetime
-from scipy.spatial.distance import cosine
-from openai import AzureOpenAI
 from backend.utils.dbpool import get_pool
+from backend.utils.vector_search import (
+    QueryParams,
+    candidate_cte,
+    candidate_filter,
+    candidate_limit,
+    fetch_ann,
+    max_distance,
+    resolve_mode,
+    similarity_sql,
+    vector_distance,
+    as_vector
+)
 
 
 async def fetch_sentences(
     concept_embedding: list[float],
     date_range: tuple[str, str],
     similarity_threshold: float = 0.6,
-    top_k: int = 100
+    top_k: int = 100,
+    mode: str | None = None
 ):
-    """Fetch relevant sentences for a concept in a given date range."""
+    """
+    Fetch relevant sentences for a concept in a given date range.
+
+    The query is index-driven: the nearest `top_k` turns in the date range are
+    taken with ORDER BY distance LIMIT (HNSW, iterative scan for the date
+    filter) and the similarity threshold is applied to that ranked set. The
+    date filter is on st.published_at, so only the month partitions of the
+    range are searched.
+    """
     pool = await get_pool()
-    
-    # Convert embedding to pgvector format
-    embedding_str = '[' + ','.join(map(str, concept_embedding)) + ']'
+    mode = resolve_mode(mode)
     
     # Convert date strings to datetime objects
     start_date = datetime.strptime(date_range[0], "%Y-%m-%d")
     end_date = datetime.strptime(date_range[1], "%Y-%m-%d")
 
-    sql = """
+    params = QueryParams()
+    query_vec = params.add(as_vector(concept_embedding))
+    date_filter = (
+        f"st.published_at BETWEEN {params.add(start_date)} AND {params.add(end_date)}"
+        " AND st.embedding IS NOT NULL"
+    )
+    distance = vector_distance("st.embedding", f"{query_vec}::vector")
+    n_candidates = candidate_limit(top_k, mode)
+    cte = candidate_cte(
+        mode, params, query_vec, concept_embedding, n_candidates,
+        where=date_filter
+    )
+
+    sql = f"""
+        {cte}
         SELECT
-            s.doc_id,
-            s.speaker_raw,
-            s.speaker_normalized,
-            s.embedding,
-            s.text,
-            m.published_at,
-            m.href,
-            1 - (s.embedding <=> $1::vector) AS similarity
-        FROM speech_turns s
-        JOIN raw_transcripts_meta m
-            ON s.doc_id = m.doc_id
-        WHERE
-            m.published_at BETWEEN $2 AND $3
-            AND s.embedding IS NOT NULL
-            AND 1 - (s.embedding <=> $1::vector) > $4
-        ORDER BY similarity DESC
-        LIMIT $5;
+            doc_id,
+            speaker_raw,
+            speaker_normalized,
+            embedding,
+            text,
+            published_at,
+            href,
+            {similarity_sql("distance")} AS similarity
+        FROM (
+            SELECT
+                st.doc_id,
+                st.speaker_raw,
+                st.speaker_normalized,
+                st.embedding,
+                st.text,
+                st.published_at,
+                m.href,
+                {distance} AS distance
+            FROM speech_turns st
+            JOIN raw_transcripts_meta m
+                ON st.doc_id = m.doc_id
+            WHERE
+                {date_filter}
+                AND {candidate_filter(mode)}
+            ORDER BY {distance}
+            LIMIT {params.add(top_k)}
+        ) ranked
+        WHERE distance < {params.add(max_distance(similarity_threshold))}
+        ORDER BY distance;
     """
     
     async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            sql,
-            embedding_str,
-            start_date,
-            end_date,
-            similarity_threshold,
-            top_k
-        )
+        rows = await fetch_ann(conn, sql, params, n_candidates)
     return rows
 
 
@@ -80,12 +116,17 @@ def average_embedding(embeddings: list[np.ndarray]) -> np.ndarray:
     return np.mean(embeddings, axis=0)
 
 
+def cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine distance (1 - cosine similarity) between two vectors."""
+    return float(1 - np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
 def calculate_semantic_change(pre_embeddings: list, post_embeddings: list) -> float:
     """Calculate semantic change between two periods using cosine distance."""
     pre_avg = average_embedding([np.array(e) for e in pre_embeddings])
     post_avg = average_embedding([np.array(e) for e in post_embeddings])
     
-    return float(cosine(pre_avg, post_avg))
+    return cosine_distance(pre_avg, post_avg)
 
 
 def format_excerpts(sentences, max_items=10):
@@ -167,6 +208,8 @@ IMPORTANT:
     azure_openai_api_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
     azure_openai_chat_deployment = os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT", "gpt-4.1")
 
+    from openai import AzureOpenAI
+
     client = AzureOpenAI(
         azure_endpoint=azure_openai_endpoint,
         api_key=azure_openai_api_key,
@@ -1,41 +1,218 @@
 import numpy as np
-from collections import defaultdict
+from typing import Literal
+
+# How compute_semantic_evolution gets per-period centroids:
+# - rows:      fetch the nearest matching rows (embeddings) and average in Python
+# - aggregate: PostgreSQL returns one row per period (AVG(embedding), COUNT(*))
+# - stream:    all matching rows read through a server-side cursor in chunks,
+#              folded into running per-period sums (constant memory)
+EvolutionExecution = Literal["rows", "aggregate", "stream"]
+EVOLUTION_EXECUTIONS = ("rows", "aggregate", "stream")
+
+
+def period_key(period, granularity):
+    """Label of a date_trunc period ('YYYY-MM' for months, else 'YYYY-MM-DD')."""
+    return period.strftime("%Y-%m" if granularity == "month" else "%Y-%m-%d")
+
+
+def stack_embeddings(values, positions=None):
+    """
+    Decode embeddings into one contiguous (n, dim) float32 matrix.
+
+    Values fetched through the API pool are numpy arrays (binary vector codec)
+    and are copied row by row into a preallocated matrix. Text literals from
+    other drivers are parsed with a single np.fromstring call over all rows.
+
+    Args:
+        values: Embeddings (arrays or text literals)
+        positions: Optional target row of each value (defaults to input order)
+    """
+    n = len(values)
+    if n == 0:
+        return np.empty((0, 0), dtype=np.float32)
+    if positions is None:
+        positions = np.arange(n)
+
+    if isinstance(values[0], str):
+        flat = np.fromstring(",".join(v.strip("[]") for v in values), sep=",", dtype=np.float32)
+        matrix = np.empty((n, flat.size // n), dtype=np.float32)
+        matrix[positions] = flat.reshape(n, -1)
+        return matrix
+
+    matrix = np.empty((n, len(values[0])), dtype=np.float32)
+    for i, value in zip(positions.tolist(), values):
+        matrix[i] = value
+    return matrix
+
+
+def period_codes(rows, granularity):
+    """
+    Map the period of every row to an integer code.
+
+    Returns:
+        Tuple of (codes, periods): int64 code of each row and the period keys,
+        in order of first appearance
+    """
+    index = {}
+    codes = np.fromiter(
+        (index.setdefault(row["period"], len(index)) for row in rows),
+        dtype=np.int64,
+        count=len(rows)
+    )
+    return codes, [period_key(period, granularity) for period in index]
+
+
+def group_by_code(rows, codes, n_codes):
+    """
+    Decode the embeddings of `rows` into a float32 matrix sorted by code.
+
+    Every row is written straight to its slot (stable order within a code),
+    so code i is the contiguous block matrix[offsets[i]:offsets[i + 1]].
+
+    Returns:
+        Tuple of (matrix, offsets)
+    """
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_codes))])
+    positions = np.empty(len(codes), dtype=np.int64)
+    positions[np.argsort(codes, kind="stable")] = np.arange(len(codes))
+    return stack_embeddings([row["embedding"] for row in rows], positions), offsets
+
 
 def group_embeddings_by_period(rows, granularity):
     """
-    Group embeddings by time period, parsing string format if needed.
-    
+    Decode embeddings into one float32 matrix, grouped by period.
+
+    Periods are mapped to integer codes and every row is written straight to
+    its slot in code order, so each period is a contiguous block of the
+    matrix and centroids are plain slice sums (no per-period lists).
+
+    Returns:
+        Tuple of (matrix, offsets, periods): the (n, dim) float32 embeddings,
+        block boundaries (period i is matrix[offsets[i]:offsets[i + 1]]) and the
+        period keys, in order of first appearance
+    """
+    codes, periods = period_codes(rows, granularity)
+    matrix, offsets = group_by_code(rows, codes, len(periods))
+    return matrix, offsets, periods
+
+
+def compute_centroids(matrix, offsets, periods):
+    """
+    Per-period mean embedding and row count from `group_embeddings_by_period`.
+
     Returns:
-        Tuple of (embeddings_by_period, counts_by_period)
-    """
-    embeddings_by_period = defaultdict(list)
-    counts_by_period = defaultdict(int)
-
-    for row in rows:
-        period_key = row["period"].strftime(
-            "%Y-%m" if granularity == "month" else "%Y-%m-%d"
-        )
-        
-        # Parse embedding from string format if needed
-        embedding_data = row["embedding"]
-        if isinstance(embedding_data, str):
-            # Remove brackets and parse as floats
-            embedding_data = embedding_data.strip('[]').split(',')
-            embedding = np.array([float(x) for x in embedding_data])
-        else:
-            embedding = np.array(embedding_data)
-        
-        embeddings_by_period[period_key].append(embedding)
-        counts_by_period[period_key] += 1
-
-    return dict(embeddings_by_period), dict(counts_by_period)
-
-
-def compute_centroids(period_data):
-    return {
-        period: np.mean(vectors, axis=0)
-        for period, vectors in period_data.items()
+        Tuple of (centroids, counts) by period key
+    """
+    counts = np.diff(offsets)
+    centroids = {
+        period: matrix[offsets[i]:offsets[i + 1]].sum(axis=0) / int(max(counts[i], 1))
+        for i, period in enumerate(periods)
     }
+    return centroids, {period: int(counts[i]) for i, period in enumerate(periods)}
+
+
+class PeriodAccumulator:
+    """
+    Running per-period embedding sums, counts and similarity sums.
+
+    Chunks of rows (period, embedding, similarity) are reduced by period code
+    and folded in, so memory stays bounded by the
+    chunk size plus one float64 vector per period.
+    """
+
+    def __init__(self, granularity):
+        self.granularity = granularity
+        self.sums = {}
+        self.counts = {}
+        self.similarity_sums = {}
+
+    def add(self, rows):
+        if not rows:
+            return
+        codes, periods = period_codes(rows, self.granularity)
+        matrix, offsets = group_by_code(rows, codes, len(periods))
+        similarities = np.fromiter((row["similarity"] for row in rows), dtype=np.float64, count=len(rows))
+        similarity_sums = np.bincount(codes, weights=similarities, minlength=len(periods))
+
+        for i, period in enumerate(periods):
+            block_sum = matrix[offsets[i]:offsets[i + 1]].sum(axis=0, dtype=np.float64)
+            if period in self.sums:
+                self.sums[period] += block_sum
+            else:
+                self.sums[period] = block_sum
+            self.counts[period] = self.counts.get(period, 0) + int(offsets[i + 1] - offsets[i])
+            self.similarity_sums[period] = self.similarity_sums.get(period, 0.0) + float(similarity_sums[i])
+
+    def result(self):
+        """Tuple of (centroids, counts, mean similarities) by period key."""
+        centroids = {p: (s / self.counts[p]).astype(np.float32) for p, s in self.sums.items()}
+        means = {p: self.similarity_sums[p] / self.counts[p] for p in self.sums}
+        return centroids, dict(self.counts), means
+
+
+class ConceptPeriodAccumulator:
+    """
+    Running per-(concept, period) embedding sums, counts and similarity sums
+    of several concepts over a single stream of rows (period, embedding).
+
+    Every chunk is scored against all concepts with one (rows x concepts)
+    matrix product. Within a period block, the sums of the rows above the
+    threshold of each concept are a second product: the transposed
+    (rows x concepts) match mask times the (rows x dim) embeddings.
+    """
+
+    def __init__(self, granularity, concept_vectors, similarity_threshold):
+        self.granularity = granularity
+        self.concepts = np.stack(list(unit_vectors(dict(enumerate(concept_vectors))).values()))
+        self.similarity_threshold = similarity_threshold
+        self.sums = {}
+        self.counts = {}
+        self.similarity_sums = {}
+
+    def add(self, rows):
+        if not rows:
+            return
+        codes, periods = period_codes(rows, self.granularity)
+        matrix, offsets = group_by_code(rows, codes, len(periods))
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        similarities = (matrix @ self.concepts.T) / norms[:, None]
+        matches = (similarities > self.similarity_threshold).astype(np.float32)
+
+        for i, period in enumerate(periods):
+            block = slice(offsets[i], offsets[i + 1])
+            block_sums = (matches[block].T @ matrix[block]).astype(np.float64)
+            block_counts = matches[block].sum(axis=0).astype(np.int64)
+            block_similarities = (similarities[block] * matches[block]).sum(axis=0, dtype=np.float64)
+            if period in self.sums:
+                self.sums[period] += block_sums
+                self.counts[period] += block_counts
+                self.similarity_sums[period] += block_similarities
+            else:
+                self.sums[period] = block_sums
+                self.counts[period] = block_counts
+                self.similarity_sums[period] = block_similarities
+
+    def result(self):
+        """
+        Tuple of (periods, centroids, counts, mean similarities): the sorted
+        period keys, a (concepts, periods, dim) float32 array and two
+        (concepts, periods) arrays. Pairs without matches have a zero centroid,
+        a zero count and a NaN mean.
+        """
+        periods = sorted(self.sums)
+        n_concepts, dim = self.concepts.shape
+        sums = np.zeros((n_concepts, len(periods), dim))
+        counts = np.zeros((n_concepts, len(periods)), dtype=np.int64)
+        similarity_sums = np.zeros((n_concepts, len(periods)))
+        for j, period in enumerate(periods):
+            sums[:, j] = self.sums[period]
+            counts[:, j] = self.counts[period]
+            similarity_sums[:, j] = self.similarity_sums[period]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            centroids = np.where(counts[..., None] > 0, sums / np.maximum(counts, 1)[..., None], 0.0)
+            means = similarity_sums / counts
+        return periods, centroids.astype(np.float32), counts, means
 
 
 def cosine_similarity(vec1, vec2):
@@ -45,29 +222,47 @@ def cosine_similarity(vec1, vec2):
     )
 
 
-def compute_evolution_points(centroids, concept_vec, counts):
+def unit_vectors(vectors):
+    """
+    Normalize each vector of a {period: vector} dict to unit length once.
+
+    Stored embeddings and query vectors are already unit length, but their
+    means (centroids) are not; after this, cosine similarity is a dot product.
+    """
+    out = {}
+    for period, vec in vectors.items():
+        vec = np.asarray(vec, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        out[period] = vec / norm if norm > 0 else vec
+    return out
+
+
+def compute_evolution_points(centroids, concept_vec, counts, mean_similarities=None):
+    units = unit_vectors(centroids)
+    concept_unit = unit_vectors({None: concept_vec})[None]
     points = []
 
-    for period in sorted(centroids.keys()):
-        sim = cosine_similarity(centroids[period], concept_vec)
-        points.append({
+    for period in sorted(units.keys()):
+        sim = float(np.dot(units[period], concept_unit))
+        point = {
             "period": period,
             "centroid_similarity": round(sim, 2),
             "num_chunks": counts[period]
-        })
+        }
+        if mean_similarities is not None:
+            point["mean_similarity"] = round(mean_similarities[period], 2)
+        points.append(point)
 
     return points
 
 
 def compute_drift(centroids):
-    periods = sorted(centroids.keys())
+    units = unit_vectors(centroids)
+    periods = sorted(units.keys())
     drift = []
 
     for i in range(len(periods) - 1):
-        sim = cosine_similarity(
-            centroids[periods[i]],
-            centroids[periods[i + 1]]
-        )
+        sim = float(np.dot(units[periods[i]], units[periods[i + 1]]))
         drift.append({
             "from": periods[i],
             "to": periods[i + 1],
@@ -75,3 +270,47 @@ def compute_drift(centroids):
         })
 
     return drift
+
+
+def compute_concept_evolutions(concept_vectors, periods, centroids, counts, mean_similarities):
+    """
+    Evolution points and drift of every concept from the (concepts x periods)
+    arrays of ConceptPeriodAccumulator.result().
+
+    The centroid-to-concept similarity of every (concept, period) pair is one
+    batched product. As for a single concept, periods without matches are
+    left out, and drift is measured between consecutive periods that have
+    matches.
+
+    Returns:
+        One {"points": [...], "drift": [...]} dict per concept, in input order
+    """
+    norms = np.linalg.norm(centroids, axis=2, keepdims=True)
+    units = centroids / np.where(norms > 0, norms, 1.0)
+    concepts = np.stack(list(unit_vectors(dict(enumerate(concept_vectors))).values()))
+    centroid_similarities = np.einsum("cpd,cd->cp", units, concepts)
+
+    evolutions = []
+    for c in range(len(concepts)):
+        present = np.flatnonzero(counts[c])
+        points = [
+            {
+                "period": periods[p],
+                "centroid_similarity": round(float(centroid_similarities[c, p]), 2),
+                "num_chunks": int(counts[c, p]),
+                "mean_similarity": round(float(mean_similarities[c, p]), 2)
+            }
+            for p in present
+        ]
+        steps = np.einsum("kd,kd->k", units[c, present[:-1]], units[c, present[1:]])
+        drift = [
+            {
+                "from": periods[a],
+                "to": periods[b],
+                "semantic_change": round(1 - float(sim), 2)
+            }
+            for a, b, sim in zip(present[:-1], present[1:], steps)
+        ]
+        evolutions.append({"points": points, "drift": drift})
+
+    return evolutions
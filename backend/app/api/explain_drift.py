@@ -36,7 +36,8 @@ async def explain_drift(req: ExplainDriftRequest):
             from_period=req.from_period,
             to_period=req.to_period,
             max_examples=req.max_examples,
-            similarity_threshold=req.similarity_threshold
+            similarity_threshold=req.similarity_threshold,
+            mode=req.mode
         )
         
         return ExplainDriftResponse(**result)
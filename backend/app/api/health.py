@@ -5,9 +5,10 @@ Health check endpoints for Azure Web Service.
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 from backend.utils.dbpool import get_pool
+from backend.utils.embedding_cache import get_cache_stats
+from backend.utils.result_cache import get_result_cache_stats
 from backend.settings import settings
 from backend.__version__ import __version__
-from openai import AzureOpenAI
 import asyncio
 from typing import Dict, Any
 import time
@@ -75,6 +76,7 @@ async def check_openai() -> Dict[str, Any]:
             }
         
         # Instantiate client (does not make API calls)
+        from openai import AzureOpenAI
         client = AzureOpenAI(
             api_key=settings.azure_openai_api_key,
             api_version=settings.azure_openai_api_version,
@@ -150,6 +152,19 @@ async def health_check_detailed():
     return JSONResponse(content=response, status_code=status_code)
 
 
+@router.get("/health/cache")
+async def cache_stats():
+    """
+    Hit/miss counters of the query embedding cache and the result cache.
+
+    Counters are per worker process and reset on restart.
+
+    Returns:
+        200 OK with in-memory and persistent tier statistics
+    """
+    return {"embedding_cache": get_cache_stats(), "result_cache": get_result_cache_stats()}
+
+
 @router.get("/health/ready")
 async def readiness_check():
     """
@@ -6,7 +6,7 @@ router = APIRouter(tags=["question-answering"])
 
 @router.post("/question", response_model=QuestionResponse)
 async def question_answer(req: QuestionRequest):
-    result = await answer_question(req.question, req.top_k)
+    result = await answer_question(req.question, req.top_k, mode=req.mode, filters=req.filters())
 
     if result is None:
         raise HTTPException(status_code=404, detail="No documents found")
@@ -1,17 +1,42 @@
 from fastapi import APIRouter, HTTPException
-from backend.app.models.search import SearchRequest, SearchResponse
-from backend.app.services.search_service import semantic_search
+from backend.app.models.search import BatchSearchRequest, BatchSearchResponse, SearchRequest, SearchResponse
+from backend.app.services.search_service import batch_search, semantic_search
 
 router = APIRouter(tags=["semantic-search"])
 
 @router.post("/search", response_model=SearchResponse)
 async def search(req: SearchRequest):
-    result = await semantic_search(req.question, req.top_k)
+    try:
+        result, next_cursor = await semantic_search(
+            req.question, req.top_k, mode=req.mode, filters=req.filters(), cursor=req.cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if result is None or len(result) == 0:
         raise HTTPException(status_code=404, detail="No documents found")
 
     return {
         "question": req.question,
-        "results": result
+        "results": result,
+        "next_cursor": next_cursor
+    }
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch(req: BatchSearchRequest):
+    try:
+        results = await batch_search(req.queries, req.top_k, mode=req.mode, filters=req.filters())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "results": [
+            {
+                "question": query,
+                "results": rows,
+                "next_cursor": next_cursor
+            }
+            for query, (rows, next_cursor) in zip(req.queries, results)
+        ]
     }
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException
 from backend.app.models.semantic_evolution import (
+    MultiConceptEvolutionRequest,
+    MultiConceptEvolutionResponse,
     SemanticEvolutionRequest,
     SemanticEvolutionResponse
 )
-from backend.app.services.semantic_evolution_service import compute_semantic_evolution
+from backend.app.services.semantic_evolution_service import (
+    compute_multi_concept_evolution,
+    compute_semantic_evolution
+)
 
 router = APIRouter(tags=["semantic-evolution"])
 
@@ -32,7 +37,9 @@ async def semantic_evolution(req: SemanticEvolutionRequest):
             granularity=req.granularity,
             start_date=req.start_date,
             end_date=req.end_date,
-            similarity_threshold=req.similarity_threshold
+            similarity_threshold=req.similarity_threshold,
+            mode=req.mode,
+            execution=req.execution
         )
         
         elapsed = time.time() - start_time
@@ -67,3 +74,64 @@ async def semantic_evolution(req: SemanticEvolutionRequest):
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error computing semantic evolution: {str(e)}")
+
+
+@router.post("/semantic-evolution/multi", response_model=MultiConceptEvolutionResponse)
+async def multi_concept_evolution(req: MultiConceptEvolutionRequest):
+    """
+    Compute semantic evolution metrics for several concepts over the same range.
+
+    The concepts are embedded in one batch and the range is scanned once for
+    all of them.
+
+    Returns:
+        - One semantic evolution result (points, drift, max drift) per concept
+    """
+    import time
+    from asyncpg.exceptions import QueryCanceledError, TooManyConnectionsError
+
+    try:
+        print(f"[semantic_evolution] Multi-concept request: concepts={req.concepts}, granularity={req.granularity}, "
+              f"start_date={req.start_date}, end_date={req.end_date}, threshold={req.similarity_threshold}")
+
+        start_time = time.time()
+
+        result = await compute_multi_concept_evolution(
+            concepts=req.concepts,
+            granularity=req.granularity,
+            start_date=req.start_date,
+            end_date=req.end_date,
+            similarity_threshold=req.similarity_threshold
+        )
+
+        elapsed = time.time() - start_time
+        print(f"[semantic_evolution] Multi-concept completed in {elapsed:.2f}s: {len(result['concepts'])} concepts")
+
+        return result
+
+    except TimeoutError:
+        print(f"[semantic_evolution] Multi-concept query timeout")
+        raise HTTPException(
+            status_code=504,
+            detail="Query timeout: The analysis took too long. Try using a higher similarity_threshold (e.g., 0.75) or a shorter date range."
+        )
+
+    except QueryCanceledError:
+        print(f"[semantic_evolution] Multi-concept query canceled by database")
+        raise HTTPException(
+            status_code=504,
+            detail="Query canceled: The analysis exceeded database limits. Try narrowing your search parameters."
+        )
+
+    except TooManyConnectionsError:
+        print(f"[semantic_evolution] Too many database connections")
+        raise HTTPException(
+            status_code=503,
+            detail="Service temporarily unavailable. Please try again in a moment."
+        )
+
+    except Exception as e:
+        print(f"[semantic_evolution] Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error computing multi-concept evolution: {str(e)}")
@@ -4,6 +4,7 @@ from backend.app.api import qa, search, semantic_evolution, explain_drift, healt
 from backend.__version__ import __version__, API_VERSION, API_TITLE, API_DESCRIPTION, REPOSITORY
 from backend.utils.logger import setup_logger
 from backend.utils.dbpool import get_pool, close_pool
+from backend.utils.embedding_client import close_client
 from dotenv import load_dotenv
 from typing import List
 import os
@@ -125,6 +126,12 @@ async def shutdown_event():
     except Exception as e:
         logger.error("Error closing database pool", extra={"error": str(e)})
 
+    # Close shared embedding client
+    try:
+        await close_client()
+    except Exception as e:
+        logger.error("Error closing embedding client", extra={"error": str(e)})
+
 
 @app.get("/")
 async def root():
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
+from backend.utils.vector_search import RetrievalMode
 
 
 class ExplainDriftRequest(BaseModel):
@@ -8,6 +9,7 @@ class ExplainDriftRequest(BaseModel):
     to_period: str = Field(..., description="Period in YYYY-MM format", pattern=r"^\d{4}-\d{2}$")
     max_examples: int = Field(default=10, ge=1, le=50, description="Maximum examples to retrieve")
     similarity_threshold: float = Field(default=0.6, ge=0.0, le=1.0, description="Minimum similarity to concept")
+    mode: Optional[RetrievalMode] = Field(default=None, description="Retrieval mode; defaults to RETRIEVAL_MODE setting")
 
 
 class CoreFraming(BaseModel):
@@ -1,9 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from backend.utils.vector_search import SearchMode
+from backend.app.models.search import SearchFilters
 
-class QuestionRequest(BaseModel):
+class QuestionRequest(SearchFilters):
     question: str
     top_k: int = 5
+    mode: Optional[SearchMode] = Field(default=None, description="Retrieval mode ('hybrid' adds full-text matches, 'memmap'/'ivfpq' search the in-process indexes); defaults to RETRIEVAL_MODE setting")
 
 class Source(BaseModel):
     doc_id: str
@@ -1,9 +1,31 @@
-from pydantic import BaseModel
+from datetime import date
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from backend.settings import settings
+from backend.utils.vector_search import SearchMode, TurnType
 
-class SearchRequest(BaseModel):
+class SearchFilters(BaseModel):
+    start_date: Optional[date] = Field(default=None, description="Only turns published on or after this date")
+    end_date: Optional[date] = Field(default=None, description="Only turns published on or before this date")
+    speaker: Optional[str] = Field(default=None, description="Normalized speaker name")
+    role: Optional[str] = None
+    type: Optional[TurnType] = None
+
+    def filters(self) -> dict:
+        """Keyword arguments of vector_search.filter_sql."""
+        return {
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "speaker": self.speaker,
+            "role": self.role,
+            "turn_type": self.type,
+        }
+
+class SearchRequest(SearchFilters):
     question: str
     top_k: int = 5
+    mode: Optional[SearchMode] = Field(default=None, description="Retrieval mode ('hybrid' adds full-text matches, 'memmap'/'ivfpq' search the in-process indexes); defaults to RETRIEVAL_MODE setting")
+    cursor: Optional[str] = Field(default=None, description="next_cursor of the previous page (same question, filters and mode)")
 
 class SearchResult(BaseModel):
     doc_id: str
@@ -18,3 +40,12 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     question: str
     results: List[SearchResult]
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page; null on the last page and in 'hybrid'/'memmap'/'ivfpq' modes")
+
+class BatchSearchRequest(SearchFilters):
+    queries: List[str] = Field(min_length=1, max_length=settings.batch_search_max_queries)
+    top_k: int = 5
+    mode: Optional[SearchMode] = Field(default=None, description="Retrieval mode for every query; defaults to RETRIEVAL_MODE setting")
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse] = Field(description="One response per query, in input order")
@@ -1,6 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import date
+from backend.settings import settings
+from backend.utils.vector_search import RetrievalMode
+from backend.analytics.narrative_evolution import EvolutionExecution
 
 
 class SemanticEvolutionRequest(BaseModel):
@@ -9,12 +12,23 @@ class SemanticEvolutionRequest(BaseModel):
     start_date: date
     end_date: date
     similarity_threshold: float = 0.6
+    mode: Optional[RetrievalMode] = Field(default=None, description="Retrieval mode of the 'rows' execution; defaults to RETRIEVAL_MODE setting")
+    execution: Optional[EvolutionExecution] = Field(default=None, description="'aggregate' computes per-period centroids in PostgreSQL over all matches, 'stream' reads all matches in chunks through a server-side cursor, 'rows' averages the 10,000 nearest in Python; defaults to EVOLUTION_EXECUTION setting")
+
+
+class MultiConceptEvolutionRequest(BaseModel):
+    concepts: List[str] = Field(min_length=1, max_length=settings.evolution_max_concepts)
+    granularity: str = "month"
+    start_date: date
+    end_date: date
+    similarity_threshold: float = 0.6
 
 
 class EvolutionPoint(BaseModel):
     period: str
     centroid_similarity: float
     num_chunks: int
+    mean_similarity: Optional[float] = Field(default=None, description="Mean similarity of the period's turns to the concept ('aggregate' and 'stream' executions)")
 
 
 class DriftPoint(BaseModel):
@@ -42,3 +56,8 @@ class SemanticEvolutionResponse(BaseModel):
     points: List[EvolutionPoint]
     drift: List[DriftPoint]
     max_drift: Optional[MaxDrift]
+
+
+class MultiConceptEvolutionResponse(BaseModel):
+    granularity: str
+    concepts: List[SemanticEvolutionResponse]
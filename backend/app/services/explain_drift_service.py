@@ -1,7 +1,6 @@
-import numpy as np
-import json
 from datetime import datetime, timedelta
-from backend.utils.postprocessing_helpers import embed_text
+from typing import Optional
+from backend.utils.embedding_cache import embed_query
 from backend.analytics.drift import (
     fetch_sentences,
     top_sentences,
@@ -16,7 +15,8 @@ async def explain_drift_service(
     from_period: str,
     to_period: str,
     max_examples: int = 10,
-    similarity_threshold: float = 0.6
+    similarity_threshold: float = 0.6,
+    mode: Optional[str] = None
 ):
     """
     Main service function to explain semantic drift between two periods.
@@ -26,12 +26,13 @@ async def explain_drift_service(
         from_period: Period in YYYY-MM format
         to_period: Period in YYYY-MM format
         max_examples: Maximum number of examples per period
+        mode: Retrieval mode (see vector_search.RETRIEVAL_MODES); defaults to settings
     
     Returns:
         Dictionary with drift explanation in new format
     """
     # Get concept embedding
-    concept_embedding = embed_text(concept)
+    concept_embedding = await embed_query(concept)
     
     # Parse periods and create date ranges (full month)
     from_date = datetime.strptime(f"{from_period}-01", "%Y-%m-%d")
@@ -60,8 +61,8 @@ async def explain_drift_service(
     fetch_limit = max(100, max_examples * 10)
     
     # Fetch sentences for both periods
-    pre_rows = await fetch_sentences(concept_embedding, pre_range, similarity_threshold=similarity_threshold, top_k=fetch_limit)
-    post_rows = await fetch_sentences(concept_embedding, post_range, similarity_threshold=similarity_threshold, top_k=fetch_limit)
+    pre_rows = await fetch_sentences(concept_embedding, pre_range, similarity_threshold=similarity_threshold, top_k=fetch_limit, mode=mode)
+    post_rows = await fetch_sentences(concept_embedding, post_range, similarity_threshold=similarity_threshold, top_k=fetch_limit, mode=mode)
     
     # Get top sentences
     pre_top_sentences = top_sentences(pre_rows, n=max_examples)
@@ -71,14 +72,9 @@ async def explain_drift_service(
     if not pre_rows or not post_rows:
         semantic_change = 0.0
     else:
-        pre_embeddings = [
-            np.array(json.loads(r["embedding"]) if isinstance(r["embedding"], str) else r["embedding"]) 
-            for r in pre_rows
-        ]
-        post_embeddings = [
-            np.array(json.loads(r["embedding"]) if isinstance(r["embedding"], str) else r["embedding"]) 
-            for r in post_rows
-        ]
+        # Embeddings are decoded into numpy arrays by the pool's vector codec
+        pre_embeddings = [r["embedding"] for r in pre_rows]
+        post_embeddings = [r["embedding"] for r in post_rows]
         semantic_change = calculate_semantic_change(pre_embeddings, post_embeddings)
     
     # Get LLM structured analysis
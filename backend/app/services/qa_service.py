@@ -1,6 +1,25 @@
+from typing import Optional
 from backend.utils.dbpool import get_pool
-from backend.utils.postprocessing_helpers import embed_text
-from openai import AzureOpenAI
+from backend.utils.embedding_cache import embed_query
+from backend.utils.result_cache import fetch_cached, result_key
+from backend.utils.vector_search import (
+    IN_PROCESS_MODES,
+    SEARCH_MODES,
+    QueryParams,
+    candidate_cte,
+    candidate_filter,
+    candidate_join,
+    candidate_limit,
+    fetch_ann,
+    filter_mode,
+    filter_sql,
+    in_process_hits,
+    resolve_mode,
+    result_order,
+    similarity_sql,
+    vector_distance,
+    as_vector
+)
 
 from backend.settings import (
     azure_openai_endpoint,
@@ -9,24 +28,41 @@ from backend.settings import (
     azure_openai_chat_deployment
 )
 
-async def answer_question(question: str, top_k: int):
+async def answer_question(question: str, top_k: int, mode: Optional[str] = None, filters: Optional[dict] = None):
     """
     Answers a question using a retrieval-augmented generation approach.
     Args:
         question (str): The question to answer.
         top_k (int): The number of top relevant documents to retrieve.
+        mode (str|None): Retrieval mode (see vector_search.SEARCH_MODES); defaults to settings.
+        filters (dict|None): Date range, speaker, role and type filters (see vector_search.filter_sql),
+            applied inside the vector scan.
     Returns:
         answer (str): The generated answer.
         sources (list): List of source documents used for the answer.
     """
     # 1️⃣ Embed question
-    embedding = embed_text(question)
-    embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+    embedding = await embed_query(question)
 
     # 2️⃣ Vector search
     pool = await get_pool()
+    mode = resolve_mode(mode, allowed=SEARCH_MODES)
+
+    params = QueryParams()
+    query_vec = params.add(as_vector(embedding))
+    where = filter_sql(params, **(filters or {}))
+    mode = filter_mode(mode, where != "TRUE")
+    n_candidates = candidate_limit(top_k, mode)
+    hits = await in_process_hits(mode, embedding, top_k)
+    cte = candidate_cte(
+        mode, params, query_vec, embedding, n_candidates,
+        where=where,
+        query_text=question,
+        hits=hits
+    )
 
-    sql = """
+    sql = f"""
+    {cte}
     SELECT
       st.doc_id,
       st.sequence,
@@ -34,15 +70,24 @@ async def answer_question(question: str, top_k: int):
       st.text,
       rtm.title,
       rtm.href,
-      1 - (st.embedding <=> $1::vector) AS similarity
+      {similarity_sql(vector_distance("st.embedding", f"{query_vec}::vector"))} AS similarity
     FROM speech_turns st
+    {candidate_join(mode)}
     LEFT JOIN raw_transcripts_meta rtm ON st.doc_id = rtm.doc_id
-    ORDER BY st.embedding <=> $1::vector
-    LIMIT $2;
+    WHERE {where}
+      AND {candidate_filter(mode)}
+    ORDER BY {result_order(mode, query_vec)}
+    LIMIT {params.add(top_k)};
     """
 
+    # Retrieval results are cached until the next ingestion (in-process modes excluded)
+    key = None if mode in IN_PROCESS_MODES else result_key(
+        "qa", embedding,
+        top_k=top_k, mode=mode, filters=filters,
+        text=question if mode == "hybrid" else None
+    )
     async with pool.acquire() as conn:
-        rows = await conn.fetch(sql, embedding_str, top_k)
+        rows = await fetch_cached(conn, key, lambda: fetch_ann(conn, sql, params, n_candidates))
 
     if not rows:
         return None
@@ -59,7 +104,9 @@ async def answer_question(question: str, top_k: int):
         )
     context = "\n\n".join(context_lines)
 
-    # 4️⃣ Call LLM
+    # 4️⃣ Call LLM (openai is imported on first use to keep API startup lean)
+    from openai import AzureOpenAI
+
     client = AzureOpenAI(
         azure_endpoint=azure_openai_endpoint,
         api_key=azure_openai_api_key,
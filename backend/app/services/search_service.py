@@ -1,51 +1,137 @@
+import asyncio
+from typing import List, Optional
+from backend.settings import settings
 from backend.utils.dbpool import get_pool
-from backend.utils.postprocessing_helpers import embed_text
-
-# Minimum length thresholds for meaningful content
-MIN_TEXT_LENGTH = 150  # characters
-MIN_WORD_COUNT = 20    # words
+from backend.utils.embedding_cache import embed_query, embed_queries
+from backend.utils.result_cache import fetch_cached, result_key
+from backend.utils.vector_search import (
+    CURSOR_MODES,
+    IN_PROCESS_MODES,
+    SEARCH_MODES,
+    QueryParams,
+    candidate_cte,
+    candidate_filter,
+    candidate_join,
+    candidate_limit,
+    decode_cursor,
+    encode_cursor,
+    fetch_ann,
+    filter_mode,
+    filter_sql,
+    in_process_hits,
+    keyset_iterative_scan,
+    keyset_page_sql,
+    keyset_sql,
+    query_fingerprint,
+    resolve_mode,
+    result_order,
+    similarity_sql,
+    vector_distance,
+    as_vector
+)
+from backend.utils.text_utils import text_quality
 
 
 def is_meaningful_result(text: str) -> bool:
     """
     Filters out poor quality or too-short results that aren't meaningful.
+
+    Same rule as the precomputed speech_turns.is_meaningful column that
+    semantic_search filters on.
     Args:
         text (str): The text to evaluate.
     Returns:
         bool: True if the text is meaningful enough to return.
     """
-    if not text:
-        return False
-    
-    # Check minimum character length
-    if len(text.strip()) < MIN_TEXT_LENGTH:
-        return False
-    
-    # Check minimum word count
-    word_count = len(text.split())
-    if word_count < MIN_WORD_COUNT:
-        return False
-    
-    return True
-
-
-async def semantic_search(query: str, top_k: int):
+    return text_quality(text)[2]
+
+
+async def semantic_search(
+    query: str,
+    top_k: int,
+    mode: Optional[str] = None,
+    filters: Optional[dict] = None,
+    cursor: Optional[str] = None
+):
     """
     Performs a semantic search over the documents.
     Args:
         query (str): The search query.
         top_k (int): The number of top relevant documents to retrieve.
+        mode (str|None): Retrieval mode (see vector_search.SEARCH_MODES); defaults to settings.
+        filters (dict|None): Date range, speaker, role and type filters (see vector_search.filter_sql),
+            applied inside the vector scan.
+        cursor (str|None): next_cursor of the previous page (modes in vector_search.CURSOR_MODES).
     Returns:
-        results (list): List of relevant documents with meaningful content.
+        results (list): Up to top_k relevant documents with meaningful content.
+        next_cursor (str|None): Cursor of the next page, None on the last page or in
+            modes without cursor pagination.
+    Raises:
+        ValueError: If the cursor is invalid or the mode has no cursor pagination.
     """
     # 1️⃣ Embed query
-    embedding = embed_text(query)
-    embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+    embedding = await embed_query(query)
+    return await search_embedding(query, embedding, top_k, mode, filters, cursor)
 
-    # 2️⃣ Vector search - fetch more results to account for filtering
-    pool = await get_pool()
 
-    sql = """
+def search_sql(
+    mode: str,
+    params: QueryParams,
+    query_vec: str,
+    embedding: List[float],
+    top_k: int,
+    n_candidates: int,
+    where: str,
+    query: str,
+    hits=None
+) -> str:
+    """
+    SQL of one search page over meaningful turns (see search_embedding).
+
+    Modes with cursor pagination fetch top_k + 1 rows from a scan ordered by
+    distance alone and break ties by speech_id outside it (keyset_page_sql),
+    so the HNSW index still drives the scan.
+    """
+    cte = candidate_cte(
+        mode, params, query_vec, embedding, n_candidates,
+        where=f"st.is_meaningful AND {where}",
+        query_text=query,
+        hits=hits
+    )
+    distance = vector_distance("st.embedding", f"{query_vec}::vector")
+
+    if mode in CURSOR_MODES:
+        page = f"""
+      SELECT
+        st.doc_id,
+        st.speech_id,
+        st.text,
+        st.speaker_normalized,
+        st.role,
+        {distance} AS distance
+      FROM speech_turns st
+      WHERE st.is_meaningful
+        AND {where}
+        AND {candidate_filter(mode)}
+      ORDER BY {distance}
+      LIMIT {params.add(top_k + 1)}"""
+        return keyset_page_sql(
+            cte, page,
+            select=f"""
+      p.doc_id,
+      p.speech_id,
+      p.text,
+      p.speaker_normalized,
+      p.role,
+      rtm.href,
+      rtm.title,
+      {similarity_sql('p.distance')} AS similarity,
+      p.distance""",
+            joins="LEFT JOIN raw_transcripts_meta rtm ON p.doc_id = rtm.doc_id"
+        ) + ";"
+
+    return f"""
+    {cte}
     SELECT
       st.doc_id,
       st.speech_id,
@@ -54,27 +140,99 @@ async def semantic_search(query: str, top_k: int):
       st.role,
       rtm.href,
       rtm.title,
-      1 - (st.embedding <=> $1::vector) AS similarity
+      {similarity_sql(distance)} AS similarity,
+      {distance} AS distance
     FROM speech_turns st
+    {candidate_join(mode)}
     LEFT JOIN raw_transcripts_meta rtm ON st.doc_id = rtm.doc_id
-    ORDER BY st.embedding <=> $1::vector
-    LIMIT $2;
+    WHERE st.is_meaningful
+      AND {where}
+      AND {candidate_filter(mode)}
+    ORDER BY {result_order(mode, query_vec)}
+    LIMIT {params.add(top_k)};
     """
 
-    # Fetch more results to account for filtering
-    fetch_limit = max(top_k * 3, top_k + 20)
-    
+
+async def search_embedding(
+    query: str,
+    embedding: List[float],
+    top_k: int,
+    mode: Optional[str] = None,
+    filters: Optional[dict] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Vector search for an already embedded query (see semantic_search).
+    """
+    # 2️⃣ Vector search over meaningful turns only
+    # (precomputed flag, served by the partial indexes in backend/db/meaningful_turns.sql)
+    pool = await get_pool()
+    mode = resolve_mode(mode, allowed=SEARCH_MODES)
+
+    params = QueryParams()
+    query_vec = params.add(as_vector(embedding))
+    where = filter_sql(params, **(filters or {}))
+    mode = filter_mode(mode, where != "TRUE")
+
+    # Keyset pagination: continue the ordered scan after the previous page.
+    # The query vector comes from the embedding cache, so later pages only
+    # pay for the rows they return.
+    paginated = mode in CURSOR_MODES
+    fingerprint = query_fingerprint(query, filters, mode)
+    if cursor:
+        if not paginated:
+            raise ValueError(f"Retrieval mode '{mode}' does not support cursor pagination")
+        where = f"{where} AND {keyset_sql(params, query_vec, *decode_cursor(cursor, fingerprint))}"
+
+    n_candidates = candidate_limit(top_k, mode)
+    hits = await in_process_hits(mode, embedding, top_k, meaningful_only=True)
+    sql = search_sql(mode, params, query_vec, embedding, top_k, n_candidates, where, query, hits)
+
+    # In-process indexes are synced separately from the watermark: not cached
+    key = None if mode in IN_PROCESS_MODES else result_key(
+        "search", embedding,
+        top_k=top_k, mode=mode, filters=filters, cursor=cursor,
+        text=query if mode == "hybrid" else None
+    )
     async with pool.acquire() as conn:
-        rows = await conn.fetch(sql, embedding_str, fetch_limit)
+        rows = await fetch_cached(conn, key, lambda: fetch_ann(
+            conn, sql, params, n_candidates,
+            iterative_scan=keyset_iterative_scan() if paginated else None
+        ))
+
+    results = [dict(row) for row in rows[:top_k]]
+    next_cursor = None
+    if paginated and len(rows) > top_k:
+        last = results[-1]
+        next_cursor = encode_cursor(last["distance"], last["speech_id"], fingerprint)
+    return results, next_cursor
 
-    if not rows:
-        return []
 
-    # 3️⃣ Filter results for meaningful content
-    meaningful_results = [
-        dict(row) for row in rows
-        if is_meaningful_result(row['text'])
-    ]
+async def batch_search(
+    queries: List[str],
+    top_k: int,
+    mode: Optional[str] = None,
+    filters: Optional[dict] = None
+):
+    """
+    Semantic search for several queries sharing top_k, mode and filters.
+
+    All queries are embedded with one call (see embedding_cache.embed_queries)
+    and searched concurrently on at most BATCH_SEARCH_CONCURRENCY pool
+    connections, so a batch never takes over the whole pool.
+    Args:
+        queries (list): Search queries.
+        top_k (int): The number of top relevant documents per query.
+        mode (str|None): Retrieval mode (see vector_search.SEARCH_MODES); defaults to settings.
+        filters (dict|None): Filters applied to every query (see semantic_search).
+    Returns:
+        list: (results, next_cursor) of each query, in input order.
+    """
+    embeddings = await embed_queries(queries)
+    semaphore = asyncio.Semaphore(settings.batch_search_concurrency)
+
+    async def run(query, embedding):
+        async with semaphore:
+            return await search_embedding(query, embedding, top_k, mode, filters)
 
-    # Return top_k meaningful results
-    return meaningful_results[:top_k]
+    return await asyncio.gather(*(run(q, e) for q, e in zip(queries, embeddings)))
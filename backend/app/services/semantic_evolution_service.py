@@ -1,13 +1,33 @@
 import numpy as np
 from collections import defaultdict
 from datetime import date
+from typing import List, Optional
+from backend.settings import settings
 from backend.utils.dbpool import get_pool
-from backend.utils.postprocessing_helpers import embed_text
+from backend.utils.embedding_cache import embed_queries, embed_query
+from backend.utils.vector_search import (
+    QueryParams,
+    candidate_cte,
+    candidate_filter,
+    candidate_limit,
+    fetch_ann,
+    max_distance,
+    resolve_mode,
+    similarity_sql,
+    vector_distance,
+    as_vector
+)
 from backend.analytics.narrative_evolution import (
+    EVOLUTION_EXECUTIONS,
+    ConceptPeriodAccumulator,
+    PeriodAccumulator,
+    period_key,
     group_embeddings_by_period,
     compute_centroids,
     compute_evolution_points,
-    compute_drift
+    compute_drift,
+    compute_concept_evolutions,
+    unit_vectors
 )
 
 
@@ -16,7 +36,9 @@ async def compute_semantic_evolution(
     granularity: str,
     start_date: date,
     end_date: date,
-    similarity_threshold: float
+    similarity_threshold: float,
+    mode: Optional[str] = None,
+    execution: Optional[str] = None
 ):
     """
     Compute semantic evolution metrics for a concept over time.
@@ -27,16 +49,20 @@ async def compute_semantic_evolution(
         start_date: Start date for analysis
         end_date: End date for analysis
         similarity_threshold: Minimum similarity to consider relevant
+        mode: Retrieval mode (see vector_search.RETRIEVAL_MODES) of the "rows" execution;
+            defaults to settings
+        execution: "rows", "aggregate" or "stream" (see narrative_evolution.EVOLUTION_EXECUTIONS);
+            defaults to settings.evolution_execution
     
     Returns:
         Dictionary with evolution points, drift points, and max drift
     """
+    execution = execution or settings.evolution_execution
+    if execution not in EVOLUTION_EXECUTIONS:
+        raise ValueError(f"Unknown execution '{execution}'. Expected one of {EVOLUTION_EXECUTIONS}")
+
     # Embed the concept
-    concept_embedding = embed_text(concept)
-    embedding_str = '[' + ','.join(map(str, concept_embedding)) + ']'
-    
-    # Fetch relevant embeddings grouped by period
-    pool = await get_pool()
+    concept_embedding = await embed_query(concept)
     
     # Map granularity to PostgreSQL date_trunc format
     trunc_map = {
@@ -45,35 +71,22 @@ async def compute_semantic_evolution(
         'day': 'day'
     }
     trunc_period = trunc_map.get(granularity, 'month')
-    
-    sql = f"""
-    SELECT
-      date_trunc('{trunc_period}', rtm.published_at) AS period,
-      st.embedding,
-      1 - (st.embedding <=> $1::vector) AS similarity
-    FROM speech_turns st
-    INNER JOIN raw_transcripts_meta rtm ON st.doc_id = rtm.doc_id
-    WHERE
-      rtm.published_at IS NOT NULL
-      AND rtm.published_at >= $2
-      AND rtm.published_at <= $3
-      AND (st.embedding <=> $1::vector) < $4  -- Use distance operator for better index usage
-    ORDER BY similarity DESC
-    LIMIT 10000;  -- Limit results to prevent extremely long queries
-    """
-    
-    async with pool.acquire() as conn:
-        # Convert similarity threshold to distance (1 - similarity)
-        distance_threshold = 1 - similarity_threshold
-        rows = await conn.fetch(
-            sql,
-            embedding_str,
-            start_date,
-            end_date,
-            distance_threshold
+
+    mean_similarities = None
+    if execution == "aggregate":
+        centroids, counts_by_period, mean_similarities = await aggregate_periods(
+            concept_embedding, trunc_period, granularity, start_date, end_date, similarity_threshold
         )
-    
-    if not rows:
+    elif execution == "stream":
+        centroids, counts_by_period, mean_similarities = await stream_periods(
+            concept_embedding, trunc_period, granularity, start_date, end_date, similarity_threshold
+        )
+    else:
+        centroids, counts_by_period = await nearest_row_periods(
+            concept_embedding, trunc_period, granularity, start_date, end_date, similarity_threshold, mode
+        )
+
+    if not centroids:
         return {
             "concept": concept,
             "granularity": granularity,
@@ -82,14 +95,10 @@ async def compute_semantic_evolution(
             "max_drift": None
         }
     
-    # Group embeddings by period using analytics module
-    embeddings_by_period, counts_by_period = group_embeddings_by_period(rows, granularity)
-    
-    centroids = compute_centroids(embeddings_by_period)
     concept_vec = np.array(concept_embedding)
     
     # Compute evolution points and drift using analytics module
-    evolution_points = compute_evolution_points(centroids, concept_vec, counts_by_period)
+    evolution_points = compute_evolution_points(centroids, concept_vec, counts_by_period, mean_similarities)
     drift_points = compute_drift(centroids)
     
     # Find max drift
@@ -105,3 +114,269 @@ async def compute_semantic_evolution(
         "drift": drift_points,
         "max_drift": max_drift
     }
+
+
+async def nearest_row_periods(
+    concept_embedding,
+    trunc_period: str,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    similarity_threshold: float,
+    mode: Optional[str] = None
+):
+    """
+    Execution "rows": fetch the nearest matching turns and average them in Python.
+
+    Capped at 10,000 rows, the most similar in the whole range.
+
+    Returns:
+        Tuple of (centroids, counts) by period key
+    """
+    pool = await get_pool()
+    mode = resolve_mode(mode)
+    
+    # Convert similarity threshold to a distance bound (see vector_search.max_distance)
+    distance_threshold = max_distance(similarity_threshold)
+    max_rows = 10000  # Limit results to prevent extremely long queries
+
+    params = QueryParams()
+    query_vec = params.add(as_vector(concept_embedding))
+    date_filter = (
+        f"st.published_at >= {params.add(start_date)}"
+        f" AND st.published_at <= {params.add(end_date)}"
+    )
+    distance = vector_distance("st.embedding", f"{query_vec}::vector")
+    n_candidates = candidate_limit(max_rows, mode)
+    cte = candidate_cte(
+        mode, params, query_vec, concept_embedding, n_candidates,
+        where=date_filter
+    )
+
+    sql = f"""
+    {cte}
+    SELECT
+      period,
+      embedding,
+      {similarity_sql("distance")} AS similarity
+    FROM (
+      -- Index-driven: nearest rows in the date range (HNSW iterative scan),
+      -- the threshold is applied to the ranked rows below
+      SELECT
+        date_trunc('{trunc_period}', st.published_at) AS period,
+        st.embedding,
+        {distance} AS distance
+      FROM speech_turns st
+      WHERE
+        {date_filter}
+        AND {candidate_filter(mode)}
+      ORDER BY {distance}
+      LIMIT {params.add(max_rows)}
+    ) ranked
+    WHERE distance < {params.add(distance_threshold)}
+    ORDER BY distance;
+    """
+    
+    async with pool.acquire() as conn:
+        rows = await fetch_ann(conn, sql, params, n_candidates)
+
+    # Decode into one float32 matrix and reduce by period code (analytics module)
+    matrix, offsets, periods = group_embeddings_by_period(rows, granularity)
+    return compute_centroids(matrix, offsets, periods)
+
+
+async def aggregate_periods(
+    concept_embedding,
+    trunc_period: str,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    similarity_threshold: float
+):
+    """
+    Execution "aggregate": PostgreSQL returns one row per period.
+
+    AVG(embedding), COUNT(*) and the mean similarity of every turn above the
+    threshold in the range are computed server side, so only one vector per
+    period crosses the wire and there is no row cap. The threshold is an
+    exact filter (no ANN index); only the month partitions of the date range
+    are scanned (backend/db/partition_speech_turns.sql).
+
+    Returns:
+        Tuple of (centroids, counts, mean similarities) by period key
+    """
+    pool = await get_pool()
+
+    params = QueryParams()
+    query_vec = params.add(as_vector(concept_embedding))
+    distance = vector_distance("st.embedding", f"{query_vec}::vector")
+
+    sql = f"""
+    SELECT
+      period,
+      AVG(embedding) AS centroid,
+      COUNT(*) AS num_chunks,
+      AVG({similarity_sql("distance")}) AS mean_similarity
+    FROM (
+      SELECT
+        date_trunc('{trunc_period}', st.published_at) AS period,
+        st.embedding,
+        {distance} AS distance
+      FROM speech_turns st
+      WHERE
+        st.published_at >= {params.add(start_date)}
+        AND st.published_at <= {params.add(end_date)}
+        AND st.embedding IS NOT NULL
+    ) matched
+    WHERE distance < {params.add(max_distance(similarity_threshold))}
+    GROUP BY period
+    ORDER BY period;
+    """
+
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, *params.values)
+
+    centroids, counts, mean_similarities = {}, {}, {}
+    for row in rows:
+        key = period_key(row["period"], granularity)
+        centroids[key] = np.asarray(row["centroid"], dtype=np.float32)
+        counts[key] = row["num_chunks"]
+        mean_similarities[key] = float(row["mean_similarity"])
+    return centroids, counts, mean_similarities
+
+
+async def stream_periods(
+    concept_embedding,
+    trunc_period: str,
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    similarity_threshold: float
+):
+    """
+    Execution "stream": every turn above the threshold in the range, read
+    through a server-side cursor in chunks of EVOLUTION_STREAM_CHUNK_ROWS.
+
+    Each chunk is folded into running per-period sums (PeriodAccumulator) and
+    dropped, so the result is exact over the whole range (no row cap, no
+    bias towards the busiest periods) at constant memory.
+
+    Returns:
+        Tuple of (centroids, counts, mean similarities) by period key
+    """
+    pool = await get_pool()
+
+    params = QueryParams()
+    query_vec = params.add(as_vector(concept_embedding))
+    distance = vector_distance("st.embedding", f"{query_vec}::vector")
+
+    sql = f"""
+    SELECT
+      period,
+      embedding,
+      {similarity_sql("distance")} AS similarity
+    FROM (
+      SELECT
+        date_trunc('{trunc_period}', st.published_at) AS period,
+        st.embedding,
+        {distance} AS distance
+      FROM speech_turns st
+      WHERE
+        st.published_at >= {params.add(start_date)}
+        AND st.published_at <= {params.add(end_date)}
+        AND st.embedding IS NOT NULL
+    ) matched
+    WHERE distance < {params.add(max_distance(similarity_threshold))};
+    """
+
+    accumulator = PeriodAccumulator(granularity)
+    chunk_rows = settings.evolution_stream_chunk_rows
+    async with pool.acquire() as conn:
+        # Server-side cursors only live inside a transaction
+        async with conn.transaction():
+            cursor = await conn.cursor(sql, *params.values)
+            while True:
+                rows = await cursor.fetch(chunk_rows)
+                if not rows:
+                    break
+                accumulator.add(rows)
+
+    return accumulator.result()
+
+
+async def compute_multi_concept_evolution(
+    concepts: List[str],
+    granularity: str,
+    start_date: date,
+    end_date: date,
+    similarity_threshold: float
+):
+    """
+    Semantic evolution of several concepts over the same range in one scan.
+
+    The concepts are embedded in one batch and the turns of the range are read
+    once, through a server-side cursor: a turn is returned when it is above
+    the threshold for at least one concept (LEAST of the distances). Each chunk
+    is scored against all concepts and folded into per-(concept, period) sums
+    with matrix products (ConceptPeriodAccumulator), so N concepts cost one
+    scan instead of N calls to compute_semantic_evolution with "stream".
+
+    Returns:
+        Dictionary with the granularity and one evolution result (as returned
+        by compute_semantic_evolution) per concept, in input order
+    """
+    # Unit concept vectors for the SQL prefilter and the accumulator alike, so
+    # both apply the threshold to the same similarity
+    concept_embeddings = list(unit_vectors(dict(enumerate(await embed_queries(concepts)))).values())
+    trunc_period = granularity if granularity in ('month', 'week', 'day') else 'month'
+
+    pool = await get_pool()
+    params = QueryParams()
+    distances = [
+        vector_distance("st.embedding", f"{params.add(as_vector(embedding))}::vector")
+        for embedding in concept_embeddings
+    ]
+    nearest = distances[0] if len(distances) == 1 else f"LEAST({', '.join(distances)})"
+
+    sql = f"""
+    SELECT
+      date_trunc('{trunc_period}', st.published_at) AS period,
+      st.embedding
+    FROM speech_turns st
+    WHERE
+      st.published_at >= {params.add(start_date)}
+      AND st.published_at <= {params.add(end_date)}
+      AND st.embedding IS NOT NULL
+      AND {nearest} < {params.add(max_distance(similarity_threshold))};
+    """
+
+    accumulator = ConceptPeriodAccumulator(granularity, concept_embeddings, similarity_threshold)
+    chunk_rows = settings.evolution_stream_chunk_rows
+    async with pool.acquire() as conn:
+        # Server-side cursors only live inside a transaction
+        async with conn.transaction():
+            cursor = await conn.cursor(sql, *params.values)
+            while True:
+                rows = await cursor.fetch(chunk_rows)
+                if not rows:
+                    break
+                accumulator.add(rows)
+
+    evolutions = compute_concept_evolutions(concept_embeddings, *accumulator.result())
+
+    results = []
+    for concept, evolution in zip(concepts, evolutions):
+        drift_points = evolution["drift"]
+        max_drift = max(drift_points, key=lambda x: x["semantic_change"]) if drift_points else None
+        results.append({
+            "concept": concept,
+            "granularity": granularity,
+            "points": evolution["points"],
+            "drift": drift_points,
+            "max_drift": max_drift
+        })
+
+    return {
+        "granularity": granularity,
+        "concepts": results
+    }
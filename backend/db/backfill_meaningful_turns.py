@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Backfill speech_turns.char_len, word_count and is_meaningful.
+
+Values are computed with text_utils.text_quality, the same function the
+ingestion pipeline uses, so the flag is identical for old and new rows.
+Rows are updated in keyset-paginated batches, each in its own transaction,
+so the job can be stopped and re-run at any time.
+
+Usage:
+    python -m backend.db.backfill_meaningful_turns [--batch-size 2000] [--all]
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from backend.utils.text_utils import text_quality
+
+# Database settings from environment variables
+pg_host = os.environ["PGHOST"]
+pg_user = os.environ["PGUSER"]
+pg_password = os.environ["PGPASSWORD"]
+pg_db = os.environ["PGDATABASE"]
+pg_port = os.environ.get("PGPORT", "5432")
+
+
+def backfill_meaningful_turns(batch_size=2000, recompute=False):
+    """Fill the quality columns for rows where is_meaningful is NULL (or all rows)."""
+    try:
+        conn = psycopg2.connect(
+            host=pg_host,
+            database=pg_db,
+            user=pg_user,
+            password=pg_password,
+            port=pg_port,
+            sslmode='require'
+        )
+
+        last_id = ''
+        total = 0
+        while True:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT speech_id, text, is_meaningful IS NULL
+                    FROM speech_turns
+                    WHERE speech_id > %s
+                    ORDER BY speech_id
+                    LIMIT %s
+                ''', (last_id, batch_size))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+
+                updates = [
+                    (speech_id, *text_quality(text))
+                    for speech_id, text, missing in rows
+                    if missing or recompute
+                ]
+                if updates:
+                    execute_values(cur, '''
+                        UPDATE speech_turns st
+                        SET char_len = v.char_len,
+                            word_count = v.word_count,
+                            is_meaningful = v.is_meaningful
+                        FROM (VALUES %s) AS v(speech_id, char_len, word_count, is_meaningful)
+                        WHERE st.speech_id = v.speech_id
+                    ''', updates)
+                    total += len(updates)
+            conn.commit()
+
+            last_id = rows[-1][0]
+            print(f'Backfilled {total} rows (up to {last_id})...')
+
+        print(f'✅ Backfill complete: {total} rows updated')
+        return True
+
+    except Exception as e:
+        print(f'❌ Error during backfill: {e}')
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--all", action="store_true", help="Recompute rows that already have values")
+    args = parser.parse_args()
+
+    success = backfill_meaningful_turns(args.batch_size, args.all)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Backfill speech_turns.embedding_short from the stored full-precision vectors.
+
+The short vector is derived inside PostgreSQL (subvector + l2_normalize,
+pgvector >= 0.7), so no embedding API calls are made. Rows are updated in
+keyset-paginated batches, each in its own transaction, so the job can be
+stopped and re-run at any time.
+
+Usage:
+    python -m backend.db.backfill_shadow_embeddings [--dimensions 256] [--batch-size 2000]
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+
+# Database settings from environment variables
+pg_host = os.environ["PGHOST"]
+pg_user = os.environ["PGUSER"]
+pg_password = os.environ["PGPASSWORD"]
+pg_db = os.environ["PGDATABASE"]
+pg_port = os.environ.get("PGPORT", "5432")
+
+
+def backfill_shadow_embeddings(dimensions=256, batch_size=2000):
+    """Fill embedding_short for every row where it is still NULL."""
+    try:
+        conn = psycopg2.connect(
+            host=pg_host,
+            database=pg_db,
+            user=pg_user,
+            password=pg_password,
+            port=pg_port,
+            sslmode='require'
+        )
+
+        last_id = ''
+        total = 0
+        while True:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT speech_id
+                    FROM speech_turns
+                    WHERE speech_id > %s
+                    ORDER BY speech_id
+                    LIMIT %s
+                ''', (last_id, batch_size))
+                ids = [r[0] for r in cur.fetchall()]
+                if not ids:
+                    break
+
+                cur.execute('''
+                    UPDATE speech_turns
+                    SET embedding_short = l2_normalize(subvector(embedding, 1, %s))::vector(%s)
+                    WHERE speech_id = ANY(%s)
+                      AND embedding IS NOT NULL
+                      AND embedding_short IS NULL
+                ''', (dimensions, dimensions, ids))
+                total += cur.rowcount
+            conn.commit()
+
+            last_id = ids[-1]
+            print(f'Backfilled {total} rows (up to {last_id})...')
+
+        print(f'✅ Backfill complete: {total} rows updated')
+        return True
+
+    except Exception as e:
+        print(f'❌ Error during backfill: {e}')
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    success = backfill_shadow_embeddings(args.dimensions, args.batch_size)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,18 @@
+-- Corpus version watermark for the search/QA result cache
+-- (see backend/utils/result_cache.py)
+--
+-- Ingestion (postprocessing_helpers.database_loading) bumps the version after
+-- committing new speech_turns. Run the UPDATE below by hand after any other
+-- change to search results (backfills, re-embedding, deletes).
+
+CREATE TABLE IF NOT EXISTS public.corpus_version (
+  id boolean PRIMARY KEY DEFAULT true CHECK (id),  -- single row
+  version bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO public.corpus_version (id) VALUES (true)
+ON CONFLICT (id) DO NOTHING;
+
+-- Invalidate cached results:
+-- UPDATE public.corpus_version SET version = version + 1, updated_at = now();
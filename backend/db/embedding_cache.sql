@@ -0,0 +1,12 @@
+-- Persistent tier of the query/concept embedding cache
+-- (see backend/utils/embedding_cache.py)
+-- text_key is the normalized text: lowercased, accents stripped,
+-- whitespace collapsed. Vectors are only reused for the same deployment.
+
+CREATE TABLE IF NOT EXISTS public.embedding_cache (
+  text_key text NOT NULL,
+  deployment text NOT NULL,
+  embedding vector NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  CONSTRAINT embedding_cache_pkey PRIMARY KEY (text_key, deployment)
+);
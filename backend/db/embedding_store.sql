@@ -0,0 +1,11 @@
+-- Content-addressed embedding store used by ingestion
+-- (see backend/utils/embedding_store.py)
+-- content_hash = sha256(model || '\0' || exact chunk text)
+
+CREATE TABLE IF NOT EXISTS public.embedding_store (
+  content_hash text NOT NULL,
+  model text NOT NULL,
+  embedding vector NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  CONSTRAINT embedding_store_pkey PRIMARY KEY (content_hash, model)
+);
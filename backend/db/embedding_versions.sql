@@ -0,0 +1,49 @@
+-- Embedding model versioning for zero-downtime model changes
+-- (see backend/ingestion/reembed_main.py)
+--
+-- embedding_model / embedding_dim record which model produced each
+-- speech_turns.embedding. While a re-embedding job runs, the new vectors are
+-- dual-written to embedding_next (+ model/dim). The `promote` step swaps the
+-- columns in a single transaction, so readers switch model atomically, and
+-- records the new model in active_embedding_model, which the API reads to
+-- embed queries (backend/utils/embedding_cache.py).
+-- The embedding_next column itself is created by `reembed_main.py prepare`,
+-- because its dimension depends on the target model.
+
+ALTER TABLE public.speech_turns
+  ADD COLUMN IF NOT EXISTS embedding_model text,
+  ADD COLUMN IF NOT EXISTS embedding_dim integer,
+  ADD COLUMN IF NOT EXISTS embedding_next_model text,
+  ADD COLUMN IF NOT EXISTS embedding_next_dim integer;
+
+-- Rows embedded before versioning was introduced
+UPDATE public.speech_turns
+SET embedding_model = 'text-embedding-3-small',
+    embedding_dim = vector_dims(embedding)
+WHERE embedding_model IS NULL AND embedding IS NOT NULL;
+
+-- Progress of re-embedding jobs (one row per target model/dimension)
+CREATE TABLE IF NOT EXISTS public.reembedding_checkpoints (
+  job_id text NOT NULL,
+  model text NOT NULL,
+  dimensions integer NOT NULL,
+  last_speech_id text NOT NULL DEFAULT '',
+  rows_done bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now(),
+  CONSTRAINT reembedding_checkpoints_pkey PRIMARY KEY (job_id)
+);
+
+-- Model of speech_turns.embedding (single row, updated by `promote`)
+CREATE TABLE IF NOT EXISTS public.active_embedding_model (
+  id boolean PRIMARY KEY DEFAULT true CHECK (id),
+  model text NOT NULL,
+  dimensions integer NOT NULL,
+  promoted_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO public.active_embedding_model (model, dimensions)
+SELECT 'text-embedding-3-small', atttypmod
+FROM pg_attribute
+WHERE attrelid = 'public.speech_turns'::regclass
+  AND attname = 'embedding'
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,57 @@
+-- Inner-product HNSW indexes for unit-normalized embeddings
+-- (VECTOR_DISTANCE=inner_product, the `<#>` operator; see backend/utils/vector_search.py)
+--
+-- Order of operations:
+-- 1. Deploy the release that writes normalized rows (ingestion uses
+--    l2_normalize). The API keeps the default VECTOR_DISTANCE=cosine, which
+--    is served by the existing cosine indexes.
+-- 2. Run backend/db/normalize_embeddings.py for existing rows.
+-- 3. Create the indexes below, and switch the main index with
+--    `python -m backend.db.manage_hnsw rebuild --ops vector_ip_ops`.
+-- 4. Only then set VECTOR_DISTANCE=inner_product in the API environment and
+--    restart; after that, drop the cosine indexes at the end of this file.
+--
+-- IMPORTANT: run the statements on their own (no transaction).
+
+-- Partial index used by semantic search (see meaningful_turns.sql)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_meaningful_ip_hnsw
+ON public.speech_turns
+USING hnsw (embedding vector_ip_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+)
+WHERE is_meaningful;
+
+-- Shadow vectors are unit length by construction (see shadow_embeddings.sql)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_short_ip_hnsw
+ON public.speech_turns
+USING hnsw (embedding_short vector_ip_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_short_meaningful_ip_hnsw
+ON public.speech_turns
+USING hnsw (embedding_short vector_ip_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+)
+WHERE is_meaningful;
+
+-- Half-precision expression index (the dimension is the stored embedding_dim)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_halfvec_ip_hnsw
+ON public.speech_turns
+USING hnsw ((embedding::halfvec(1536)) halfvec_ip_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+);
+
+-- After the switch, the cosine indexes are no longer used:
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_speech_turns_embedding_meaningful_hnsw;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_speech_turns_embedding_short_hnsw;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_speech_turns_embedding_short_meaningful_hnsw;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_speech_turns_embedding_halfvec_hnsw;
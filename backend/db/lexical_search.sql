@@ -0,0 +1,16 @@
+-- Spanish full-text search on speech_turns.text for hybrid retrieval
+-- (retrieval mode "hybrid", see backend/utils/vector_search.py)
+--
+-- text_tsv is a stored generated column, so existing rows are filled by the
+-- ALTER TABLE (a table rewrite: run it in a maintenance window) and new rows
+-- need no ingestion changes.
+--
+-- IMPORTANT: run the CREATE INDEX statement on its own (no transaction).
+
+ALTER TABLE public.speech_turns
+  ADD COLUMN IF NOT EXISTS text_tsv tsvector
+  GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(text, ''))) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_text_tsv_gin
+ON public.speech_turns
+USING gin (text_tsv);
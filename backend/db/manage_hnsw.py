@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Create, rebuild and inspect the HNSW index on speech_turns.embedding.
+
+Build parameters:
+    m                Graph degree. Higher improves recall on large corpora at
+                     the cost of index size and build time.
+    ef_construction  Candidate list while building. Higher gives a better graph
+                     (higher recall for the same ef_search), slower builds.
+
+Operator class:
+    vector_ip_ops      Inner product, for the unit-normalized embeddings the
+                       API compares with <#> (VECTOR_DISTANCE=inner_product).
+    vector_cosine_ops  Cosine distance (<=>, VECTOR_DISTANCE=cosine, the default).
+The index is only used when it matches the configured operator; `rebuild`
+switches an existing index to another operator class.
+
+Query-time recall is tuned per request with hnsw.ef_search and iterative
+scans (HNSW_EF_SEARCH / HNSW_ITERATIVE_SCAN, see backend/utils/vector_search.py).
+
+`rebuild` builds a new index CONCURRENTLY under a temporary name and swaps it
+in, so the old index keeps serving queries until the new one is ready.
+
+When speech_turns is partitioned by month (partition_speech_turns.sql), the
+index is built partition by partition (see backend/utils/index_build.py).
+
+Usage:
+    python -m backend.db.manage_hnsw status
+    python -m backend.db.manage_hnsw create [--m 16] [--ef-construction 200]
+    python -m backend.db.manage_hnsw rebuild --m 24 --ef-construction 256 [--ops vector_ip_ops]
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+
+from backend.utils.index_build import create_index, drop_index, rename_index
+
+# Database settings from environment variables
+pg_host = os.environ["PGHOST"]
+pg_user = os.environ["PGUSER"]
+pg_password = os.environ["PGPASSWORD"]
+pg_db = os.environ["PGDATABASE"]
+pg_port = os.environ.get("PGPORT", "5432")
+
+INDEX_NAME = "idx_speech_turns_embedding_hnsw"
+OPCLASSES = ("vector_ip_ops", "vector_cosine_ops")
+
+
+def get_connection():
+    conn = psycopg2.connect(
+        host=pg_host,
+        database=pg_db,
+        user=pg_user,
+        password=pg_password,
+        port=pg_port,
+        sslmode='require'
+    )
+    conn.autocommit = True  # CONCURRENTLY is not allowed in a transaction
+    return conn
+
+
+def _configure_build(cur, maintenance_work_mem, parallel_workers):
+    # The graph must fit in maintenance_work_mem for a fast build
+    cur.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+    cur.execute("SET max_parallel_maintenance_workers = %s", (parallel_workers,))
+
+
+def _using(m, ef_construction, ops):
+    if ops not in OPCLASSES:
+        raise ValueError(f"Unknown operator class '{ops}'. Expected one of {OPCLASSES}")
+    return f"hnsw (embedding {ops}) WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+
+
+def status():
+    """Print definition, size and validity of the speech_turns HNSW indexes."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute('''
+                SELECT c.relname,
+                       pg_size_pretty((SELECT sum(pg_relation_size(relid)) FROM pg_partition_tree(c.oid))),
+                       i.indisvalid,
+                       pg_get_indexdef(c.oid)
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_am am ON am.oid = c.relam
+                WHERE i.indrelid = 'public.speech_turns'::regclass
+                  AND am.amname = 'hnsw'
+                ORDER BY c.relname
+            ''')
+            rows = cur.fetchall()
+        if not rows:
+            print("No HNSW indexes on speech_turns")
+        for name, size, valid, definition in rows:
+            print(f"{name}: {size}{'' if valid else ' (INVALID)'}")
+            print(f"  {definition}")
+    finally:
+        conn.close()
+
+
+def create(m=16, ef_construction=200, maintenance_work_mem='1GB', parallel_workers=4, ops='vector_cosine_ops'):
+    """Create the index if it does not exist."""
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            _configure_build(cur, maintenance_work_mem, parallel_workers)
+            print(f"Building {INDEX_NAME} (m={m}, ef_construction={ef_construction}, {ops})...")
+            create_index(cur, INDEX_NAME, _using(m, ef_construction, ops))
+        print(f"✅ {INDEX_NAME} ready")
+    finally:
+        conn.close()
+
+
+def rebuild(m=16, ef_construction=200, maintenance_work_mem='1GB', parallel_workers=4, ops='vector_cosine_ops'):
+    """Build a new index with the given parameters and swap it in."""
+    new_name = f"{INDEX_NAME}_new"
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            # Leftover from an interrupted rebuild
+            drop_index(cur, new_name)
+
+            _configure_build(cur, maintenance_work_mem, parallel_workers)
+            print(f"Building {new_name} (m={m}, ef_construction={ef_construction}, {ops})...")
+            create_index(cur, new_name, _using(m, ef_construction, ops))
+
+            drop_index(cur, INDEX_NAME)
+            rename_index(cur, new_name, INDEX_NAME)
+        print(f"✅ {INDEX_NAME} rebuilt")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["status", "create", "rebuild"])
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--parallel-workers", type=int, default=4)
+    parser.add_argument("--ops", choices=OPCLASSES, default="vector_cosine_ops", help="Operator class (match VECTOR_DISTANCE)")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "status":
+            status()
+        elif args.command == "create":
+            create(args.m, args.ef_construction, args.maintenance_work_mem, args.parallel_workers, args.ops)
+        else:
+            rebuild(args.m, args.ef_construction, args.maintenance_work_mem, args.parallel_workers, args.ops)
+    except Exception as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    sys.exit(0)
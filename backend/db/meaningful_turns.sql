@@ -0,0 +1,35 @@
+-- Precomputed text quality of speech_turns and partial vector indexes over
+-- "meaningful" turns (>= 150 characters and >= 20 words, see
+-- text_utils.text_quality). Semantic search filters on is_meaningful, so the
+-- ANN index returns exactly top_k qualifying rows in one pass.
+--
+-- New rows are filled at ingestion (postprocessing_helpers.database_loading);
+-- fill existing rows with backfill_meaningful_turns.py.
+--
+-- IMPORTANT: run the CREATE INDEX statements on their own (no transaction),
+-- after the backfill has finished.
+
+ALTER TABLE public.speech_turns
+  ADD COLUMN IF NOT EXISTS char_len integer,
+  ADD COLUMN IF NOT EXISTS word_count integer,
+  ADD COLUMN IF NOT EXISTS is_meaningful boolean;
+
+-- Partial index used by semantic search in exact mode
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_meaningful_hnsw
+ON public.speech_turns
+USING hnsw (embedding vector_cosine_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+)
+WHERE is_meaningful;
+
+-- Partial shadow index for the first pass of retrieval mode "shadow"
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_short_meaningful_hnsw
+ON public.speech_turns
+USING hnsw (embedding_short vector_cosine_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+)
+WHERE is_meaningful;
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Normalize speech_turns.embedding to unit length (one-off backfill).
+
+With VECTOR_DISTANCE=inner_product the API compares embeddings with the
+negative inner product `<#>`, which equals the cosine ranking only for unit
+vectors, so this job must finish before that setting is enabled (see
+inner_product_indexes.sql for the full order). Ingestion writes normalized
+vectors; this job fixes existing rows. Only rows whose norm is off by more
+than --tolerance are rewritten, in keyset-paginated batches with one
+transaction each, so the job can be stopped and re-run at any time.
+
+Run it before creating the indexes in inner_product_indexes.sql (updates to
+indexed rows are much slower). When it finishes, the corpus version is bumped
+so cached search results are dropped.
+
+Usage:
+    python -m backend.db.normalize_embeddings [--batch-size 2000] [--tolerance 1e-4]
+"""
+
+import argparse
+import os
+import sys
+
+import psycopg2
+
+from backend.utils.postprocessing_helpers import bump_corpus_version
+
+# Database settings from environment variables
+pg_host = os.environ["PGHOST"]
+pg_user = os.environ["PGUSER"]
+pg_password = os.environ["PGPASSWORD"]
+pg_db = os.environ["PGDATABASE"]
+pg_port = os.environ.get("PGPORT", "5432")
+
+
+def normalize_embeddings(batch_size=2000, tolerance=1e-4):
+    """Rewrite embeddings whose L2 norm differs from 1 by more than `tolerance`."""
+    try:
+        conn = psycopg2.connect(
+            host=pg_host,
+            database=pg_db,
+            user=pg_user,
+            password=pg_password,
+            port=pg_port,
+            sslmode='require'
+        )
+
+        last_id = ''
+        scanned = 0
+        total = 0
+        while True:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT speech_id
+                    FROM speech_turns
+                    WHERE speech_id > %s
+                    ORDER BY speech_id
+                    LIMIT %s
+                ''', (last_id, batch_size))
+                ids = [r[0] for r in cur.fetchall()]
+                if not ids:
+                    break
+
+                cur.execute('''
+                    UPDATE speech_turns
+                    SET embedding = l2_normalize(embedding)
+                    WHERE speech_id = ANY(%s)
+                      AND embedding IS NOT NULL
+                      AND abs(vector_norm(embedding) - 1) > %s
+                ''', (ids, tolerance))
+                total += cur.rowcount
+            conn.commit()
+
+            scanned += len(ids)
+            last_id = ids[-1]
+            print(f'Scanned {scanned} rows, normalized {total} (up to {last_id})...')
+
+        print(f'✅ Normalization complete: {total} rows updated')
+        if total:
+            bump_corpus_version(conn)
+        return True
+
+    except Exception as e:
+        print(f'❌ Error during normalization: {e}')
+        if 'conn' in locals():
+            conn.rollback()
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="Allowed deviation of the norm from 1")
+    args = parser.parse_args()
+
+    success = normalize_embeddings(args.batch_size, args.tolerance)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,302 @@
+-- Denormalized, month-partitioned speech_turns
+--
+-- speech_turns gets its own copy of raw_transcripts_meta.published_at and is
+-- partitioned by month on it. Date filters (search filters, semantic
+-- evolution, drift sentences) compare st.published_at directly, so the
+-- planner prunes every partition outside the requested range before any
+-- vector math, and each partition has its own (smaller) vector indexes.
+--
+-- Order of operations:
+-- 1. Pause ingestion (backend/ingestion/extract_whole_main.py) until step 4.
+-- 2. Run steps 1 and 2 below, each in its own transaction.
+-- 3. Run step 3 (index builds on the new table, no transaction).
+-- 4. Run step 4 (swap), then deploy the API and ingestion changes that read
+--    and write speech_turns.published_at.
+-- 5. Verify the new table and drop the old one (step 5).
+--
+-- Monthly partitions are created on demand by speech_turns_ensure_partition(),
+-- which ingestion calls for the publication dates it is about to load.
+-- Indexes defined on speech_turns are created on new partitions automatically.
+--
+-- The vector indexes use the operator classes of the distance the API is
+-- configured with (VECTOR_DISTANCE, default cosine), given to this script as
+-- vozpublica.vector_distance below; the swap (step 4) refuses HNSW indexes
+-- built for the other distance. Use inner_product only once the
+-- inner_product_indexes.sql rollout is complete.
+--
+-- Invariant: speech_id stays unique across partitions. The primary key has
+-- to include the partition key, so (speech_id, published_at) alone does not
+-- enforce it: ingestion deletes a stored copy of a turn under another date
+-- before its upsert (postprocessing_helpers.database_loading), and date
+-- corrections move the rows of a document (trigger in step 4). Step 5 checks
+-- for duplicates.
+
+
+-- Must equal VECTOR_DISTANCE (cosine | inner_product); read by steps 3 and 4,
+-- so run it again in their session if the steps run in separate sessions
+SET vozpublica.vector_distance = 'cosine';
+
+
+-- ============================================================
+-- Step 1: denormalize published_at
+-- ============================================================
+BEGIN;
+
+ALTER TABLE public.speech_turns
+  ADD COLUMN IF NOT EXISTS published_at timestamptz;
+
+UPDATE public.speech_turns st
+SET published_at = m.published_at
+FROM public.raw_transcripts_meta m
+WHERE st.doc_id = m.doc_id
+  AND st.published_at IS DISTINCT FROM m.published_at;
+
+-- The partition key cannot be NULL: fix raw_transcripts_meta first
+DO $$
+DECLARE
+  missing bigint;
+BEGIN
+  SELECT count(*) INTO missing FROM public.speech_turns WHERE published_at IS NULL;
+  IF missing > 0 THEN
+    RAISE EXCEPTION '% speech_turns rows have no published_at in raw_transcripts_meta', missing;
+  END IF;
+END $$;
+
+COMMIT;
+
+
+-- ============================================================
+-- Step 2: partitioned table and data copy
+-- ============================================================
+BEGIN;
+
+-- Free the index names for the new table (the old one keeps its indexes as *_old)
+DO $$
+DECLARE
+  idx text;
+BEGIN
+  FOR idx IN
+    SELECT c.relname
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE i.indrelid = 'public.speech_turns'::regclass
+  LOOP
+    EXECUTE format('ALTER INDEX public.%I RENAME TO %I', idx, left(idx, 59) || '_old');
+  END LOOP;
+END $$;
+
+-- Create the month partition of `ts` (UTC months) if it does not exist
+CREATE OR REPLACE FUNCTION public.speech_turns_ensure_partition(
+  ts timestamptz,
+  parent text DEFAULT 'speech_turns'
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  month_start timestamp := date_trunc('month', ts AT TIME ZONE 'UTC');
+  part_name text := 'speech_turns_p' || to_char(month_start, 'YYYY_MM');
+BEGIN
+  IF ts IS NULL OR to_regclass('public.' || part_name) IS NOT NULL THEN
+    RETURN;
+  END IF;
+  -- Concurrent loaders may reach the same new month
+  PERFORM pg_advisory_xact_lock(hashtext('speech_turns_ensure_partition'));
+  EXECUTE format(
+    'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.%I FOR VALUES FROM (%L) TO (%L)',
+    part_name,
+    parent,
+    month_start AT TIME ZONE 'UTC',
+    (month_start + interval '1 month') AT TIME ZONE 'UTC'
+  );
+END $$;
+
+CREATE TABLE public.speech_turns_partitioned (
+  LIKE public.speech_turns INCLUDING ALL EXCLUDING INDEXES
+) PARTITION BY RANGE (published_at);
+
+ALTER TABLE public.speech_turns_partitioned
+  ALTER COLUMN published_at SET NOT NULL;
+
+-- A primary key on a partitioned table must include the partition key
+ALTER TABLE public.speech_turns_partitioned
+  ADD CONSTRAINT speech_turns_partitioned_pkey PRIMARY KEY (speech_id, published_at);
+
+SELECT public.speech_turns_ensure_partition(month, 'speech_turns_partitioned')
+FROM (
+  SELECT DISTINCT date_trunc('month', published_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS month
+  FROM public.speech_turns
+) months;
+
+-- Copy in date order, so the BRIN index below has tight ranges
+DO $$
+DECLARE
+  cols text;
+BEGIN
+  SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position) INTO cols
+  FROM information_schema.columns
+  WHERE table_schema = 'public'
+    AND table_name = 'speech_turns'
+    AND is_generated = 'NEVER';
+  EXECUTE format(
+    'INSERT INTO public.speech_turns_partitioned (%s) SELECT %s FROM public.speech_turns ORDER BY published_at',
+    cols, cols
+  );
+END $$;
+
+COMMIT;
+
+
+-- ============================================================
+-- Step 3: indexes (run on their own, no transaction)
+-- ============================================================
+-- CREATE INDEX on a partitioned table builds one index per partition and
+-- cannot run CONCURRENTLY; the new table does not serve queries yet.
+-- Later rebuilds of the main HNSW index go through
+-- `python -m backend.db.manage_hnsw rebuild`, which builds partition by partition.
+
+SET maintenance_work_mem = '1GB';
+SET max_parallel_maintenance_workers = 4;
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_published_at_brin
+ON public.speech_turns_partitioned
+USING brin (published_at);
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_doc_id
+ON public.speech_turns_partitioned (doc_id);
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_doc_id_sequence
+ON public.speech_turns_partitioned (doc_id, sequence);
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_speaker_normalized
+ON public.speech_turns_partitioned (speaker_normalized);
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_role
+ON public.speech_turns_partitioned (role);
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_type
+ON public.speech_turns_partitioned (type);
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_text_tsv_gin
+ON public.speech_turns_partitioned
+USING gin (text_tsv);
+
+-- Vector indexes with the operator classes of vozpublica.vector_distance:
+-- cosine -> vector_cosine_ops / halfvec_cosine_ops (names of
+-- meaningful_turns.sql, shadow_embeddings.sql, quantized_indexes.sql),
+-- inner_product -> *_ip_ops (names of inner_product_indexes.sql).
+-- The halfvec / bit dimension is the stored embedding_dim.
+DO $$
+DECLARE
+  distance text := current_setting('vozpublica.vector_distance', true);
+  ops text;
+  tag text;
+BEGIN
+  CASE distance
+    WHEN 'cosine' THEN ops := 'cosine'; tag := '';
+    WHEN 'inner_product' THEN ops := 'ip'; tag := '_ip';
+    ELSE RAISE EXCEPTION 'SET vozpublica.vector_distance to cosine or inner_product (VECTOR_DISTANCE) first';
+  END CASE;
+
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS idx_speech_turns_embedding_hnsw ON public.speech_turns_partitioned '
+    'USING hnsw (embedding vector_%s_ops) WITH (m = 16, ef_construction = 200)', ops);
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS idx_speech_turns_embedding_meaningful%s_hnsw ON public.speech_turns_partitioned '
+    'USING hnsw (embedding vector_%s_ops) WITH (m = 16, ef_construction = 200) WHERE is_meaningful', tag, ops);
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS idx_speech_turns_embedding_short%s_hnsw ON public.speech_turns_partitioned '
+    'USING hnsw (embedding_short vector_%s_ops) WITH (m = 16, ef_construction = 200)', tag, ops);
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS idx_speech_turns_embedding_short_meaningful%s_hnsw ON public.speech_turns_partitioned '
+    'USING hnsw (embedding_short vector_%s_ops) WITH (m = 16, ef_construction = 200) WHERE is_meaningful', tag, ops);
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS idx_speech_turns_embedding_halfvec%s_hnsw ON public.speech_turns_partitioned '
+    'USING hnsw ((embedding::halfvec(1536)) halfvec_%s_ops) WITH (m = 16, ef_construction = 200)', tag, ops);
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_speech_turns_embedding_bit_hnsw
+ON public.speech_turns_partitioned
+USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+);
+
+ANALYZE public.speech_turns_partitioned;
+
+
+-- ============================================================
+-- Step 4: swap
+-- ============================================================
+BEGIN;
+
+-- Queries only use HNSW indexes built for the configured distance
+DO $$
+DECLARE
+  distance text := current_setting('vozpublica.vector_distance', true);
+  mismatched text;
+BEGIN
+  IF distance IS NULL OR distance NOT IN ('cosine', 'inner_product') THEN
+    RAISE EXCEPTION 'SET vozpublica.vector_distance to cosine or inner_product (VECTOR_DISTANCE) first';
+  END IF;
+  SELECT string_agg(c.relname || ' (' || o.opcname || ')', ', ') INTO mismatched
+  FROM pg_index i
+  JOIN pg_class c ON c.oid = i.indexrelid
+  JOIN pg_am am ON am.oid = c.relam
+  CROSS JOIN LATERAL unnest(i.indclass::oid[]) AS cls(oid)
+  JOIN pg_opclass o ON o.oid = cls.oid
+  WHERE i.indrelid = 'public.speech_turns_partitioned'::regclass
+    AND am.amname = 'hnsw'
+    AND o.opcname <> 'bit_hamming_ops'
+    AND o.opcname NOT LIKE CASE distance WHEN 'cosine' THEN '%\_cosine\_ops' ELSE '%\_ip\_ops' END;
+  IF mismatched IS NOT NULL THEN
+    RAISE EXCEPTION 'HNSW indexes do not match VECTOR_DISTANCE=%: %', distance, mismatched;
+  END IF;
+END $$;
+
+ALTER TABLE public.speech_turns RENAME TO speech_turns_unpartitioned;
+ALTER TABLE public.speech_turns_partitioned RENAME TO speech_turns;
+ALTER TABLE public.speech_turns
+  RENAME CONSTRAINT speech_turns_partitioned_pkey TO speech_turns_pkey;
+
+-- Keep the copy in sync if a publication date is corrected after ingestion
+-- (the row moves to the partition of the new date)
+CREATE OR REPLACE FUNCTION public.sync_speech_turns_published_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM public.speech_turns_ensure_partition(NEW.published_at);
+  UPDATE public.speech_turns
+  SET published_at = NEW.published_at
+  WHERE doc_id = NEW.doc_id;
+  RETURN NEW;
+END $$;
+
+DROP TRIGGER IF EXISTS trg_sync_speech_turns_published_at ON public.raw_transcripts_meta;
+CREATE TRIGGER trg_sync_speech_turns_published_at
+AFTER UPDATE OF published_at ON public.raw_transcripts_meta
+FOR EACH ROW
+WHEN (NEW.published_at IS DISTINCT FROM OLD.published_at AND NEW.published_at IS NOT NULL)
+EXECUTE FUNCTION public.sync_speech_turns_published_at();
+
+COMMIT;
+
+
+-- ============================================================
+-- Step 5: verification
+-- ============================================================
+-- Must return no rows (speech_id is unique across partitions)
+SELECT speech_id, count(*) AS copies
+FROM public.speech_turns
+GROUP BY speech_id
+HAVING count(*) > 1;
+
+-- Row counts of the old and the new table must match
+SELECT
+  (SELECT count(*) FROM public.speech_turns_unpartitioned) AS old_rows,
+  (SELECT count(*) FROM public.speech_turns) AS new_rows;
+
+-- Once verified:
+-- DROP TABLE public.speech_turns_unpartitioned;
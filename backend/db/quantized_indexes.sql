@@ -0,0 +1,27 @@
+-- Optional quantized expression indexes for two-stage vector search
+-- (retrieval modes "halfvec" and "binary", see backend/utils/vector_search.py)
+-- Requires pgvector >= 0.7.
+--
+-- IMPORTANT:
+-- 1. Do NOT wrap in BEGIN/COMMIT (CONCURRENTLY is not allowed in a transaction)
+-- 2. The indexed expressions must match the query expressions exactly,
+--    including the dimension (the stored embedding_dim)
+
+-- Half-precision copy: half the size of the float index, near-identical recall
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_halfvec_hnsw
+ON public.speech_turns
+USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+);
+
+-- Binary quantization: 1 bit per dimension (~32x smaller), Hamming distance.
+-- Recall is lower, so queries re-rank a wider shortlist (BINARY_RERANK_FACTOR).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_bit_hnsw
+ON public.speech_turns
+USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+);
@@ -0,0 +1,24 @@
+-- B-tree indexes behind the /search and /question filters
+-- (start_date/end_date, speaker, role, type; see vector_search.filter_sql)
+--
+-- The filters are applied inside the vector query. With a broad filter the
+-- HNSW index drives the scan and iterative scans (HNSW_ITERATIVE_SCAN, up to
+-- HNSW_MAX_SCAN_TUPLES) keep it going until top_k rows pass the filter. With a
+-- narrow filter the planner can instead take the matching rows from these
+-- indexes and rank only those exactly, so neither plan scans the whole table.
+--
+-- IMPORTANT: run the CREATE INDEX statements on their own (no transaction).
+
+-- Once speech_turns is partitioned (partition_speech_turns.sql) the date
+-- filters compare speech_turns.published_at and this index is not used.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_raw_transcripts_meta_published_at
+ON public.raw_transcripts_meta (published_at, doc_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_speaker_normalized
+ON public.speech_turns (speaker_normalized);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_role
+ON public.speech_turns (role);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_type
+ON public.speech_turns (type);
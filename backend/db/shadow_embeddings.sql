@@ -0,0 +1,20 @@
+-- Reduced-dimension "shadow" vectors for first-pass candidate search
+-- (retrieval mode "shadow", see backend/utils/vector_search.py)
+--
+-- embedding_short = l2_normalize(first 256 dims of embedding), which is what
+-- text-embedding-3 returns for `dimensions = 256`. Keep the dimension in sync
+-- with SHADOW_DIMENSIONS. Fill existing rows with backfill_shadow_embeddings.py.
+--
+-- IMPORTANT: run the CREATE INDEX statement on its own (no transaction),
+-- after the backfill has finished.
+
+ALTER TABLE public.speech_turns
+  ADD COLUMN IF NOT EXISTS embedding_short vector(256);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_embedding_short_hnsw
+ON public.speech_turns
+USING hnsw (embedding_short vector_cosine_ops)
+WITH (
+  m = 16,
+  ef_construction = 200
+);
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Export speech_turns embeddings to the memory-mapped index used by retrieval
+mode "memmap" (see backend/utils/memmap_index.py).
+
+Without --rebuild only speech_ids missing from the index are exported and
+appended, so the job can run after every ingestion. Use --rebuild after a
+re-embedding job or when rows were updated or deleted.
+
+Usage:
+    python -m backend.db.sync_vector_index [--path data/vector_index] [--batch-size 5000] [--rebuild]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+import numpy as np
+import psycopg2
+
+from backend.utils.memmap_index import append_rows, load_manifest, read_ids, replace_index
+
+# Database settings from environment variables
+pg_host = os.environ["PGHOST"]
+pg_user = os.environ["PGUSER"]
+pg_password = os.environ["PGPASSWORD"]
+pg_db = os.environ["PGDATABASE"]
+pg_port = os.environ.get("PGPORT", "5432")
+
+
+def _parse_vector(text):
+    return np.fromstring(text.strip('[]'), sep=',', dtype=np.float32)
+
+
+def sync_vector_index(path, batch_size=5000, rebuild=False):
+    """
+    Append every speech_turn with an embedding that is not in the index yet.
+
+    A rebuild exports everything into a staging directory and swaps it in at
+    the end, so workers never see a partially built index.
+    """
+    try:
+        conn = psycopg2.connect(
+            host=pg_host,
+            database=pg_db,
+            user=pg_user,
+            password=pg_password,
+            port=pg_port,
+            sslmode='require'
+        )
+
+        target = path
+        if rebuild:
+            target = f'{path.rstrip("/")}.staging'
+            shutil.rmtree(target, ignore_errors=True)
+
+        indexed = set(read_ids(target))
+        with conn.cursor() as cur:
+            cur.execute('SELECT speech_id FROM speech_turns WHERE embedding IS NOT NULL ORDER BY speech_id')
+            missing = [r[0] for r in cur.fetchall() if r[0] not in indexed]
+        print(f'{len(indexed)} rows indexed, {len(missing)} to export')
+
+        total = 0
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT speech_id, embedding::text, coalesce(is_meaningful, false)
+                    FROM speech_turns
+                    WHERE speech_id = ANY(%s)
+                      AND embedding IS NOT NULL
+                    ORDER BY speech_id
+                ''', (batch,))
+                rows = cur.fetchall()
+            if not rows:
+                continue
+
+            manifest = append_rows(
+                target,
+                [r[0] for r in rows],
+                np.stack([_parse_vector(r[1]) for r in rows]),
+                [r[2] for r in rows]
+            )
+            total += len(rows)
+            print(f'Exported {total} rows (index now {manifest["count"]} rows)...')
+
+        if rebuild:
+            if total:
+                replace_index(target, path)
+            else:
+                print('⚠️  No embeddings found; index left unchanged')
+        manifest = load_manifest(path)
+        print(f'✅ Vector index up to date: {manifest["count"] if manifest else 0} rows in {path}')
+        return True
+
+    except Exception as e:
+        print(f'❌ Error during vector index sync: {e}')
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=os.environ.get("MEMMAP_INDEX_DIR", "data/vector_index"))
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--rebuild", action="store_true", help="Replace the index instead of appending")
+    args = parser.parse_args()
+
+    success = sync_vector_index(args.path, args.batch_size, args.rebuild)
+    sys.exit(0 if success else 1)
@@ -9,6 +9,7 @@ import pandas as pd
 import re
 from backend.utils.postprocessing_helpers import reformat_transcript, embed_single_article, database_loading, build_speech_id
 from backend.utils.scraper_helpers import get_missing_articles_meta
+from backend.utils.embedding_store import ReuseStats
 import time
 
 load_dotenv()
@@ -87,6 +88,9 @@ def scrape_transcripts_with_playwright():
         print("No articles to process!")
         return
     
+    # Embedding store reuse counters for this run
+    reuse_stats = ReuseStats()
+
     with sync_playwright() as p:
         print("🚀 Launching browser...")
         browser = p.chromium.launch(headless=True)
@@ -116,7 +120,7 @@ def scrape_transcripts_with_playwright():
                 transcript_lines_structured = reformat_transcript(transcript_lines, article['doc_id'])
                 print(f"✓ Structured {len(transcript_lines_structured)} speech turns")
                 
-                transcript_lines_embedded = embed_single_article(transcript_lines_structured, max_tokens=300)
+                transcript_lines_embedded = embed_single_article(transcript_lines_structured, max_tokens=300, reuse_stats=reuse_stats)
                 
                 if not transcript_lines_embedded:
                     print(f"⚠️  Embedding returned empty list for {article['doc_id']}, skipping...")
@@ -167,6 +171,7 @@ def scrape_transcripts_with_playwright():
         browser.close()
         print(f"\n{'='*60}")
         print("✅ Scraping completed!")
+        print(f"♻️  Embedding reuse: {reuse_stats.summary()}")
         print(f"{'='*60}")
 
 
@@ -0,0 +1,407 @@
+"""
+Resumable bulk re-embedding of speech_turns with a new embedding model.
+
+Steps (run in order):
+    prepare  Add speech_turns.embedding_next with the target dimension (and
+             embedding_short_next for the shadow vectors) and register the job
+             checkpoint.
+    run      Re-embed speech_turns.text in keyset-paginated pages. Each page is
+             embedded with the batch engine (bounded concurrency, 429 aware) and
+             written together with the checkpoint in one transaction, so the job
+             resumes where it stopped after a crash.
+    index    Mirror every index of embedding / embedding_short (HNSW, partial,
+             halfvec, bit) onto the new columns as <name>_next (CONCURRENTLY).
+    promote  Swap the new columns and their indexes in a single transaction.
+             The new model is recorded in active_embedding_model, which the
+             API reads, so queries switch without a config change.
+    status   Show progress.
+
+While the job runs, set AZURE_OPENAI_NEXT_EMBEDDING_DEPLOYMENT and
+NEXT_EMBEDDING_DIMENSIONS for the scrapers so new rows are dual-written.
+
+Usage:
+    python -m backend.ingestion.reembed_main run --model text-embedding-3-large --dimensions 1536
+"""
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from backend.utils.batch_embedder import BatchEmbedder
+from backend.utils.embedding_store import content_hash, fetch_stored_embeddings, save_embeddings
+from backend.utils.index_build import (
+    column_indexes,
+    create_index,
+    drop_index,
+    hnsw_over_limit,
+    index_valid,
+    rename_index,
+    retarget,
+)
+from backend.utils.postprocessing_helpers import bump_corpus_version, count_tokens, get_db_connection
+
+load_dotenv()
+
+
+# Swapped on promote: current column -> replacement being filled
+SWAPPED_COLUMNS = {"embedding": "embedding_next", "embedding_short": "embedding_short_next"}
+
+
+def job_id(model, dimensions):
+    return f"{model}:{dimensions}"
+
+
+def vector_dimensions(cur, column):
+    """Declared dimension of vector column `column` of speech_turns (None if it does not exist)."""
+    cur.execute("""
+        SELECT atttypmod
+        FROM pg_attribute
+        WHERE attrelid = 'speech_turns'::regclass
+          AND attname = %s
+          AND NOT attisdropped
+    """, (column,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def check_index_dimensions(cur, dimensions):
+    """
+    Raise if an index of embedding cannot be mirrored at `dimensions`
+    (pgvector HNSW indexes `vector` up to 2000 dimensions, halfvec up to 4000).
+    """
+    over = hnsw_over_limit(column_indexes(cur, ["embedding"]), dimensions)
+    if over:
+        raise RuntimeError(
+            f"pgvector HNSW cannot index {dimensions}-d vectors with "
+            + ", ".join(f"{name} ({kind}, up to {limit})" for name, kind, limit in over)
+            + "; choose a smaller --dimensions"
+        )
+
+
+def prepare(model, dimensions):
+    """Create the embedding_next / embedding_short_next columns and the job checkpoint."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            existing = vector_dimensions(cur, "embedding_next")
+            if existing is not None and existing != dimensions:
+                raise RuntimeError(
+                    f"embedding_next already exists as vector({existing}); "
+                    f"promote or drop it before preparing a {dimensions}-d job"
+                )
+            # `index` mirrors the embedding indexes; fail now, not after the run
+            check_index_dimensions(cur, dimensions)
+            cur.execute(f"ALTER TABLE speech_turns ADD COLUMN IF NOT EXISTS embedding_next vector({int(dimensions)})")
+            # Shadow vectors keep their size; they are recomputed from the new model
+            shadow_dims = vector_dimensions(cur, "embedding_short")
+            if shadow_dims:
+                cur.execute(
+                    f"ALTER TABLE speech_turns ADD COLUMN IF NOT EXISTS embedding_short_next vector({int(shadow_dims)})"
+                )
+            cur.execute("""
+                INSERT INTO reembedding_checkpoints (job_id, model, dimensions)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (job_id) DO NOTHING
+            """, (job_id(model, dimensions), model, dimensions))
+        conn.commit()
+        print(f"✅ Prepared job {job_id(model, dimensions)}")
+    finally:
+        conn.close()
+
+
+def run(model, dimensions, page_size=1000, concurrency=4, tokens_per_minute=None, send_dimensions=True):
+    """Re-embed every row not yet embedded with the target model, resuming from the checkpoint."""
+    conn = get_db_connection()
+    embedder = BatchEmbedder(
+        model=model,
+        count_tokens=count_tokens,
+        max_concurrency=concurrency,
+        dimensions=dimensions if send_dimensions else None
+    )
+    store_model = f"{model}:{dimensions}"
+    jid = job_id(model, dimensions)
+
+    window_start = time.monotonic()
+    window_tokens = 0
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT last_speech_id, rows_done FROM reembedding_checkpoints WHERE job_id = %s", (jid,))
+            checkpoint = cur.fetchone()
+        if checkpoint is None:
+            raise RuntimeError(f"Job {jid} not found; run `prepare` first")
+        last_id, rows_done = checkpoint
+        print(f"Resuming {jid} after '{last_id}' ({rows_done} rows done)")
+
+        with conn.cursor() as cur:
+            shadow_dims = vector_dimensions(cur, "embedding_short_next")
+        # Rows written before embedding_short_next existed are redone (their vectors come from the store)
+        shadow_done = "AND embedding_short_next IS NOT NULL" if shadow_dims else ""
+        shadow_set = (
+            f", embedding_short_next = l2_normalize(subvector(v.embedding::vector, 1, {int(shadow_dims)}))"
+            f"::vector({int(shadow_dims)})"
+        ) if shadow_dims else ""
+
+        while True:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT speech_id, text
+                    FROM speech_turns
+                    WHERE speech_id > %s
+                      AND text IS NOT NULL
+                    ORDER BY speech_id
+                    LIMIT %s
+                """, (last_id, page_size))
+                page = cur.fetchall()
+                if not page:
+                    break
+
+                cur.execute(f"""
+                    SELECT speech_id
+                    FROM speech_turns
+                    WHERE speech_id = ANY(%s)
+                      AND embedding_next_model IS NOT DISTINCT FROM %s
+                      AND embedding_next_dim IS NOT DISTINCT FROM %s
+                      {shadow_done}
+                """, ([r[0] for r in page], model, dimensions))
+                done = {r[0] for r in cur.fetchall()}
+            pending = [(sid, text) for sid, text in page if sid not in done]
+
+            if pending:
+                hashes = {sid: content_hash(text, store_model) for sid, text in pending}
+                vectors = fetch_stored_embeddings(conn, list(set(hashes.values())), store_model)
+                missing = {}
+                for sid, text in pending:
+                    if hashes[sid] not in vectors:
+                        missing.setdefault(hashes[sid], text)
+
+                if missing:
+                    # Simple tokens-per-minute pacing on top of the engine's 429 handling
+                    page_tokens = sum(count_tokens(t) for t in missing.values())
+                    if tokens_per_minute:
+                        elapsed = time.monotonic() - window_start
+                        if elapsed >= 60:
+                            window_start, window_tokens = time.monotonic(), 0
+                        elif window_tokens + page_tokens > tokens_per_minute:
+                            time.sleep(60 - elapsed)
+                            window_start, window_tokens = time.monotonic(), 0
+                        window_tokens += page_tokens
+
+                    new_vectors = dict(zip(missing, embedder.embed(list(missing.values()))))
+                    for vec in new_vectors.values():
+                        if len(vec) != dimensions:
+                            raise RuntimeError(f"Model returned {len(vec)}-d vectors, expected {dimensions}")
+                    save_embeddings(conn, new_vectors, store_model)
+                    vectors.update(new_vectors)
+
+                with conn.cursor() as cur:
+                    execute_values(cur, f"""
+                        UPDATE speech_turns st
+                        SET embedding_next = l2_normalize(v.embedding::vector),
+                            embedding_next_model = v.model,
+                            embedding_next_dim = v.dim
+                            {shadow_set}
+                        FROM (VALUES %s) AS v(speech_id, embedding, model, dim)
+                        WHERE st.speech_id = v.speech_id
+                    """, [
+                        (sid, '[' + ','.join(map(str, vectors[hashes[sid]])) + ']', model, dimensions)
+                        for sid, _ in pending
+                    ])
+
+            last_id = page[-1][0]
+            rows_done += len(pending)
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE reembedding_checkpoints
+                    SET last_speech_id = %s, rows_done = %s, updated_at = now()
+                    WHERE job_id = %s
+                """, (last_id, rows_done, jid))
+            # Vectors and checkpoint are committed together
+            conn.commit()
+            print(f"  {rows_done} rows re-embedded (up to {last_id})")
+
+        print(f"✅ Re-embedding pass complete: {rows_done} rows")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def next_index_name(name):
+    return f"{name}_next"
+
+
+def build_index():
+    """
+    Mirror every index of the swapped columns onto their replacements without
+    blocking writes.
+
+    Each index of embedding / embedding_short (full, is_meaningful partial,
+    shadow, halfvec, bit) is rebuilt as <name>_next with the same access
+    method, operator class, options and predicate, on embedding_next /
+    embedding_short_next and with the quantized casts resized to the new
+    dimension. Partitioned tables are indexed partition by partition.
+    """
+    conn = get_db_connection()
+    conn.autocommit = True  # CONCURRENTLY is not allowed in a transaction
+    try:
+        with conn.cursor() as cur:
+            dimensions = vector_dimensions(cur, "embedding_next")
+            if dimensions is None:
+                raise RuntimeError("embedding_next does not exist; run `prepare` first")
+            check_index_dimensions(cur, dimensions)
+            columns = {
+                old: new for old, new in SWAPPED_COLUMNS.items()
+                if vector_dimensions(cur, new) is not None
+            }
+            for name, using in column_indexes(cur, list(columns)):
+                mirror = next_index_name(name)
+                print(f"Building {mirror}")
+                create_index(cur, mirror, retarget(using, columns, dimensions))
+                print(f"✅ Index {mirror} ready")
+    finally:
+        conn.close()
+
+
+def promote(model, dimensions, force=False):
+    """
+    Atomically swap the new vectors and their indexes into place.
+
+    embedding / embedding_short (and their model and dimension columns) are
+    kept as *_prev with their indexes renamed to <name>_prev; embedding_next /
+    embedding_short_next take their names and the <name>_next mirrors built
+    by `index` take the index names, so every query plan keeps its index.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT count(*)
+                FROM speech_turns
+                WHERE text IS NOT NULL
+                  AND (embedding_next_model IS DISTINCT FROM %s OR embedding_next_dim IS DISTINCT FROM %s)
+            """, (model, dimensions))
+            remaining = cur.fetchone()[0]
+            if remaining and not force:
+                raise RuntimeError(f"{remaining} rows are not embedded with {model} yet; run `run` again or use --force")
+
+            columns = {
+                old: new for old, new in SWAPPED_COLUMNS.items()
+                if vector_dimensions(cur, new) is not None
+            }
+            indexes = [name for name, _ in column_indexes(cur, list(columns))]
+            unbuilt = [name for name in indexes if not index_valid(cur, next_index_name(name))]
+            if unbuilt and not force:
+                raise RuntimeError(f"Missing or invalid indexes {unbuilt}; run `index` first or use --force")
+
+            # Shadow vectors of rows the run did not reach (dual-writes, --force)
+            shadow_dims = vector_dimensions(cur, "embedding_short_next")
+            if shadow_dims:
+                cur.execute(f"""
+                    UPDATE speech_turns
+                    SET embedding_short_next = l2_normalize(subvector(embedding_next, 1, {int(shadow_dims)}))::vector({int(shadow_dims)})
+                    WHERE embedding_next IS NOT NULL
+                      AND embedding_short_next IS NULL
+                """)
+
+            # Renames are metadata-only: readers see either the old or the new
+            # column and index set. Dropping the *_prev columns drops their indexes.
+            cur.execute("""
+                ALTER TABLE speech_turns DROP COLUMN IF EXISTS embedding_prev;
+                ALTER TABLE speech_turns DROP COLUMN IF EXISTS embedding_short_prev;
+                ALTER TABLE speech_turns DROP COLUMN IF EXISTS embedding_prev_model;
+                ALTER TABLE speech_turns DROP COLUMN IF EXISTS embedding_prev_dim;
+                ALTER TABLE speech_turns RENAME COLUMN embedding_model TO embedding_prev_model;
+                ALTER TABLE speech_turns RENAME COLUMN embedding_dim TO embedding_prev_dim;
+                ALTER TABLE speech_turns RENAME COLUMN embedding_next_model TO embedding_model;
+                ALTER TABLE speech_turns RENAME COLUMN embedding_next_dim TO embedding_dim;
+                ALTER TABLE speech_turns ADD COLUMN embedding_next_model text;
+                ALTER TABLE speech_turns ADD COLUMN embedding_next_dim integer;
+            """)
+            for old, new in columns.items():
+                cur.execute(f"ALTER TABLE speech_turns RENAME COLUMN {old} TO {old}_prev")
+                cur.execute(f"ALTER TABLE speech_turns RENAME COLUMN {new} TO {old}")
+            for name in indexes:
+                drop_index(cur, f"{name}_prev", concurrently=False)
+                rename_index(cur, name, f"{name}_prev")
+                if name not in unbuilt:
+                    rename_index(cur, next_index_name(name), name)
+            # Single HNSW index of earlier versions of `index`
+            drop_index(cur, "idx_speech_turns_embedding_next_hnsw", concurrently=False)
+            # The API embeds queries with the recorded model
+            cur.execute("""
+                INSERT INTO active_embedding_model (model, dimensions)
+                VALUES (%s, %s)
+                ON CONFLICT (id) DO UPDATE
+                SET model = EXCLUDED.model, dimensions = EXCLUDED.dimensions, promoted_at = now()
+            """, (model, dimensions))
+            cur.execute("DELETE FROM reembedding_checkpoints WHERE job_id = %s", (job_id(model, dimensions),))
+        conn.commit()
+        # Cached search results were ranked with the old vectors
+        bump_corpus_version(conn)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print(f"✅ speech_turns.embedding now holds {model} ({dimensions}-d)")
+    print("   API workers pick up the new model from active_embedding_model within")
+    print("   EMBEDDING_MODEL_REFRESH_SECONDS. Set AZURE_OPENAI_EMBEDDING_DEPLOYMENT to the new")
+    print("   model and unset AZURE_OPENAI_NEXT_EMBEDDING_DEPLOYMENT for the scrapers.")
+    if unbuilt:
+        print(f"⚠️  Promoted without indexes {unbuilt}: rebuild them on the new columns")
+
+
+def status():
+    """Print progress of every registered job."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM speech_turns WHERE text IS NOT NULL")
+            total = cur.fetchone()[0]
+            cur.execute("SELECT job_id, model, dimensions, last_speech_id, updated_at FROM reembedding_checkpoints ORDER BY job_id")
+            jobs = cur.fetchall()
+            for jid, model, dimensions, last_id, updated_at in jobs:
+                cur.execute("""
+                    SELECT count(*) FROM speech_turns
+                    WHERE embedding_next_model = %s AND embedding_next_dim = %s
+                """, (model, dimensions))
+                done = cur.fetchone()[0]
+                print(f"{jid}: {done}/{total} rows ({done / total:.1%}) - last '{last_id}' at {updated_at}")
+        if not jobs:
+            print("No re-embedding jobs registered")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["prepare", "run", "index", "promote", "status"])
+    parser.add_argument("--model", help="Target embedding deployment")
+    parser.add_argument("--dimensions", type=int, help="Target vector dimension")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding requests in flight")
+    parser.add_argument("--tokens-per-minute", type=int, help="Pace requests to this TPM budget")
+    parser.add_argument("--no-dimensions-param", action="store_true",
+                        help="Do not send `dimensions` to the API (models other than text-embedding-3)")
+    parser.add_argument("--force", action="store_true", help="Promote even if some rows are missing")
+    args = parser.parse_args()
+
+    if args.command in ("prepare", "run", "promote") and not (args.model and args.dimensions):
+        parser.error(f"{args.command} requires --model and --dimensions")
+
+    if args.command == "prepare":
+        prepare(args.model, args.dimensions)
+    elif args.command == "run":
+        run(args.model, args.dimensions, args.page_size, args.concurrency,
+            args.tokens_per_minute, send_dimensions=not args.no_dimensions_param)
+    elif args.command == "index":
+        build_index()
+    elif args.command == "promote":
+        promote(args.model, args.dimensions, force=args.force)
+    else:
+        status()
+    sys.exit(0)
@@ -16,6 +16,44 @@ class Settings(BaseSettings):
     azure_openai_embedding_deployment: str = "text-embedding-3-small"
     azure_openai_chat_deployment: str = "gpt-4.1"
 
+    # Embedding client (API request path)
+    embedding_timeout_seconds: float = 10.0
+    embedding_max_retries: int = 2
+
+    # Query/concept embedding cache
+    embedding_cache_size: int = 2048
+    embedding_cache_persistent: bool = True
+    embedding_model_refresh_seconds: float = 30.0  # re-read the stored embedding model (re-embedding promote)
+
+    # Search/QA result cache (invalidated by the corpus_version watermark; 0 disables)
+    result_cache_size: int = 1024
+    result_cache_retry_seconds: float = 60.0  # re-check a missing corpus_version table
+
+    # Vector retrieval
+    retrieval_mode: str = "exact"          # exact | shadow | halfvec | binary
+    vector_distance: str = "cosine"        # cosine (<=>) | inner_product (<#>, after backend/db/inner_product_indexes.sql)
+    shadow_dimensions: int = 256           # size of speech_turns.embedding_short
+    rerank_factor: int = 4                 # candidates per requested result
+    binary_rerank_factor: int = 10         # binary codes need a wider shortlist
+    rerank_min_candidates: int = 40
+    memmap_index_dir: str = "data/vector_index"  # in-process index (mode "memmap")
+    memmap_block_rows: int = 65536         # rows per matmul block
+    ivfpq_index_dir: str = "data/ivfpq_index"  # compressed index (mode "ivfpq")
+    ivfpq_nprobe: int = 16                 # inverted lists scanned per query
+    rrf_k: int = 60                        # reciprocal rank fusion constant (hybrid mode)
+    hnsw_ef_search: int = 100              # per-query HNSW candidate list (SET LOCAL)
+    hnsw_iterative_scan: str = "relaxed_order"  # off | strict_order | relaxed_order (pgvector >= 0.8)
+    hnsw_max_scan_tuples: int = 20000      # iterative scan budget
+
+    # Semantic evolution
+    evolution_execution: str = "aggregate"  # aggregate (per-period AVG in SQL) | stream | rows
+    evolution_stream_chunk_rows: int = 2000  # rows per server-side cursor fetch (execution "stream")
+    evolution_max_concepts: int = 8  # concepts per /semantic-evolution/multi request
+
+    # Batch search (/search/batch)
+    batch_search_max_queries: int = 50
+    batch_search_concurrency: int = 4      # pool connections used by one batch
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
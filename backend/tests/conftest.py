@@ -0,0 +1,13 @@
+import os
+
+# backend.settings requires these; tests never connect to the services
+for name, value in {
+    "PGHOST": "localhost",
+    "PGUSER": "test",
+    "PGPASSWORD": "test",
+    "PGDATABASE": "test",
+    "AZURE_OPENAI_ENDPOINT": "https://example.openai.azure.com",
+    "AZURE_OPENAI_API_KEY": "test",
+    "AZURE_OPENAI_API_VERSION": "2024-12-01-preview",
+}.items():
+    os.environ.setdefault(name, value)
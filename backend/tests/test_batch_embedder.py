@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from openai import RateLimitError
+
+from batch_embedder import BatchEmbedder, pack_batches
+
+
+class FakeEmbeddings:
+    def __init__(self, fail_first=0):
+        self.calls = []
+        self.fail_first = fail_first
+
+    async def create(self, model, input, **kwargs):
+        self.calls.append(list(input))
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            response = httpx.Response(
+                429,
+                headers={"retry-after-ms": "1"},
+                request=httpx.Request("POST", "https://example.com"),
+            )
+            raise RateLimitError("rate limited", response=response, body=None)
+        # Return items reversed to check that order is restored by index
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text))])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class FakeClient:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    async def close(self):
+        pass
+
+
+def make_embedder(embeddings, **kwargs):
+    embedder = BatchEmbedder(model="test-model", count_tokens=len, **kwargs)
+    embedder._create_client = lambda: FakeClient(embeddings)
+    return embedder
+
+
+def test_pack_batches_respects_token_and_input_budgets():
+    assert pack_batches([3, 3, 3, 3], max_tokens_per_request=6, max_inputs_per_request=10) == [[0, 1], [2, 3]]
+    assert pack_batches([1, 1, 1], max_tokens_per_request=100, max_inputs_per_request=2) == [[0, 1], [2]]
+    # oversized inputs are sent alone
+    assert pack_batches([2, 50, 2], max_tokens_per_request=10, max_inputs_per_request=10) == [[0], [1], [2]]
+
+
+def test_embed_returns_vectors_in_input_order():
+    texts = ["a", "bbbb", "cc", "dddddd", "e"]
+    embeddings = FakeEmbeddings()
+    embedder = make_embedder(embeddings, max_tokens_per_request=6, max_concurrency=2)
+
+    vectors = embedder.embed(texts)
+
+    assert vectors == [[float(len(t))] for t in texts]
+    assert len(embeddings.calls) > 1
+    assert sorted(t for call in embeddings.calls for t in call) == sorted(texts)
+
+
+def test_embed_retries_after_rate_limit():
+    embeddings = FakeEmbeddings(fail_first=2)
+    embedder = make_embedder(embeddings, max_retries=3)
+
+    vectors = asyncio.run(embedder.embed_async(["hola", "mundo"]))
+
+    assert vectors == [[4.0], [5.0]]
+    assert len(embeddings.calls) == 3
+
+
+def test_embed_works_inside_a_running_event_loop():
+    # e.g. the scrapers call embed() inside Playwright's sync API
+    embedder = make_embedder(FakeEmbeddings())
+
+    async def caller():
+        return embedder.embed(["hola", "mundo"])
+
+    assert asyncio.run(caller()) == [[4.0], [5.0]]
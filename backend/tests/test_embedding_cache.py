@@ -0,0 +1,116 @@
+import asyncio
+
+import embedding_cache
+from cache import LRUCache
+from text_utils import normalize_cache_text
+
+
+def test_normalize_cache_text_folds_case_accents_and_spaces():
+    assert normalize_cache_text("  Seguridad   Pública ") == "seguridad publica"
+    assert normalize_cache_text("REFORMA\tjudicial\n") == "reforma judicial"
+    assert normalize_cache_text("Niñez") == normalize_cache_text("ninez")
+    assert normalize_cache_text(None) == ""
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    # touch "a" so "b" becomes the eviction candidate
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_cache_counters():
+    cache = LRUCache(maxsize=4)
+    cache.put(("seguridad publica", "text-embedding-3-small"), [0.1, 0.2])
+
+    assert cache.get(("seguridad publica", "text-embedding-3-small")) == [0.1, 0.2]
+    assert cache.get(("seguridad publica", "other-deployment")) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_embed_queries_keeps_order_dedups_keys_and_counts_persisted_tier(monkeypatch):
+    persisted = {"reforma judicial": [0.0, 1.0]}
+    embedded = []
+    saved = []
+
+    async def active_embedding_model():
+        return "text-embedding-3-small", None
+
+    async def fetch_persisted_many(text_keys, deployment):
+        return {k: persisted[k] for k in text_keys if k in persisted}
+
+    async def persist_many(text_keys, deployment, embeddings):
+        saved.extend(text_keys)
+
+    async def embed_texts_async(texts, model=None):
+        embedded.append(list(texts))
+        return [[float(len(t)), 0.0] for t in texts]
+
+    monkeypatch.setattr(embedding_cache, "active_embedding_model", active_embedding_model)
+    monkeypatch.setattr(embedding_cache, "_fetch_persisted_many", fetch_persisted_many)
+    monkeypatch.setattr(embedding_cache, "_persist_many", persist_many)
+    monkeypatch.setattr(embedding_cache, "embed_texts_async", embed_texts_async)
+    monkeypatch.setattr(embedding_cache.settings, "embedding_cache_persistent", True)
+    monkeypatch.setattr(embedding_cache, "memory_cache", LRUCache(maxsize=16))
+    monkeypatch.setattr(embedding_cache, "db_hits", 0)
+    monkeypatch.setattr(embedding_cache, "db_misses", 0)
+
+    texts = ["Seguridad Pública", "Reforma judicial", "seguridad  publica", "Niñez"]
+    vectors = asyncio.run(embedding_cache.embed_queries(texts))
+
+    # One API call for the keys missing from both tiers, each key embedded once
+    # (with the last spelling seen), results in input order
+    assert embedded == [["seguridad  publica", "Niñez"]]
+    assert saved == ["seguridad publica", "ninez"]
+    assert vectors == [[18.0, 0.0], [0.0, 1.0], [18.0, 0.0], [5.0, 0.0]]
+    assert (embedding_cache.db_hits, embedding_cache.db_misses) == (1, 2)
+
+    # Everything is in the memory tier now: no lookup, no API call
+    assert asyncio.run(embedding_cache.embed_queries(["NIÑEZ", "reforma judicial"])) == [[5.0, 0.0], [0.0, 1.0]]
+    assert len(embedded) == 1
+    assert (embedding_cache.db_hits, embedding_cache.db_misses) == (1, 2)
+
+
+def test_active_embedding_model_reads_the_promoted_model(monkeypatch):
+    queries = []
+
+    class FakeConnection:
+        async def fetchrow(self, sql):
+            queries.append(sql)
+            return {"model": "text-embedding-3-large", "dimensions": 1024}
+
+    class FakePool:
+        def acquire(self):
+
+            class Acquire:
+                async def __aenter__(self):
+                    return FakeConnection()
+
+                async def __aexit__(self, *exc):
+                    return False
+
+            return Acquire()
+
+    async def get_pool():
+        return FakePool()
+
+    monkeypatch.setattr(embedding_cache, "get_pool", get_pool)
+    monkeypatch.setattr(embedding_cache, "_active_model", ("text-embedding-3-small", None))
+    monkeypatch.setattr(embedding_cache, "_active_checked_at", None)
+
+    assert asyncio.run(embedding_cache.active_embedding_model()) == ("text-embedding-3-large", 1024)
+    assert queries == ["SELECT model, dimensions FROM active_embedding_model"]
+    # Cached until EMBEDDING_MODEL_REFRESH_SECONDS have passed
+    asyncio.run(embedding_cache.active_embedding_model())
+    assert len(queries) == 1
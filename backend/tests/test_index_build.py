@@ -0,0 +1,115 @@
+from index_build import (
+    column_indexes,
+    create_index,
+    drop_index,
+    hnsw_over_limit,
+    partition_index_name,
+    rename_index,
+    retarget,
+)
+
+
+class FakeCursor:
+    """Records statements; catalog queries return the canned rows."""
+
+    def __init__(self, partitions=(), partitioned_index=False, children=(), indexes=()):
+        self.statements = []
+        self.partitions = list(partitions)
+        self.partitioned_index = partitioned_index
+        self.children = list(children)
+        self.indexes = list(indexes)
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+        if "FROM pg_inherits" in sql and "child" in sql:
+            self._rows = self.children
+        elif "FROM pg_inherits" in sql:
+            self._rows = [(p,) for p in self.partitions]
+        elif "pg_get_indexdef" in sql:
+            self._rows = self.indexes
+        elif "relkind" in sql:
+            self._rows = [(self.partitioned_index,)]
+        else:
+            self._rows = []
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+def test_create_index_on_plain_table_is_concurrent():
+    cur = FakeCursor()
+    assert create_index(cur, "idx_speech_turns_x", "hnsw (embedding vector_cosine_ops)") == []
+    assert cur.statements[-1] == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_speech_turns_x "
+        "ON public.speech_turns USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def test_create_index_on_partitioned_table_attaches_each_partition():
+    cur = FakeCursor(partitions=["speech_turns_p2025_01", "speech_turns_p2025_02"])
+    create_index(cur, "idx_speech_turns_x", "btree (doc_id)", progress=lambda _: None)
+    ddl = [s for s in cur.statements if not s.startswith("SELECT")]
+    assert ddl == [
+        "CREATE INDEX IF NOT EXISTS idx_speech_turns_x ON ONLY public.speech_turns USING btree (doc_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS speech_turns_p2025_01_x ON public.speech_turns_p2025_01 USING btree (doc_id)",
+        "ALTER INDEX idx_speech_turns_x ATTACH PARTITION speech_turns_p2025_01_x",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS speech_turns_p2025_02_x ON public.speech_turns_p2025_02 USING btree (doc_id)",
+        "ALTER INDEX idx_speech_turns_x ATTACH PARTITION speech_turns_p2025_02_x",
+    ]
+
+
+def test_drop_and_rename_partitioned_index():
+    cur = FakeCursor(partitioned_index=True, children=[("speech_turns_p2025_01_x_new", "speech_turns_p2025_01")])
+    drop_index(cur, "idx_speech_turns_x")
+    assert cur.statements[-1] == "DROP INDEX IF EXISTS idx_speech_turns_x"
+
+    rename_index(cur, "idx_speech_turns_x_new", "idx_speech_turns_x")
+    assert cur.statements[-2:] == [
+        "ALTER INDEX speech_turns_p2025_01_x_new RENAME TO speech_turns_p2025_01_x",
+        "ALTER INDEX idx_speech_turns_x_new RENAME TO idx_speech_turns_x",
+    ]
+    assert partition_index_name("speech_turns_p2025_01", "other_idx") == "speech_turns_p2025_01_other_idx"
+
+
+def test_column_indexes_are_retargeted_to_the_new_columns():
+    cur = FakeCursor(indexes=[
+        ("idx_speech_turns_doc_id", "CREATE INDEX idx_speech_turns_doc_id ON ONLY public.speech_turns USING btree (doc_id)"),
+        ("idx_speech_turns_embedding_prev_hnsw",
+         "CREATE INDEX idx_speech_turns_embedding_prev_hnsw ON ONLY public.speech_turns USING hnsw (embedding_prev vector_ip_ops)"),
+        ("idx_speech_turns_embedding_halfvec_ip_hnsw",
+         "CREATE INDEX idx_speech_turns_embedding_halfvec_ip_hnsw ON ONLY public.speech_turns "
+         "USING hnsw (((embedding)::halfvec(1536)) halfvec_ip_ops) WITH (m='16')"),
+        ("idx_speech_turns_embedding_short_meaningful_ip_hnsw",
+         "CREATE INDEX idx_speech_turns_embedding_short_meaningful_ip_hnsw ON ONLY public.speech_turns "
+         "USING hnsw (embedding_short vector_ip_ops) WHERE is_meaningful"),
+    ])
+    columns = {"embedding": "embedding_next", "embedding_short": "embedding_short_next"}
+    indexes = column_indexes(cur, list(columns))
+    assert [name for name, _ in indexes] == [
+        "idx_speech_turns_embedding_halfvec_ip_hnsw",
+        "idx_speech_turns_embedding_short_meaningful_ip_hnsw",
+    ]
+    assert [retarget(using, columns, 3072) for _, using in indexes] == [
+        "hnsw (((embedding_next)::halfvec(3072)) halfvec_ip_ops) WITH (m='16')",
+        "hnsw (embedding_short_next vector_ip_ops) WHERE is_meaningful",
+    ]
+
+
+def test_hnsw_over_limit_rejects_wide_vector_indexes():
+    indexes = [
+        ("idx_speech_turns_embedding_hnsw", "hnsw (embedding vector_cosine_ops) WITH (m='16')"),
+        ("idx_speech_turns_embedding_halfvec_hnsw", "hnsw (((embedding)::halfvec(1536)) halfvec_cosine_ops)"),
+        ("idx_speech_turns_embedding_bit_hnsw", "hnsw (((binary_quantize(embedding))::bit(1536)) bit_hamming_ops)"),
+        ("idx_speech_turns_doc_id", "btree (doc_id)"),
+    ]
+    assert hnsw_over_limit(indexes, 1536) == []
+    # A 3072-d model only fits the halfvec and bit indexes
+    assert hnsw_over_limit(indexes, 3072) == [("idx_speech_turns_embedding_hnsw", "vector", 2000)]
+    assert [name for name, _, _ in hnsw_over_limit(indexes, 5000)] == [
+        "idx_speech_turns_embedding_hnsw",
+        "idx_speech_turns_embedding_halfvec_hnsw",
+    ]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from ivfpq_index import IVFPQIndex, kmeans
+
+
+def _clustered(n, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    points = centers[rng.integers(0, clusters, n)] + 0.1 * rng.standard_normal((n, dim))
+    return points.astype(np.float32)
+
+
+def test_kmeans_finds_separated_clusters():
+    x = np.concatenate([np.zeros((50, 2)), np.ones((50, 2)) * 10]).astype(np.float32)
+    centroids = kmeans(x, 2, iterations=5)
+    assert sorted(centroids[:, 0].round().tolist()) == [0.0, 10.0]
+
+
+def test_search_recall_and_save_load(tmp_path):
+    data = _clustered(2000)
+    ids = [f"doc-{i}" for i in range(len(data))]
+    index = IVFPQIndex.train(data, nlist=16, m=4, iterations=8)
+    lists, codes = index.encode(data)
+    index.add(lists, codes, ids, [i % 2 == 0 for i in range(len(data))])
+    assert codes.shape == (2000, 4) and codes.dtype == np.uint8
+    assert index.offsets[-1] == len(index) == 2000
+
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    recalls = []
+    for q in normed[:20]:
+        truth = {ids[i] for i in np.argsort(-(normed @ q))[:10]}
+        hits = {sid for sid, _ in index.search(q, shortlist=40, nprobe=16)}
+        recalls.append(len(truth & hits) / 10)
+    assert np.mean(recalls) > 0.8
+
+    index.save(tmp_path)
+    loaded = IVFPQIndex.load(tmp_path)
+    assert loaded.search(normed[0], 5, nprobe=4) == index.search(normed[0], 5, nprobe=4)
+    filtered = loaded.search(normed[0], 20, nprobe=16, meaningful_only=True)
+    assert filtered and all(int(sid.split("-")[1]) % 2 == 0 for sid, _ in filtered)
@@ -0,0 +1,53 @@
+import numpy as np
+
+from memmap_index import MemmapIndex, append_rows, load_manifest, read_ids, replace_index
+
+
+def _rows(n, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def test_blocked_search_matches_brute_force(tmp_path):
+    vectors = _rows(1000)
+    ids = [f"doc-{i}" for i in range(1000)]
+    append_rows(tmp_path, ids, vectors, [True] * 1000)
+
+    index = MemmapIndex(tmp_path, block_rows=64)
+    query = _rows(1, seed=1)[0]
+    hits = index.search(query, top_k=10)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:10]
+    assert [h[0] for h in hits] == [ids[i] for i in expected]
+    assert hits[0][1] >= hits[-1][1]
+
+
+def test_meaningful_only_and_incremental_sync(tmp_path):
+    vectors = _rows(20)
+    append_rows(tmp_path, [f"a-{i}" for i in range(20)], vectors, [i % 2 == 0 for i in range(20)])
+    index = MemmapIndex(tmp_path, block_rows=7)
+
+    hits = index.search(vectors[1], top_k=5, meaningful_only=True)
+    assert all(int(h[0].split("-")[1]) % 2 == 0 for h in hits)
+
+    # Rows appended later are picked up without reopening the index
+    append_rows(tmp_path, ["b-0"], vectors[1:2] * 3, [True])
+    assert len(index) == 21
+    assert index.search(vectors[1], top_k=1, meaningful_only=True)[0][0] == "b-0"
+    assert read_ids(tmp_path)[-1] == "b-0"
+
+
+def test_replace_index_bumps_generation(tmp_path):
+    live, staging = tmp_path / "live", tmp_path / "staging"
+    append_rows(live, ["old"], _rows(1), [True])
+    append_rows(staging, ["new-1", "new-2"], _rows(2), [True, True])
+
+    index = MemmapIndex(live)
+    assert len(index) == 1
+
+    manifest = replace_index(staging, live)
+    assert manifest["generation"] == load_manifest(live)["generation"] == 1
+    assert read_ids(live) == ["new-1", "new-2"]
+    assert len(index) == 2
+    assert not staging.exists()
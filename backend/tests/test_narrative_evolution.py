@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import numpy as np
+
+from backend.analytics.narrative_evolution import (
+    ConceptPeriodAccumulator,
+    PeriodAccumulator,
+    compute_concept_evolutions,
+    compute_centroids,
+    compute_drift,
+    compute_evolution_points,
+    cosine_similarity,
+    group_embeddings_by_period,
+    period_key,
+)
+
+
+def test_period_key_by_granularity():
+    assert period_key(datetime(2025, 3, 1), "month") == "2025-03"
+    assert period_key(datetime(2025, 3, 10), "week") == "2025-03-10"
+
+
+def test_centroid_similarities_match_cosine():
+    centroids = {"2025-01": np.array([3.0, 4.0]), "2025-02": np.array([0.5, 0.1])}
+    concept = np.array([1.0, 0.0])
+
+    points = compute_evolution_points(centroids, concept, {"2025-01": 7, "2025-02": 2})
+    assert [p["period"] for p in points] == ["2025-01", "2025-02"]
+    assert points[0]["centroid_similarity"] == round(cosine_similarity(centroids["2025-01"], concept), 2)
+    assert "mean_similarity" not in points[0]
+
+    drift = compute_drift(centroids)
+    expected = 1 - cosine_similarity(centroids["2025-01"], centroids["2025-02"])
+    assert drift == [{"from": "2025-01", "to": "2025-02", "semantic_change": round(expected, 2)}]
+
+
+def test_evolution_points_carry_mean_similarity():
+    points = compute_evolution_points(
+        {"2025-01": np.array([1.0, 0.0])}, np.array([1.0, 0.0]), {"2025-01": 3}, {"2025-01": 0.714}
+    )
+    assert points == [{"period": "2025-01", "centroid_similarity": 1.0, "num_chunks": 3, "mean_similarity": 0.71}]
+
+
+def test_grouped_centroids_match_per_period_means():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    months = [datetime(2025, 1 + i % 3, 1) for i in range(50)]
+    rows = [{"period": m, "embedding": v} for m, v in zip(months, vectors)]
+
+    matrix, offsets, periods = group_embeddings_by_period(rows, "month")
+    assert matrix.dtype == np.float32 and matrix.shape == (50, 8)
+    assert periods == ["2025-01", "2025-02", "2025-03"]
+
+    centroids, counts = compute_centroids(matrix, offsets, periods)
+    for i, period in enumerate(periods):
+        expected = vectors[[j for j in range(50) if j % 3 == i]]
+        assert counts[period] == len(expected)
+        np.testing.assert_allclose(centroids[period], expected.mean(axis=0), rtol=1e-5, atol=1e-6)
+
+    # Text literals (non-binary drivers) give the same matrix
+    text_rows = [{"period": m, "embedding": "[" + ",".join(map(repr, v.tolist())) + "]"} for m, v in zip(months, vectors)]
+    text_matrix, _, _ = group_embeddings_by_period(text_rows, "month")
+    np.testing.assert_array_equal(text_matrix, matrix)
+
+
+def test_period_accumulator_matches_single_pass():
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((30, 4)).astype(np.float32)
+    rows = [
+        {"period": datetime(2025, 1 + i % 2, 1), "embedding": v, "similarity": 0.5 + i / 100}
+        for i, v in enumerate(vectors)
+    ]
+
+    accumulator = PeriodAccumulator("month")
+    for start in range(0, len(rows), 7):
+        accumulator.add(rows[start:start + 7])
+    centroids, counts, means = accumulator.result()
+
+    expected, expected_counts = compute_centroids(*group_embeddings_by_period(rows, "month"))
+    assert counts == expected_counts == {"2025-01": 15, "2025-02": 15}
+    for period in expected:
+        np.testing.assert_allclose(centroids[period], expected[period], rtol=1e-5, atol=1e-6)
+    assert np.isclose(means["2025-01"], np.mean([r["similarity"] for r in rows[::2]]))
+
+
+def test_concept_accumulator_matches_per_concept_evolution():
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((60, 6)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    concepts = [vectors[0] + vectors[1], vectors[2], -vectors[0]]
+    rows = [{"period": datetime(2025, 1 + i % 4, 1), "embedding": v} for i, v in enumerate(vectors)]
+
+    accumulator = ConceptPeriodAccumulator("month", concepts, 0.1)
+    for start in range(0, len(rows), 11):
+        accumulator.add(rows[start:start + 11])
+    evolutions = compute_concept_evolutions(concepts, *accumulator.result())
+    assert len(evolutions) == len(concepts)
+
+    # Same result as the single-concept path over each concept's matches
+    for concept, evolution in zip(concepts, evolutions):
+        unit = concept / np.linalg.norm(concept)
+        matched = [dict(r, similarity=float(r["embedding"] @ unit)) for r in rows if r["embedding"] @ unit > 0.1]
+        single = PeriodAccumulator("month")
+        single.add(matched)
+        centroids, counts, means = single.result()
+        assert evolution["points"] == compute_evolution_points(centroids, concept, counts, means)
+        assert evolution["drift"] == compute_drift(centroids)
+
+
+def test_concept_accumulator_without_matches():
+    accumulator = ConceptPeriodAccumulator("month", [np.array([1.0, 0.0])], 0.9)
+    accumulator.add([{"period": datetime(2025, 1, 1), "embedding": np.array([0.0, 1.0], dtype=np.float32)}])
+    periods, centroids, counts, means = accumulator.result()
+    assert periods == ["2025-01"] and counts.tolist() == [[0]]
+    assert compute_concept_evolutions([np.array([1.0, 0.0])], periods, centroids, counts, means) == [
+        {"points": [], "drift": []}
+    ]
@@ -0,0 +1,83 @@
+import asyncio
+
+import asyncpg
+import numpy as np
+
+import result_cache
+from result_cache import fetch_cached, result_key
+
+
+class FakeConnection:
+    """Answers the corpus_version lookup; raises if the table is missing."""
+
+    def __init__(self, version=1):
+        self.version = version
+        self.lookups = 0
+
+    async def fetchval(self, sql):
+        self.lookups += 1
+        if self.version is None:
+            raise asyncpg.UndefinedTableError("relation \"corpus_version\" does not exist")
+        return self.version
+
+
+def counting_fetch(rows):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return rows
+
+    return fetch, calls
+
+
+def setup_function():
+    result_cache.result_cache.clear()
+    result_cache._watermark_missing_at = None
+
+
+def test_result_key_depends_on_vector_and_options_not_option_order():
+    vec = [0.1, 0.2, 0.3]
+    assert result_key("search", vec, top_k=5, mode="exact") == result_key("search", np.array(vec), mode="exact", top_k=5)
+    assert result_key("search", vec, top_k=5) != result_key("search", vec, top_k=6)
+    assert result_key("search", vec, top_k=5) != result_key("qa", vec, top_k=5)
+    assert result_key("search", vec) != result_key("search", [0.1, 0.2, 0.4])
+
+
+def test_fetch_cached_hits_until_the_corpus_version_changes():
+    conn = FakeConnection(version=1)
+    fetch, calls = counting_fetch([{"speech_id": "a"}])
+    key = result_key("search", [0.1, 0.2], top_k=5)
+
+    assert asyncio.run(fetch_cached(conn, key, fetch)) == [{"speech_id": "a"}]
+    assert asyncio.run(fetch_cached(conn, key, fetch)) == [{"speech_id": "a"}]
+    assert len(calls) == 1
+
+    conn.version = 2
+    asyncio.run(fetch_cached(conn, key, fetch))
+    assert len(calls) == 2
+
+    # No key bypasses the cache and the watermark lookup
+    lookups = conn.lookups
+    asyncio.run(fetch_cached(conn, None, fetch))
+    assert len(calls) == 3 and conn.lookups == lookups
+
+
+def test_missing_watermark_disables_caching_until_retry(monkeypatch):
+    conn = FakeConnection(version=None)
+    fetch, calls = counting_fetch([{"speech_id": "a"}])
+    key = result_key("qa", [0.1, 0.2], top_k=5)
+
+    asyncio.run(fetch_cached(conn, key, fetch))
+    asyncio.run(fetch_cached(conn, key, fetch))
+    assert len(calls) == 2
+    assert conn.lookups == 1  # not looked up again within the retry interval
+    assert result_cache.get_result_cache_stats()["enabled"] is False
+
+    # Once the table exists, the next lookup after the interval re-enables caching
+    conn.version = 1
+    monkeypatch.setattr(result_cache.settings, "result_cache_retry_seconds", 0.0)
+    asyncio.run(fetch_cached(conn, key, fetch))
+    asyncio.run(fetch_cached(conn, key, fetch))
+    assert len(calls) == 3
+    assert result_cache.get_result_cache_stats()["enabled"] is True
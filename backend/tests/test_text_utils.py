@@ -1,4 +1,4 @@
-from text_utils import parse_speaker_raw
+from text_utils import parse_speaker_raw, text_quality
 
 
 def test_secretaria_name_role():
@@ -48,3 +48,15 @@ def test_parse_speaker_normalization_example():
     assert speaker_raw == raw
     assert speaker_normalized == "Josefina Rodríguez Zamora"
     assert role == "Secretaria De Turismo"
+
+
+def test_text_quality_flags_short_turns():
+    assert text_quality(None) == (0, 0, False)
+    assert text_quality("Gracias.") == (8, 1, False)
+
+    long_turn = " ".join(["palabra"] * 25)
+    char_len, word_count, meaningful = text_quality(long_turn)
+    assert (char_len, word_count, meaningful) == (len(long_turn), 25, True)
+
+    # Long enough in characters but too few words
+    assert text_quality("x" * 200)[2] is False
@@ -0,0 +1,27 @@
+import struct
+
+import numpy as np
+import pytest
+
+from vector_codec import decode_vector, encode_vector
+
+
+def test_encode_matches_pgvector_wire_format():
+    data = encode_vector([1.0, -0.5])
+    assert data == struct.pack(">HHff", 2, 0, 1.0, -0.5)
+
+
+def test_round_trip_returns_float32_array():
+    vec = np.random.default_rng(0).standard_normal(1536).astype(np.float32)
+    decoded = decode_vector(encode_vector(vec))
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, vec)
+
+
+def test_encode_accepts_text_literal():
+    assert encode_vector("[0.25,0.5]") == encode_vector(np.array([0.25, 0.5]))
+
+
+def test_encode_rejects_matrices():
+    with pytest.raises(ValueError):
+        encode_vector(np.zeros((2, 2)))
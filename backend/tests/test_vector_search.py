@@ -0,0 +1,95 @@
+import asyncio
+import os
+import re
+
+import asyncpg
+import numpy as np
+import pytest
+
+from vector_search import (
+    QueryParams,
+    ann_settings_sql,
+    decode_cursor,
+    encode_cursor,
+    keyset_iterative_scan,
+    keyset_sql,
+    result_order,
+)
+from backend.app.services.search_service import search_sql
+from backend.settings import settings
+from backend.utils.dbpool import init_connection
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def test_cursor_round_trip_and_fingerprint_mismatch():
+    cursor = encode_cursor(0.25, "doc-1_3_0", "abc")
+    assert decode_cursor(cursor, "abc") == (0.25, "doc-1_3_0")
+
+    with pytest.raises(ValueError, match="does not belong"):
+        decode_cursor(cursor, "other")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor("not-a-cursor", "abc")
+
+
+def test_keyset_page_scans_by_distance_and_breaks_ties_outside():
+    params = QueryParams()
+    query_vec = params.add([0.1, 0.2, 0.3])
+    distance = result_order("exact", query_vec)
+    condition = keyset_sql(params, query_vec, 0.25, "doc-1_3_0")
+    sql = " ".join(search_sql("exact", params, query_vec, [0.1, 0.2, 0.3], 5, 20, condition, "q").split())
+
+    # Rows at the cursor distance continue after its speech_id
+    assert condition == f"(({distance}) > $2 OR (({distance}) = $2 AND st.speech_id > $3))"
+    # The index-driven scan orders by the distance alone; ties are broken on its rows
+    assert re.search(rf"ORDER BY {re.escape(distance)} LIMIT \$4 \)", sql)
+    assert sql.endswith("ORDER BY p.distance, p.speech_id;")
+    assert params.values[-1] == 6
+
+
+def test_keyset_pages_use_strict_order(monkeypatch):
+    monkeypatch.setattr(settings, "hnsw_iterative_scan", "relaxed_order")
+    assert "hnsw.iterative_scan = strict_order" in ann_settings_sql(10, iterative_scan=keyset_iterative_scan())
+    assert "hnsw.iterative_scan = relaxed_order" in ann_settings_sql(10)
+
+    monkeypatch.setattr(settings, "hnsw_iterative_scan", "off")
+    assert "iterative_scan" not in ann_settings_sql(10, iterative_scan=keyset_iterative_scan())
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="needs PostgreSQL with pgvector (TEST_DATABASE_URL)")
+def test_exact_search_page_is_an_hnsw_index_scan():
+    async def explain():
+        conn = await asyncpg.connect(TEST_DATABASE_URL)
+        # Everything, temp tables included, is rolled back
+        transaction = conn.transaction()
+        await transaction.start()
+        try:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await init_connection(conn)
+            await conn.execute("""
+                CREATE TEMP TABLE speech_turns (
+                  speech_id text PRIMARY KEY, doc_id text, text text, speaker_normalized text,
+                  role text, is_meaningful boolean, embedding vector(3)
+                );
+                CREATE TEMP TABLE raw_transcripts_meta (doc_id text PRIMARY KEY, href text, title text);
+                CREATE INDEX ON speech_turns USING hnsw (embedding vector_cosine_ops) WHERE is_meaningful;
+                INSERT INTO speech_turns
+                SELECT 's' || i, 'd', 't', 'x', 'r', true, ARRAY[random(), random(), random()]::vector(3)
+                FROM generate_series(1, 500) i;
+                ANALYZE speech_turns;
+                SET LOCAL enable_seqscan = off;
+            """)
+            params = QueryParams()
+            embedding = np.array([0.1, 0.2, 0.3], dtype=np.float32)
+            query_vec = params.add(embedding)
+            condition = keyset_sql(params, query_vec, 0.01, "s1")
+            sql = search_sql("exact", params, query_vec, embedding, 5, 20, condition, "q")
+            rows = await conn.fetch("EXPLAIN " + sql.strip().rstrip(";"), *params.values)
+            return "\n".join(r[0] for r in rows)
+        finally:
+            await transaction.rollback()
+            await conn.close()
+
+    plan = asyncio.run(explain())
+    assert "Index Scan using speech_turns_embedding_idx" in plan
+    assert "Seq Scan on speech_turns" not in plan
@@ -0,0 +1,203 @@
+"""
+Batched, concurrent embedding engine for ingestion and re-embedding jobs.
+
+Inputs are packed into token-budgeted requests (many inputs per
+`embeddings.create` call) and a bounded number of requests are kept in
+flight at once. Rate limits (429) are retried honoring Retry-After, and the
+returned vectors are always in the same order as the inputs.
+"""
+import asyncio
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from openai import (
+    AsyncAzureOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Azure OpenAI accepts at most 2048 inputs per embeddings request
+MAX_INPUTS_PER_REQUEST = 2048
+
+
+def _estimate_tokens(text: str) -> int:
+    """Conservative token estimate used when no tokenizer is supplied."""
+    return len(text) // 2 + 1
+
+
+def pack_batches(
+    token_counts: List[int],
+    max_tokens_per_request: int,
+    max_inputs_per_request: int
+) -> List[List[int]]:
+    """
+    Groups input positions into consecutive batches under both budgets.
+
+    An input larger than the token budget is sent alone in its own batch.
+
+    Args:
+        token_counts: Token count of each input
+        max_tokens_per_request: Token budget per request
+        max_inputs_per_request: Maximum number of inputs per request
+
+    Returns:
+        List of batches, each a list of input positions
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+
+    for i, n_tokens in enumerate(token_counts):
+        if current and (
+            current_tokens + n_tokens > max_tokens_per_request
+            or len(current) >= max_inputs_per_request
+        ):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += n_tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the Retry-After delay (in seconds) from a rate limit error."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+class BatchEmbedder:
+    """
+    Embeds lists of texts with batched, bounded-concurrency requests.
+
+    Args:
+        model: Embedding deployment name
+        count_tokens: Function returning the token count of a text
+        max_tokens_per_request: Token budget per embeddings request
+        max_inputs_per_request: Maximum inputs per embeddings request
+        max_concurrency: Maximum number of requests in flight
+        max_retries: Retries per batch on 429, timeouts and 5xx errors
+        dimensions: Optional output dimensions (text-embedding-3 models only)
+    """
+
+    def __init__(
+        self,
+        model: str,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        max_tokens_per_request: int = 60000,
+        max_inputs_per_request: int = 256,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+        dimensions: Optional[int] = None
+    ):
+        self.model = model
+        self.count_tokens = count_tokens or _estimate_tokens
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_inputs_per_request = min(max_inputs_per_request, MAX_INPUTS_PER_REQUEST)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.dimensions = dimensions
+
+    def _create_client(self) -> AsyncAzureOpenAI:
+        # Retries are handled here so Retry-After and our own backoff apply
+        return AsyncAzureOpenAI(
+            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+            api_key=os.environ["AZURE_OPENAI_API_KEY"],
+            api_version=os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+            max_retries=0,
+            timeout=60.0,
+        )
+
+    async def _embed_batch(self, client, semaphore, texts: List[str]) -> List[List[float]]:
+        kwargs = {"model": self.model, "input": texts}
+        if self.dimensions:
+            kwargs["dimensions"] = self.dimensions
+
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                try:
+                    response = await client.embeddings.create(**kwargs)
+                    data = sorted(response.data, key=lambda d: d.index)
+                    return [d.embedding for d in data]
+                except (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError) as e:
+                    if attempt == self.max_retries:
+                        raise RuntimeError(
+                            f"Embedding batch of {len(texts)} inputs failed after "
+                            f"{self.max_retries + 1} attempts: {e}"
+                        ) from e
+                    delay = _retry_after_seconds(e) if isinstance(e, RateLimitError) else None
+                    if delay is None:
+                        delay = min(60.0, 2 ** attempt) + random.uniform(0, 1)
+                    logger.warning("Embedding batch retry", extra={
+                        "model": self.model,
+                        "attempt": attempt + 1,
+                        "max_retries": self.max_retries,
+                        "delay_seconds": round(delay, 1),
+                        "error": type(e).__name__
+                    })
+            # Sleep outside the semaphore so other batches can proceed
+            await asyncio.sleep(delay)
+
+    async def embed_async(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds `texts` and returns the vectors in input order.
+
+        Raises:
+            RuntimeError: If a batch keeps failing after all retries
+        """
+        if not texts:
+            return []
+
+        token_counts = [self.count_tokens(t) for t in texts]
+        batches = pack_batches(token_counts, self.max_tokens_per_request, self.max_inputs_per_request)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        client = self._create_client()
+        try:
+            results = await asyncio.gather(*[
+                self._embed_batch(client, semaphore, [texts[i] for i in batch])
+                for batch in batches
+            ])
+        finally:
+            await client.close()
+
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Synchronous entry point for scripts (runs its own event loop).
+
+        When the calling thread already runs a loop (e.g. inside Playwright's
+        sync API in the scrapers), the embedding loop runs on a worker thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.embed_async(texts))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(lambda: asyncio.run(self.embed_async(texts))).result()
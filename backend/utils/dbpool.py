@@ -8,6 +8,7 @@ from backend.settings import (
     postgres_port
 )
 from backend.utils.logger import setup_logger
+from backend.utils.vector_codec import decode_vector, encode_vector
 
 logger = setup_logger(__name__)
 
@@ -17,6 +18,29 @@ DATABASE_URL = f"postgresql://{postgres_user}:{postgres_password}@{postgres_host
 pool: Optional[asyncpg.Pool] = None
 
 
+async def init_connection(conn: asyncpg.Connection):
+    """
+    Per-connection setup (asyncpg `init` callback).
+
+    Registers a binary codec for pgvector's `vector` type: parameters are sent
+    as raw float4 values and columns decode into numpy.float32 arrays, with no
+    text formatting or float parsing in Python.
+    """
+    schema = await conn.fetchval(
+        "SELECT typnamespace::regnamespace::text FROM pg_type WHERE typname = 'vector'"
+    )
+    if schema is None:
+        logger.warning("pgvector extension not found; vector codec not registered")
+        return
+    await conn.set_type_codec(
+        "vector",
+        schema=schema,
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary"
+    )
+
+
 async def init_pool():
     """
     Initialize PostgreSQL connection pool.
@@ -37,6 +61,7 @@ async def init_pool():
             command_timeout=180,     # 3 min for complex queries (vectors)
             timeout=30,              # Timeout to get connection from pool
             max_queries=50000,       # Rotate connections every 50k queries
+            init=init_connection,    # Binary pgvector codec
         )
         logger.info("Database connection pool initialized successfully", extra={
             "min_size": 2,
@@ -0,0 +1,252 @@
+"""
+Two-tier cache for query and concept embeddings.
+
+Lookups go through an in-process LRU first and then through the
+`embedding_cache` table (see backend/db/embedding_cache.sql). Only when both
+miss is Azure OpenAI called. Keys are the normalized text (case, accents and
+whitespace folded) plus the embedding deployment name, so changing the
+deployment never returns vectors from another model.
+
+The deployment is the one the stored speech_turns vectors were embedded with
+(see `active_embedding_model`), not a fixed setting, so a re-embedding job
+switches queries to the new model when it promotes the new vectors.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.settings import azure_openai_embedding_deployment, settings
+from backend.utils.cache import LRUCache
+from backend.utils.dbpool import get_pool
+from backend.utils.embedding_client import embed_text_async, embed_texts_async
+from backend.utils.logger import setup_logger
+from backend.utils.text_utils import normalize_cache_text
+
+logger = setup_logger(__name__)
+
+memory_cache = LRUCache(maxsize=settings.embedding_cache_size)
+
+# Counters for the persistent tier (the LRU keeps its own)
+db_hits = 0
+db_misses = 0
+
+# (deployment, dimensions) of speech_turns.embedding and when it was read
+_active_model: Tuple[str, Optional[int]] = (azure_openai_embedding_deployment, None)
+_active_checked_at: Optional[float] = None
+
+
+async def active_embedding_model() -> Tuple[str, Optional[int]]:
+    """
+    Deployment and dimension of the vectors stored in speech_turns.embedding.
+
+    Read from the single-row `active_embedding_model` table
+    (backend/db/embedding_versions.sql), which the re-embedding job updates in
+    the same transaction as the column swap (backend/ingestion/reembed_main.py
+    promote), and re-read every EMBEDDING_MODEL_REFRESH_SECONDS. Without the
+    table, or when the lookup fails, the last known model is used (initially
+    AZURE_OPENAI_EMBEDDING_DEPLOYMENT).
+    """
+    global _active_model, _active_checked_at
+
+    now = time.monotonic()
+    if _active_checked_at is not None and now - _active_checked_at < settings.embedding_model_refresh_seconds:
+        return _active_model
+    _active_checked_at = now
+
+    try:
+        pool = await get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT model, dimensions FROM active_embedding_model")
+    except Exception as e:
+        logger.warning("Active embedding model lookup failed", extra={"error": str(e)})
+        return _active_model
+
+    if row is not None and (row["model"], row["dimensions"]) != _active_model:
+        _active_model = (row["model"], row["dimensions"])
+        logger.info("Active embedding model", extra={"deployment": _active_model[0], "dimensions": _active_model[1]})
+    return _active_model
+
+
+def fit_dimensions(embedding: List[float], dimensions: Optional[int]) -> List[float]:
+    """
+    Shorten an embedding to the stored dimension.
+
+    text-embedding-3 vectors are truncated and re-normalized, which is what
+    the `dimensions` request parameter does; caches keep the full vectors.
+
+    Raises:
+        RuntimeError: If the model returned fewer dimensions than stored
+    """
+    if not dimensions or len(embedding) == dimensions:
+        return embedding
+    if len(embedding) < dimensions:
+        raise RuntimeError(f"Model returned {len(embedding)}-d vectors, speech_turns holds {dimensions}-d")
+    head = np.asarray(embedding[:dimensions], dtype=np.float32)
+    norm = np.linalg.norm(head)
+    return (head / norm if norm > 0 else head).tolist()
+
+
+async def _fetch_persisted(text_key: str, deployment: str) -> Optional[List[float]]:
+    pool = await get_pool()
+    sql = """
+    SELECT embedding
+    FROM embedding_cache
+    WHERE text_key = $1 AND deployment = $2;
+    """
+    async with pool.acquire() as conn:
+        value = await conn.fetchval(sql, text_key, deployment)
+    return value.tolist() if value is not None else None
+
+
+async def _persist(text_key: str, deployment: str, embedding: List[float]):
+    pool = await get_pool()
+    sql = """
+    INSERT INTO embedding_cache (text_key, deployment, embedding)
+    VALUES ($1, $2, $3::vector)
+    ON CONFLICT (text_key, deployment) DO NOTHING;
+    """
+    async with pool.acquire() as conn:
+        await conn.execute(sql, text_key, deployment, embedding)
+
+
+async def embed_query(text: str) -> List[float]:
+    """
+    Returns the embedding for a query or concept, using the cache when possible.
+
+    Errors in the persistent tier are logged and never fail the request; the
+    embedding is computed through Azure OpenAI instead.
+
+    Args:
+        text: Query or concept text
+
+    Returns:
+        Embedding vector (list of floats)
+    """
+    global db_hits, db_misses
+
+    deployment, dimensions = await active_embedding_model()
+    text_key = normalize_cache_text(text)
+    key = (text_key, deployment)
+
+    cached = memory_cache.get(key)
+    if cached is not None:
+        return fit_dimensions(cached, dimensions)
+
+    if settings.embedding_cache_persistent:
+        try:
+            persisted = await _fetch_persisted(text_key, deployment)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed", extra={"error": str(e)})
+            persisted = None
+
+        if persisted is not None:
+            db_hits += 1
+            memory_cache.put(key, persisted)
+            return fit_dimensions(persisted, dimensions)
+        db_misses += 1
+
+    embedding = await embed_text_async(text, model=deployment)
+    memory_cache.put(key, embedding)
+
+    if settings.embedding_cache_persistent:
+        try:
+            await _persist(text_key, deployment, embedding)
+        except Exception as e:
+            logger.warning("Embedding cache write failed", extra={"error": str(e)})
+
+    return fit_dimensions(embedding, dimensions)
+
+
+async def _fetch_persisted_many(text_keys: List[str], deployment: str) -> Dict[str, List[float]]:
+    pool = await get_pool()
+    sql = """
+    SELECT text_key, embedding
+    FROM embedding_cache
+    WHERE deployment = $1 AND text_key = ANY($2::text[]);
+    """
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(sql, deployment, text_keys)
+    return {r["text_key"]: r["embedding"].tolist() for r in rows}
+
+
+async def _persist_many(text_keys: List[str], deployment: str, embeddings: List[List[float]]):
+    pool = await get_pool()
+    sql = """
+    INSERT INTO embedding_cache (text_key, deployment, embedding)
+    VALUES ($1, $2, $3::vector)
+    ON CONFLICT (text_key, deployment) DO NOTHING;
+    """
+    async with pool.acquire() as conn:
+        await conn.executemany(sql, [(k, deployment, e) for k, e in zip(text_keys, embeddings)])
+
+
+async def embed_queries(texts: List[str]) -> List[List[float]]:
+    """
+    Batch version of `embed_query`: embeddings of several queries, in order.
+
+    Each tier is queried once for all texts still missing (one LRU pass, one
+    SELECT, one Azure OpenAI request), and texts that normalize to the same
+    key are embedded once.
+
+    Args:
+        texts: Queries or concepts
+
+    Returns:
+        Embedding vectors, in the same order as `texts`
+    """
+    global db_hits, db_misses
+
+    deployment, dimensions = await active_embedding_model()
+    text_keys = [normalize_cache_text(t) for t in texts]
+
+    found: Dict[str, List[float]] = {}
+    for text_key in text_keys:
+        cached = memory_cache.get((text_key, deployment))
+        if cached is not None:
+            found[text_key] = cached
+
+    # Distinct missing keys, with the last original text of each
+    missing = {k: t for k, t in zip(text_keys, texts) if k not in found}
+
+    if missing and settings.embedding_cache_persistent:
+        try:
+            persisted = await _fetch_persisted_many(list(missing), deployment)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed", extra={"error": str(e)})
+            persisted = {}
+        db_hits += len(persisted)
+        db_misses += len(missing) - len(persisted)
+        for text_key, embedding in persisted.items():
+            memory_cache.put((text_key, deployment), embedding)
+            found[text_key] = embedding
+            del missing[text_key]
+
+    if missing:
+        keys = list(missing)
+        embeddings = await embed_texts_async([missing[k] for k in keys], model=deployment)
+        for text_key, embedding in zip(keys, embeddings):
+            memory_cache.put((text_key, deployment), embedding)
+            found[text_key] = embedding
+
+        if settings.embedding_cache_persistent:
+            try:
+                await _persist_many(keys, deployment, embeddings)
+            except Exception as e:
+                logger.warning("Embedding cache write failed", extra={"error": str(e)})
+
+    return [fit_dimensions(found[k], dimensions) for k in text_keys]
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters for both cache tiers."""
+    return {
+        "deployment": _active_model[0],
+        "dimensions": _active_model[1],
+        "memory": memory_cache.stats(),
+        "persistent": {
+            "enabled": settings.embedding_cache_persistent,
+            "hits": db_hits,
+            "misses": db_misses,
+        },
+    }
@@ -0,0 +1,127 @@
+"""
+Async embedding client for the API request path.
+
+A single AsyncAzureOpenAI client is shared by every request handled by the
+worker so the underlying HTTP connections are kept alive between calls and
+the event loop is never blocked while waiting for Azure OpenAI.
+"""
+from typing import TYPE_CHECKING, List, Optional
+
+from backend.settings import (
+    azure_openai_endpoint,
+    azure_openai_api_key,
+    azure_openai_api_version,
+    azure_openai_embedding_deployment,
+    settings
+)
+from backend.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from openai import AsyncAzureOpenAI
+
+logger = setup_logger(__name__)
+
+# Shared async client (one per worker process)
+client: Optional["AsyncAzureOpenAI"] = None
+
+
+def get_client() -> "AsyncAzureOpenAI":
+    """
+    Get the shared AsyncAzureOpenAI client, creating it on first use.
+
+    The openai package is imported here rather than at module level: it is
+    the largest import of the API and only the embedding path needs it.
+
+    Returns:
+        AsyncAzureOpenAI: Client with keep-alive connections
+    """
+    global client
+    if client is None:
+        from openai import AsyncAzureOpenAI
+
+        logger.info("Initializing async Azure OpenAI client")
+        client = AsyncAzureOpenAI(
+            azure_endpoint=azure_openai_endpoint,
+            api_key=azure_openai_api_key,
+            api_version=azure_openai_api_version,
+            timeout=settings.embedding_timeout_seconds,
+            max_retries=settings.embedding_max_retries,
+        )
+    return client
+
+
+async def close_client():
+    """
+    Close the shared client.
+
+    Must be called on application shutdown to release open connections.
+    """
+    global client
+    if client is not None:
+        await client.close()
+        client = None
+        logger.info("Async Azure OpenAI client closed")
+
+
+async def embed_texts_async(
+    texts: List[str],
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> List[List[float]]:
+    """
+    Generates embeddings for several texts in a single request.
+
+    Args:
+        texts: Texts to embed
+        timeout: Per-call timeout in seconds (defaults to EMBEDDING_TIMEOUT_SECONDS)
+        model: Embedding deployment (defaults to AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+
+    Returns:
+        List of vectors, in the same order as `texts`
+
+    Raises:
+        RuntimeError: If the embedding request fails or times out
+    """
+    model = model or azure_openai_embedding_deployment
+    try:
+        response = await get_client().embeddings.create(
+            model=model,
+            input=texts,
+            timeout=timeout or settings.embedding_timeout_seconds,
+        )
+    except Exception as e:
+        logger.error("Embedding request failed", extra={
+            "model": model,
+            "inputs": len(texts),
+            "error": str(e)
+        })
+        raise RuntimeError(
+            f"Failed to generate embedding with model {model}: {e}"
+        ) from e
+
+    # The API may return items out of order; sort by input index
+    data = sorted(response.data, key=lambda d: d.index)
+    return [d.embedding for d in data]
+
+
+async def embed_text_async(
+    text: str,
+    timeout: Optional[float] = None,
+    model: Optional[str] = None
+) -> List[float]:
+    """
+    Generates the embedding for a single text without blocking the event loop.
+
+    Args:
+        text: Text to embed
+        timeout: Per-call timeout in seconds (defaults to EMBEDDING_TIMEOUT_SECONDS)
+        model: Embedding deployment (defaults to AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+
+    Returns:
+        Embedding vector (list of floats)
+
+    Raises:
+        RuntimeError: If the embedding request fails or times out
+    """
+    vectors = await embed_texts_async([text], timeout=timeout, model=model)
+    return vectors[0]
@@ -0,0 +1,87 @@
+"""
+Content-addressed embedding store used by the ingestion pipeline.
+
+Vectors are keyed by a SHA-256 of the exact chunk text plus the embedding
+model, so identical turns across conferences (moderator intros, stage
+actions, stock closing phrases) are embedded only once.
+See backend/db/embedding_store.sql for the table definition.
+"""
+import hashlib
+import json
+
+
+def content_hash(text: str, model: str) -> str:
+    """Return the store key for `text` embedded with `model`."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def fetch_stored_embeddings(conn, hashes, model):
+    """
+    Look up stored vectors.
+
+    Args:
+        conn: psycopg2 connection
+        hashes (list): Content hashes to look up
+        model (str): Embedding model name
+
+    Returns:
+        dict: content_hash -> embedding (list of floats) for the hashes found
+    """
+    if not hashes:
+        return {}
+
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT content_hash, embedding::text
+            FROM embedding_store
+            WHERE model = %s AND content_hash = ANY(%s)
+        """, (model, list(hashes)))
+        return {h: json.loads(e) for h, e in cur.fetchall()}
+
+
+def save_embeddings(conn, items, model):
+    """
+    Store new vectors (existing keys are left untouched).
+
+    Args:
+        conn: psycopg2 connection (the caller commits)
+        items (dict): content_hash -> embedding
+        model (str): Embedding model name
+    """
+    if not items:
+        return
+
+    from psycopg2.extras import execute_values
+
+    rows = [
+        (h, model, '[' + ','.join(map(str, e)) + ']')
+        for h, e in items.items()
+    ]
+    with conn.cursor() as cur:
+        execute_values(cur, """
+            INSERT INTO embedding_store (content_hash, model, embedding)
+            VALUES %s
+            ON CONFLICT (content_hash, model) DO NOTHING
+        """, rows, template="(%s, %s, %s::vector)")
+
+
+class ReuseStats:
+    """Counts reused vs newly embedded chunks over an ingestion run."""
+
+    def __init__(self):
+        self.reused = 0
+        self.embedded = 0
+
+    @property
+    def total(self):
+        return self.reused + self.embedded
+
+    @property
+    def reuse_ratio(self):
+        return self.reused / self.total if self.total else 0.0
+
+    def summary(self):
+        return (
+            f"{self.reused}/{self.total} chunks reused from embedding store "
+            f"({self.reuse_ratio:.1%}), {self.embedded} embedded"
+        )
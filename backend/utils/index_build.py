@@ -0,0 +1,175 @@
+"""
+Online index builds on speech_turns, plain or partitioned by month.
+
+CREATE INDEX CONCURRENTLY is not supported on a partitioned table, so on the
+partitioned speech_turns (backend/db/partition_speech_turns.sql) an index is
+created ON ONLY the parent, where it stays invalid, then built CONCURRENTLY on
+every partition and attached. It becomes valid once the last partition index
+is attached, and partitions created later get their own copy automatically.
+
+`column_indexes` and `retarget` let a column swap (re-embedding promote)
+mirror every index of a column onto its replacement.
+
+Every function takes a psycopg2 cursor. Builds need an autocommit connection;
+drops and renames also run inside a transaction (see `drop_index`).
+"""
+
+import re
+
+PARENT = "public.speech_turns"
+PREFIX = "idx_speech_turns_"
+
+# Largest dimension pgvector's HNSW supports for each indexed type
+HNSW_MAX_DIMENSIONS = {"vector": 2000, "halfvec": 4000, "bit": 64000}
+
+
+def partitions(cur, table=PARENT):
+    """Partitions of `table` (empty if it is not partitioned)."""
+    cur.execute('''
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname
+    ''', (table,))
+    return [r[0] for r in cur.fetchall()]
+
+
+def partition_index_name(partition, name):
+    """Name of the partition index of `name` (idx_speech_turns_x -> speech_turns_p2025_01_x)."""
+    suffix = name[len(PREFIX):] if name.startswith(PREFIX) else name
+    return f"{partition}_{suffix}"
+
+
+def create_index(cur, name, using, table=PARENT, progress=print):
+    """
+    Build index `name` with definition `USING {using}` (CONCURRENTLY).
+
+    Args:
+        cur: Cursor of an autocommit connection
+        name: Index name
+        using: Access method, columns, options and predicate,
+            e.g. "hnsw (embedding vector_cosine_ops) WITH (m = 16)"
+        table: Indexed table
+        progress: Called with a line per partition
+
+    Returns:
+        The partitions that were indexed (empty for a plain table)
+    """
+    parts = partitions(cur, table)
+    if not parts:
+        cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING {using}")
+        return parts
+
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} USING {using}")
+    for i, partition in enumerate(parts, 1):
+        part_name = partition_index_name(partition, name)
+        progress(f"  [{i}/{len(parts)}] {partition}")
+        cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {part_name} ON public.{partition} USING {using}")
+        cur.execute(f"ALTER INDEX {name} ATTACH PARTITION {part_name}")
+    return parts
+
+
+def _is_partitioned_index(cur, name):
+    cur.execute("SELECT relkind = 'I' FROM pg_class WHERE oid = to_regclass(%s)", (name,))
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def drop_index(cur, name, concurrently=True):
+    """
+    Drop index `name` if it exists.
+
+    Indexes of a partitioned table (and any index, with concurrently=False,
+    e.g. inside a transaction) are dropped with a plain DROP INDEX.
+    """
+    concurrent = concurrently and not _is_partitioned_index(cur, name)
+    cur.execute(f"DROP INDEX {'CONCURRENTLY ' if concurrent else ''}IF EXISTS {name}")
+
+
+def rename_index(cur, name, new_name):
+    """Rename index `name` and, on a partitioned table, its partition indexes."""
+    cur.execute('''
+        SELECT child.relname, tbl.relname
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_index x ON x.indexrelid = child.oid
+        JOIN pg_class tbl ON tbl.oid = x.indrelid
+        WHERE i.inhparent = to_regclass(%s)
+    ''', (name,))
+    for child, partition in cur.fetchall():
+        cur.execute(f"ALTER INDEX {child} RENAME TO {partition_index_name(partition, new_name)}")
+    cur.execute(f"ALTER INDEX {name} RENAME TO {new_name}")
+
+
+
+def column_indexes(cur, columns, table=PARENT):
+    """
+    Indexes of `table` whose definition uses any of `columns`.
+
+    Returns:
+        List of (name, using) pairs, `using` being the definition after USING
+        (as accepted by `create_index`)
+    """
+    cur.execute('''
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+        ORDER BY c.relname
+    ''', (table,))
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, columns)) + r")\b")
+    indexes = []
+    for name, definition in cur.fetchall():
+        using = definition.split(" USING ", 1)[1]
+        if pattern.search(using):
+            indexes.append((name, using))
+    return indexes
+
+
+def retarget(using, columns, dimensions=None):
+    """
+    Rewrite an index definition onto other columns.
+
+    Args:
+        using: Definition after USING
+        columns: {old column: new column}
+        dimensions: New size for the halfvec(n) / bit(n) casts of the
+            quantized indexes (unchanged if None)
+    """
+    pattern = re.compile(r"\b(" + "|".join(map(re.escape, columns)) + r")\b")
+    using = pattern.sub(lambda m: columns[m.group(1)], using)
+    if dimensions:
+        using = re.sub(r"\b(halfvec|bit)\(\d+\)", rf"\g<1>({int(dimensions)})", using)
+    return using
+
+
+def index_valid(cur, name):
+    """Whether index `name` exists and is valid (all partitions attached)."""
+    cur.execute("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (name,))
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def hnsw_over_limit(indexes, dimensions):
+    """
+    HNSW indexes of `indexes` that cannot hold `dimensions`-d vectors.
+
+    The indexed type is read from the operator class (vector_*_ops,
+    halfvec_*_ops, bit_*_ops); e.g. a plain `vector` HNSW index stops at 2000.
+
+    Args:
+        indexes: (name, using) pairs from `column_indexes`
+        dimensions: Dimension of the indexed column
+
+    Returns:
+        List of (name, type, limit)
+    """
+    over = []
+    for name, using in indexes:
+        if not using.startswith("hnsw"):
+            continue
+        for kind in re.findall(r"\b(vector|halfvec|bit)_\w+_ops\b", using):
+            if dimensions > HNSW_MAX_DIMENSIONS[kind]:
+                over.append((name, kind, HNSW_MAX_DIMENSIONS[kind]))
+    return over
@@ -0,0 +1,218 @@
+"""
+Compressed IVF-PQ vector index in pure numpy (retrieval mode "ivfpq").
+
+- Coarse quantizer: k-means with `nlist` centroids; every vector is stored in
+  the inverted list of its nearest centroid.
+- Product quantizer: the residual (vector - centroid) is split into `m`
+  sub-vectors, each replaced by the id of its nearest of 256 sub-centroids,
+  so a 1536-d float32 vector (6 KB) is stored in `m` bytes.
+
+A search probes the `nprobe` lists closest to the query and scores their codes
+with asymmetric distance computation (ADC): one lookup table of query
+sub-vector to sub-centroid distances per list, summed over the `m` codes.
+The resulting shortlist is re-ranked with the exact vectors (fetched from
+PostgreSQL by speech_id, see vector_search.py).
+
+Vectors are L2-normalized, so the L2 ranking equals the cosine ranking. The
+index is trained and written offline (backend/db/train_ivfpq_index.py) as .npy
+files that workers open with mmap_mode="r", sharing the pages.
+"""
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+KSUB = 256  # sub-centroids per sub-quantizer (codes are uint8)
+ID_DTYPE = np.dtype("S64")
+ARRAYS = ("coarse", "codebooks", "offsets", "codes", "ids", "flags")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _sq_distances(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Squared L2 distances between rows of x and centroids, shape (len(x), len(centroids))."""
+    return (
+        (x * x).sum(axis=1)[:, None]
+        - 2 * x @ centroids.T
+        + (centroids * centroids).sum(axis=1)[None, :]
+    )
+
+
+def assign(x: np.ndarray, centroids: np.ndarray, block_rows: int = 16384) -> np.ndarray:
+    """Index of the nearest centroid of every row (computed in blocks)."""
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), block_rows):
+        out[start:start + block_rows] = _sq_distances(x[start:start + block_rows], centroids).argmin(axis=1)
+    return out
+
+
+def kmeans(x: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """
+    Lloyd's k-means.
+
+    Empty clusters are re-seeded with random training points.
+
+    Returns:
+        (k, dim) float32 centroids
+    """
+    if len(x) < k:
+        raise ValueError(f"Need at least {k} training vectors, got {len(x)}")
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign(x, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, x)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        centroids[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+    return centroids.astype(np.float32)
+
+
+class IVFPQIndex:
+    """
+    IVF-PQ index.
+
+    Args:
+        coarse: (nlist, dim) coarse centroids
+        codebooks: (m, 256, dim // m) sub-centroids of the residuals
+        offsets: (nlist + 1,) start of each inverted list in codes/ids
+        codes: (n, m) uint8 PQ codes, grouped by list
+        ids: (n,) speech_ids, same order as codes
+        flags: (n,) is_meaningful of each row
+    """
+
+    def __init__(self, coarse, codebooks, offsets, codes, ids, flags):
+        self.coarse = coarse
+        self.codebooks = codebooks
+        self.offsets = offsets
+        self.codes = codes
+        self.ids = ids
+        self.flags = flags
+
+    @property
+    def m(self) -> int:
+        return self.codebooks.shape[0]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def train(cls, sample: np.ndarray, nlist: int, m: int, iterations: int = 20, seed: int = 0) -> "IVFPQIndex":
+        """Train the coarse quantizer and PQ codebooks on a sample (no vectors added)."""
+        sample = _normalize(np.asarray(sample, dtype=np.float32))
+        dim = sample.shape[1]
+        if dim % m:
+            raise ValueError(f"Dimension {dim} is not divisible by m={m}")
+
+        coarse = kmeans(sample, nlist, iterations, seed)
+        residuals = sample - coarse[assign(sample, coarse)]
+        dsub = dim // m
+        codebooks = np.stack([
+            kmeans(residuals[:, j * dsub:(j + 1) * dsub], KSUB, iterations, seed + j + 1)
+            for j in range(m)
+        ])
+        return cls(
+            coarse, codebooks,
+            np.zeros(nlist + 1, dtype=np.int64),
+            np.empty((0, m), dtype=np.uint8),
+            np.empty(0, dtype=ID_DTYPE),
+            np.empty(0, dtype=np.uint8),
+        )
+
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (list of each vector, (n, m) PQ codes of its residual)."""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        lists = assign(vectors, self.coarse)
+        residuals = vectors - self.coarse[lists]
+        dsub = residuals.shape[1] // self.m
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = assign(residuals[:, j * dsub:(j + 1) * dsub], self.codebooks[j])
+        return lists, codes
+
+    def add(self, lists: np.ndarray, codes: np.ndarray, ids, flags):
+        """Add encoded rows (arrays are rebuilt grouped by list)."""
+        all_lists = np.concatenate([np.repeat(np.arange(len(self.coarse)), np.diff(self.offsets)), lists])
+        order = np.argsort(all_lists, kind="stable")
+        self.codes = np.concatenate([self.codes, codes])[order]
+        self.ids = np.concatenate([self.ids, np.asarray([i.encode("utf-8") for i in ids], dtype=ID_DTYPE)])[order]
+        self.flags = np.concatenate([self.flags, np.asarray(flags, dtype=np.uint8)])[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(all_lists, minlength=len(self.coarse)))])
+
+    def search(
+        self,
+        query,
+        shortlist: int,
+        nprobe: int = 16,
+        meaningful_only: bool = False
+    ) -> List[Tuple[str, float]]:
+        """
+        Approximate nearest neighbours by ADC over the `nprobe` closest lists.
+
+        Returns:
+            Up to `shortlist` (speech_id, approximate squared L2 distance), best first
+        """
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        coarse_dist = _sq_distances(q[None, :], self.coarse)[0]
+        probes = np.argsort(coarse_dist)[:nprobe]
+        dsub = q.shape[0] // self.m
+        cols = np.arange(self.m)
+
+        rows, dists = [], []
+        for lst in probes:
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            residual = (q - self.coarse[lst]).reshape(self.m, dsub)
+            # Lookup table: distance of each query sub-vector to every sub-centroid
+            table = ((self.codebooks - residual[:, None, :]) ** 2).sum(axis=2)
+            d = table[cols, self.codes[start:end]].sum(axis=1)
+            if meaningful_only:
+                d[self.flags[start:end] == 0] = np.inf
+            rows.append(np.arange(start, end))
+            dists.append(d)
+
+        if not rows:
+            return []
+        rows, dists = np.concatenate(rows), np.concatenate(dists)
+        if len(dists) > shortlist:
+            keep = np.argpartition(dists, shortlist)[:shortlist]
+            rows, dists = rows[keep], dists[keep]
+        order = np.argsort(dists)
+        return [
+            (self.ids[rows[i]].decode("utf-8"), float(dists[i]))
+            for i in order
+            if np.isfinite(dists[i])
+        ]
+
+    def save(self, path):
+        """Write the index as .npy files (written to temporary names, then swapped in)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            tmp = path / f"{name}.tmp.npy"
+            np.save(tmp, getattr(self, name))
+            os.replace(tmp, path / f"{name}.npy")
+        with open(path / "manifest.json", "w") as f:
+            json.dump({
+                "nlist": int(len(self.coarse)),
+                "m": int(self.m),
+                "dim": int(self.coarse.shape[1]),
+                "count": int(len(self.ids)),
+            }, f)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "IVFPQIndex":
+        """Open a saved index; with mmap the arrays are shared between processes."""
+        path = Path(path)
+        mode: Optional[str] = "r" if mmap else None
+        return cls(*(np.load(path / f"{name}.npy", mmap_mode=mode) for name in ARRAYS))
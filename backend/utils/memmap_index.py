@@ -0,0 +1,211 @@
+"""
+On-disk float32 vector index searched in process (retrieval mode "memmap").
+
+The index directory holds:
+
+- embeddings.f32   row-major float32 matrix, one L2-normalized row per chunk
+- ids.bin          fixed-width speech_id of each row (numpy 'S64')
+- meaningful.u8    speech_turns.is_meaningful of each row (0/1)
+- manifest.json    dimension, committed row count and generation
+
+Every uvicorn worker opens the files with np.memmap (read-only), so the pages
+live once in the OS page cache and are shared instead of copied per worker.
+Writers (backend/db/sync_vector_index.py) append rows first and publish them
+by atomically replacing the manifest; readers only look at the committed
+row count and reopen the maps when the manifest changes. Full rebuilds are
+written to a staging directory and swapped in with os.replace (new inodes),
+so maps that workers already have open stay valid.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+VECTORS = "embeddings.f32"
+IDS = "ids.bin"
+FLAGS = "meaningful.u8"
+ID_WIDTH = 64
+ID_DTYPE = np.dtype(f"S{ID_WIDTH}")
+
+
+def load_manifest(path) -> Optional[dict]:
+    """Return the manifest of the index at `path`, or None if there is none."""
+    try:
+        with open(Path(path) / MANIFEST) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(path: Path, manifest: dict):
+    tmp = path / f"{MANIFEST}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path / MANIFEST)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def append_rows(
+    path,
+    speech_ids: Sequence[str],
+    vectors: np.ndarray,
+    meaningful: Sequence[bool]
+) -> dict:
+    """
+    Append rows to the index and publish them.
+
+    Args:
+        path: Index directory (created if missing)
+        speech_ids: speech_id of each row
+        vectors: (n, dim) embeddings
+        meaningful: is_meaningful flag of each row
+
+    Returns:
+        The new manifest
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    ids = np.asarray([s.encode("utf-8") for s in speech_ids], dtype=ID_DTYPE)
+    flags = np.asarray(meaningful, dtype=np.uint8)
+    if not (len(ids) == len(vectors) == len(flags)):
+        raise ValueError("speech_ids, vectors and meaningful must have the same length")
+
+    manifest = load_manifest(path)
+    if manifest is None:
+        manifest = {"dim": int(vectors.shape[1]), "count": 0, "generation": 0}
+    elif vectors.shape[1] != manifest["dim"]:
+        raise ValueError(f"Index holds {manifest['dim']}-d vectors, got {vectors.shape[1]}-d")
+
+    count = manifest["count"]
+    for name, data in ((VECTORS, vectors), (IDS, ids), (FLAGS, flags)):
+        row_bytes = data.itemsize * (data.shape[1] if data.ndim > 1 else 1)
+        with open(path / name, "ab") as f:
+            # Drop rows written by an interrupted sync (never published)
+            f.truncate(count * row_bytes)
+            f.write(data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    manifest = {**manifest, "count": count + len(ids)}
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def replace_index(staging, path) -> dict:
+    """
+    Swap a fully built index from `staging` into `path`.
+
+    Data files are replaced first (new inodes, open maps are unaffected) and
+    the manifest last, with a new generation so workers reopen the files.
+    """
+    staging, path = Path(staging), Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    staged = load_manifest(staging)
+    if staged is None:
+        raise FileNotFoundError(f"No staged index at {staging}")
+    current = load_manifest(path)
+
+    for name in (VECTORS, IDS, FLAGS):
+        os.replace(staging / name, path / name)
+    manifest = {**staged, "generation": (current["generation"] if current else 0) + 1}
+    _write_manifest(path, manifest)
+    os.remove(staging / MANIFEST)
+    staging.rmdir()
+    return manifest
+
+
+def read_ids(path) -> List[str]:
+    """All committed speech_ids of the index (used by the sync job)."""
+    manifest = load_manifest(path)
+    if not manifest or not manifest["count"]:
+        return []
+    ids = np.fromfile(Path(path) / IDS, dtype=ID_DTYPE, count=manifest["count"])
+    return [i.decode("utf-8") for i in ids]
+
+
+class MemmapIndex:
+    """
+    Read side of the index: exact cosine top-k over memory-mapped rows.
+
+    Args:
+        path: Index directory
+        block_rows: Rows scored per matmul block (bounds temporary memory)
+    """
+
+    def __init__(self, path, block_rows: int = 65536):
+        self.path = Path(path)
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._vectors = None
+        self._ids = None
+        self._flags = None
+
+    def _refresh(self):
+        manifest = load_manifest(self.path)
+        if manifest is None:
+            raise FileNotFoundError(f"No vector index at {self.path}; run backend/db/sync_vector_index.py")
+        with self._lock:
+            if manifest == self._manifest:
+                return
+            count, dim = manifest["count"], manifest["dim"]
+            if count:
+                self._vectors = np.memmap(self.path / VECTORS, dtype=np.float32, mode="r", shape=(count, dim))
+                self._ids = np.memmap(self.path / IDS, dtype=ID_DTYPE, mode="r", shape=(count,))
+                self._flags = np.memmap(self.path / FLAGS, dtype=np.uint8, mode="r", shape=(count,))
+            else:
+                self._vectors = np.empty((0, dim), dtype=np.float32)
+                self._ids = np.empty(0, dtype=ID_DTYPE)
+                self._flags = np.empty(0, dtype=np.uint8)
+            self._manifest = manifest
+
+    def __len__(self):
+        self._refresh()
+        return len(self._ids)
+
+    def search(self, query, top_k: int, meaningful_only: bool = False) -> List[Tuple[str, float]]:
+        """
+        Exact top-k by cosine similarity.
+
+        Rows are scored block by block; each block keeps its best `top_k` with
+        argpartition, so only O(top_k) candidates are merged and sorted.
+
+        Returns:
+            List of (speech_id, similarity), best first
+        """
+        self._refresh()
+        vectors, ids, flags = self._vectors, self._ids, self._flags
+        q = _normalize(np.asarray(query, dtype=np.float32))
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(vectors), self.block_rows):
+            scores = vectors[start:start + self.block_rows] @ q
+            if meaningful_only:
+                scores[flags[start:start + self.block_rows] == 0] = -np.inf
+            k = min(top_k, len(scores))
+            top = np.argpartition(scores, -k)[-k:]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if len(best_scores) > top_k:
+                keep = np.argpartition(best_scores, -top_k)[-top_k:]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores)
+        return [
+            (ids[best_rows[i]].decode("utf-8"), float(best_scores[i]))
+            for i in order
+            if np.isfinite(best_scores[i])
+        ]
@@ -1,53 +1,70 @@
-import requests
-from bs4 import BeautifulSoup
+"""
+Scraping, chunking, embedding and loading helpers for the ingestion pipeline.
+
+Heavy dependencies (pandas, psycopg2, requests, BeautifulSoup, the OpenAI
+client, the tokenizer in backend.utils.tokenizer) and the environment
+configuration are loaded on first use, so importing a single helper stays cheap.
+"""
 import re
 import json
-import numpy as np
-import pandas as pd
-from datetime import datetime, date
 import random
 import time
-import psycopg2
-from psycopg2.extras import Json
-# Import normalized speaker helpers from shared module
-from backend.utils.text_utils import parse_speaker_raw
 import os
-from openai import AzureOpenAI
-import tiktoken
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Database settings from environment variables
-pg_host = os.environ["PGHOST"]
-pg_user = os.environ["PGUSER"]
-pg_password = os.environ["PGPASSWORD"]
-pg_db = os.environ["PGDATABASE"]
-pg_port = os.environ.get("PGPORT", "5432")
-# Embedding model settings from environment variables
-azure_openai_endpoint = os.environ["AZURE_OPENAI_ENDPOINT"]
-azure_openai_api_key = os.environ["AZURE_OPENAI_API_KEY"]
-azure_openai_api_version = os.environ.get("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-azure_openai_embedding_deployment = os.environ.get("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
-
-
-client = AzureOpenAI(
-    azure_endpoint=azure_openai_endpoint,
-    api_key=azure_openai_api_key,
-    api_version=azure_openai_api_version
-)
-
-# Use deployment/model name (defined in configuration cell)
-# AZURE_DEPLOYMENT must exist in execution environment (defined in previous cell)
-MODEL_FOR_ENCODING = globals().get("AZURE_DEPLOYMENT", "text-embedding-3-small")
-
-# Try to get encoding for deployed model; if it fails, fall back to cl100k_base
-try:
-    ENCODER = tiktoken.encoding_for_model(MODEL_FOR_ENCODING)
-except Exception:
-    ENCODER = tiktoken.get_encoding("cl100k_base")
-    
+from datetime import datetime, date
+# Import normalized speaker helpers from shared module
+from backend.utils.text_utils import parse_speaker_raw, text_quality
+from backend.utils.embedding_store import content_hash, fetch_stored_embeddings, save_embeddings
+from backend.utils.tokenizer import count_tokens, get_encoder
+
+_REQUIRED = object()
+_env_loaded = False
+_client = None
+
+
+def _env(name, default=_REQUIRED):
+    """Reads a setting from the environment, loading the .env file on first use."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+    if default is _REQUIRED:
+        return os.environ[name]
+    return os.environ.get(name, default)
+
+
+def _embedding_deployment():
+    return _env("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
+
+
+def _next_embedding_deployment():
+    """Target model of a running re-embedding job (dual-write, see backend/ingestion/reembed_main.py)."""
+    return _env("AZURE_OPENAI_NEXT_EMBEDDING_DEPLOYMENT", None)
+
+
+def _next_embedding_dimensions():
+    value = _env("NEXT_EMBEDDING_DIMENSIONS", None)
+    return int(value) if value else None
+
+
+def _shadow_dimensions():
+    """Dimension of the shadow vectors (speech_turns.embedding_short)."""
+    return int(_env("SHADOW_DIMENSIONS", "256"))
+
+
+def _get_client():
+    """Returns the synchronous Azure OpenAI client, created on first use."""
+    global _client
+    if _client is None:
+        from openai import AzureOpenAI
+        _client = AzureOpenAI(
+            azure_endpoint=_env("AZURE_OPENAI_ENDPOINT"),
+            api_key=_env("AZURE_OPENAI_API_KEY"),
+            api_version=_env("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
+        )
+    return _client
+
+
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/... Chrome/120...",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/... Safari/605...",
@@ -59,6 +76,8 @@ def robust_fetch(url, retries=6):
     Fetches a URL with retries and random User-Agent headers.
     Implements exponential backoff on read timeouts.
     """
+    import requests
+
     for attempt in range(retries):
         try:
             headers = { "User-Agent": random.choice(USER_AGENTS) }
@@ -82,6 +101,8 @@ def parse_article_page(url):
     Parses the article page at the given URL and extracts the title, subtitle, and content.
     Returns a dictionary with keys: 'url', 'title', 'subtitle', and 'content'.
     """
+    from bs4 import BeautifulSoup
+
     html = robust_fetch(url)
     soup = BeautifulSoup(html, "html.parser")
 
@@ -213,14 +234,12 @@ def reformat_transcript(lines, doc_id):
 
     return out
 
-def count_tokens(text: str) -> int:
-    return len(ENCODER.encode(text))
-
 def chunk_text(text, max_tokens=450, overlap=50):
     """Splits text into chunks using model encoder.
     Uses sliding window with `overlap` tokens overlapping between chunks.
     """
-    tokens = ENCODER.encode(text)
+    encoder = get_encoder()
+    tokens = encoder.encode(text)
     chunks = []
 
     if max_tokens <= 0:
@@ -229,7 +248,7 @@ def chunk_text(text, max_tokens=450, overlap=50):
     start = 0
     while start < len(tokens):
         chunk_tokens = tokens[start:start+max_tokens]
-        chunk_text = ENCODER.decode(chunk_tokens)
+        chunk_text = encoder.decode(chunk_tokens)
         chunks.append(chunk_text)
         # advance with overlap
         start += max_tokens - overlap
@@ -244,8 +263,8 @@ def embed_text(text: str): # Embedding
     Raises RuntimeError if embedding fails.
     """
     try:
-        response = client.embeddings.create(
-            model=azure_openai_embedding_deployment, 
+        response = _get_client().embeddings.create(
+            model=_embedding_deployment(),
             input=text
         )
         # For a single input, return the 1 vector
@@ -254,24 +273,24 @@ def embed_text(text: str): # Embedding
         error_msg = (
             f"❌ EMBEDDING ERROR\n"
             f"Failed to generate embedding for text.\n"
-            f"Model: {azure_openai_embedding_deployment}\n"
-            f"Endpoint: {azure_openai_endpoint}\n"
+            f"Model: {_embedding_deployment()}\n"
+            f"Endpoint: {_env('AZURE_OPENAI_ENDPOINT', None)}\n"
             f"Error: {str(e)}\n"
             f"Text preview: {text[:100]}..."
         )
         print(error_msg)
         raise RuntimeError(error_msg) from e
 
-def process_speech_turn(turn, max_tokens=450):
+def split_speech_turn(turn, max_tokens=450):
     """
-    Processes a speech turn:
-    - If small (<= max_tokens): generates embedding directly.
-    - If large (> max_tokens): splits it into chunks and generates embeddings for each chunk
+    Splits a speech turn into records ready to be embedded:
+    - If small (<= max_tokens): a single record with the whole text.
+    - If large (> max_tokens): one record per chunk.
     Args:
         turn (dict): Dictionary with speech turn.
         max_tokens (int): Maximum number of tokens per chunk.
     Returns:
-        list: List of dictionaries with embeddings and metadata.
+        list: List of dictionaries with metadata and `embedding` set to None.
     """
     text = turn["text"]
     token_count = count_tokens(text)
@@ -283,7 +302,6 @@ def process_speech_turn(turn, max_tokens=450):
 
     # If the intervention is small, only 1 chunk
     if token_count <= max_tokens:
-        embedding = embed_text(text)
         return [{
             "doc_id": turn.get("doc_id"),
             "sequence": turn.get("sequence"),
@@ -293,7 +311,7 @@ def process_speech_turn(turn, max_tokens=450):
             "speaker_normalized": s_norm,
             "role": s_role,
             "text": text,
-            "embedding": embedding,
+            "embedding": None,
             "token_count": token_count
         }]
 
@@ -302,8 +320,6 @@ def process_speech_turn(turn, max_tokens=450):
     results = []
 
     for idx, chunk in enumerate(chunks, start=1):
-        embedding = embed_text(chunk)
-
         results.append({
             "doc_id": turn.get("doc_id"),
             "sequence": turn.get("sequence"),
@@ -313,28 +329,138 @@ def process_speech_turn(turn, max_tokens=450):
             "speaker_normalized": s_norm,
             "role": s_role,
             "text": chunk,
-            "embedding": embedding,
+            "embedding": None,
             "token_count": count_tokens(chunk)
         })
 
     return results
 
-def embed_single_article(conference_data, max_tokens=450):
+def get_db_connection():
+    """Opens a psycopg2 connection to Azure PostgreSQL."""
+    import psycopg2
+
+    return psycopg2.connect(
+        host=_env("PGHOST"),
+        database=_env("PGDATABASE"),
+        user=_env("PGUSER"),
+        password=_env("PGPASSWORD"),
+        port=_env("PGPORT", "5432")
+    )
+
+def embed_records(records, reuse_stats=None, model=None, dimensions=None, field="embedding"):
+    """
+    Fills the `embedding` field of each record using the batch embedding engine
+    (many texts per request, a bounded number of requests in flight).
+
+    Vectors already present in the content-addressed embedding store (same exact
+    text and model) are reused instead of calling the API; new vectors are added
+    to the store. If the store is unreachable every text is embedded.
+    Args:
+        records (list): Dictionaries with a `text` field.
+        reuse_stats (ReuseStats|None): Optional counters updated with reused/embedded chunks.
+        model (str|None): Embedding deployment (defaults to AZURE_OPENAI_EMBEDDING_DEPLOYMENT).
+        dimensions (int|None): Requested output dimensions (text-embedding-3 models only).
+        field (str): Record field that receives the vector.
+    Returns:
+        list: The same records, with embeddings in place.
+    """
+    if not records:
+        return records
+
+    model = model or _embedding_deployment()
+    # Vectors of different sizes from the same model must not share store keys
+    store_model = f"{model}:{dimensions}" if dimensions else model
+    hashes = [content_hash(r["text"], store_model) for r in records]
+    # Unique texts in first-seen order (identical turns in one article are embedded once)
+    texts_by_hash = {}
+    for h, r in zip(hashes, records):
+        texts_by_hash.setdefault(h, r["text"])
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        vectors = fetch_stored_embeddings(conn, list(texts_by_hash), store_model)
+        # End the read transaction: the connection is not idle in a transaction while embedding
+        conn.rollback()
+    except Exception as e:
+        print(f"⚠️  Embedding store unavailable, embedding all chunks: {e}")
+        if conn is not None:
+            conn.close()
+            conn = None
+        vectors = {}
+
+    try:
+        missing = [h for h in texts_by_hash if h not in vectors]
+        if missing:
+            from backend.utils.batch_embedder import BatchEmbedder
+
+            embedder = BatchEmbedder(model=model, count_tokens=count_tokens, dimensions=dimensions)
+            new_vectors = dict(zip(missing, embedder.embed([texts_by_hash[h] for h in missing])))
+            vectors.update(new_vectors)
+
+            if conn is not None:
+                try:
+                    save_embeddings(conn, new_vectors, store_model)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    print(f"⚠️  Could not save embeddings to store: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+
+    for h, record in zip(hashes, records):
+        record[field] = vectors[h]
+
+    if reuse_stats is not None:
+        reuse_stats.embedded += len(missing)
+        reuse_stats.reused += len(records) - len(missing)
+
+    return records
+
+def process_speech_turn(turn, max_tokens=450):
+    """
+    Processes a speech turn:
+    - If small (<= max_tokens): generates embedding directly.
+    - If large (> max_tokens): splits it into chunks and generates embeddings for each chunk
+    Args:
+        turn (dict): Dictionary with speech turn.
+        max_tokens (int): Maximum number of tokens per chunk.
+    Returns:
+        list: List of dictionaries with embeddings and metadata.
+    """
+    return embed_records(split_speech_turn(turn, max_tokens))
+
+def embed_single_article(conference_data, max_tokens=450, reuse_stats=None):
     """
     Processes all speech turns in conference data.
+    All turns and chunks of the article are embedded together in batched requests.
+    While a model migration is running (AZURE_OPENAI_NEXT_EMBEDDING_DEPLOYMENT set),
+    each chunk is also embedded with the next model into `embedding_next`.
     Args:
         conference_data (list): List of dictionaries with speech turns.
         max_tokens (int): Maximum number of tokens per chunk.
+        reuse_stats (ReuseStats|None): Optional counters for embedding store reuse.
     Returns:
         list: List of dictionaries with embeddings and metadata for all turns.
     """
-    all_embeddings = []
+    all_records = []
 
     for turn in conference_data:
-        embeddings = process_speech_turn(turn, max_tokens)
-        all_embeddings.extend(embeddings)
+        all_records.extend(split_speech_turn(turn, max_tokens))
+
+    embed_records(all_records, reuse_stats=reuse_stats)
+
+    next_deployment = _next_embedding_deployment()
+    if next_deployment:
+        embed_records(
+            all_records,
+            model=next_deployment,
+            dimensions=_next_embedding_dimensions(),
+            field="embedding_next"
+        )
 
-    return all_embeddings
+    return all_records
 
 def _serialize_value(v):
     """Convert a single value into a JSON-serializable Python type.
@@ -342,6 +468,9 @@ def _serialize_value(v):
     Handles pandas.Timestamp, numpy scalar types, datetimes, dates, numpy arrays,
     lists, tuples and nested dicts.
     """
+    import numpy as np
+    import pandas as pd
+
     # Treat explicit missing values (pandas/Numpy) first
     try:
         # pandas NA / numpy nan / None
@@ -412,6 +541,8 @@ def df_to_records_serializable(df):
     return out
 
 def build_speech_id(row):
+    import pandas as pd
+
     doc = str(row["doc_id"])
     seq = str(row["sequence"])
 
@@ -453,20 +584,35 @@ def dedupe_records_by_field(records, field="speech_id"):
         out.append(r)
     return out
 
+def bump_corpus_version(conn):
+    """
+    Advance the corpus version watermark so API workers drop cached results
+    (see backend/utils/result_cache.py). A missing table is reported, not fatal.
+    """
+    import psycopg2
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE corpus_version SET version = version + 1, updated_at = now() RETURNING version")
+            row = cur.fetchone()
+        conn.commit()
+        print(f"Corpus version bumped to {row[0] if row else '?'}.")
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"⚠️  Could not bump corpus version (result caches keep old entries): {e}")
+
 def database_loading(raw_df, embedded_df):
+    from psycopg2.extras import Json
+
     # Connect to Azure PostgreSQL
-    conn = psycopg2.connect(
-        host=pg_host,
-        database=pg_db,
-        user=pg_user,
-        password=pg_password,
-        port=pg_port
-    )
+    conn = get_db_connection()
     cur = conn.cursor()
 
     # Payloads will be converted to JSON-serializable records with
     # the module-level helper `df_to_records_serializable`.
 
+    deployment = _embedding_deployment()
+    shadow_dims = _shadow_dimensions()
     raw_payload = df_to_records_serializable(raw_df)
     embedded_payload = df_to_records_serializable(embedded_df)
 
@@ -484,12 +630,41 @@ def database_loading(raw_df, embedded_df):
                 created_at = EXCLUDED.created_at
         """, (record['doc_id'], Json(raw_json_data), created_at))
 
-    # Insert speech_turns
+    # speech_turns.published_at (the partition key, NOT NULL) is copied from
+    # raw_transcripts_meta; turns of documents without a date are skipped
+    doc_ids = list({record['doc_id'] for record in embedded_payload})
+    cur.execute("""
+        SELECT doc_id, published_at
+        FROM raw_transcripts_meta
+        WHERE doc_id = ANY(%s) AND published_at IS NOT NULL
+    """, (doc_ids,))
+    published = dict(cur.fetchall())
+    undated = sorted(set(doc_ids) - set(published))
+    if undated:
+        skipped = sum(1 for record in embedded_payload if record['doc_id'] not in published)
+        print(f"⚠️  Skipping {skipped} speech turns of {len(undated)} documents without published_at: {', '.join(undated)}")
+        embedded_payload = [record for record in embedded_payload if record['doc_id'] in published]
+
+    # Create the month partitions of the documents being loaded
+    # (see backend/db/partition_speech_turns.sql)
+    cur.execute(
+        "SELECT speech_turns_ensure_partition(d) FROM unnest(%s::timestamptz[]) AS d",
+        (list(set(published.values())),)
+    )
+
+    # Insert speech_turns (embeddings stored unit-normalized for the <#> operator).
+    # speech_id is unique across partitions: a stored copy under another date
+    # is deleted first, so the upsert below never creates a second one.
     for record in embedded_payload:
+        published_at = published[record['doc_id']]
+        cur.execute(
+            "DELETE FROM speech_turns WHERE speech_id = %s AND published_at <> %s",
+            (record['speech_id'], published_at)
+        )
         cur.execute("""
-            INSERT INTO speech_turns (speech_id, doc_id, sequence, chunk_id, type, speaker_raw, speaker_normalized, role, text, embedding, token_count, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (speech_id) DO UPDATE SET
+            INSERT INTO speech_turns (speech_id, doc_id, published_at, sequence, chunk_id, type, speaker_raw, speaker_normalized, role, text, embedding, embedding_short, embedding_model, embedding_dim, token_count, char_len, word_count, is_meaningful, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, l2_normalize(%s::vector), l2_normalize(subvector(%s::vector, 1, %s))::vector(%s), %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (speech_id, published_at) DO UPDATE SET
                 doc_id = EXCLUDED.doc_id,
                 sequence = EXCLUDED.sequence,
                 chunk_id = EXCLUDED.chunk_id,
@@ -499,14 +674,35 @@ def database_loading(raw_df, embedded_df):
                 role = EXCLUDED.role,
                 text = EXCLUDED.text,
                 embedding = EXCLUDED.embedding,
+                embedding_short = EXCLUDED.embedding_short,
+                embedding_model = EXCLUDED.embedding_model,
+                embedding_dim = EXCLUDED.embedding_dim,
                 token_count = EXCLUDED.token_count,
+                char_len = EXCLUDED.char_len,
+                word_count = EXCLUDED.word_count,
+                is_meaningful = EXCLUDED.is_meaningful,
                 created_at = EXCLUDED.created_at
-        """, (record['speech_id'], record['doc_id'], record['sequence'], record['chunk_id'], record['type'], 
+        """, (record['speech_id'], record['doc_id'], published_at, record['sequence'], record['chunk_id'], record['type'], 
               record['speaker_raw'], record['speaker_normalized'], record['role'], record['text'], 
-              Json(record['embedding']), record['token_count'], record.get('created_at')))
-
-    # Commit and close
+              Json(record['embedding']), Json(record['embedding']), shadow_dims, shadow_dims,
+              deployment, len(record['embedding']),
+              record['token_count'], *text_quality(record['text']), record.get('created_at')))
+
+        # Dual-write while a re-embedding job is migrating to a new model
+        if record.get('embedding_next') is not None:
+            cur.execute("""
+                UPDATE speech_turns
+                SET embedding_next = l2_normalize(%s::vector),
+                    embedding_short_next = l2_normalize(subvector(%s::vector, 1, %s))::vector(%s),
+                    embedding_next_model = %s,
+                    embedding_next_dim = %s
+                WHERE speech_id = %s
+            """, (Json(record['embedding_next']), Json(record['embedding_next']), shadow_dims, shadow_dims,
+                  _next_embedding_deployment(), len(record['embedding_next']), record['speech_id']))
+
+    # Commit, then invalidate cached search results
     conn.commit()
     cur.close()
+    bump_corpus_version(conn)
     conn.close()
     print("Data loaded to Azure PostgreSQL successfully.")
\ No newline at end of file
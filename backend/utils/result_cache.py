@@ -0,0 +1,98 @@
+"""
+In-process cache of search and QA retrieval results.
+
+Results only change when ingestion adds or updates documents, so entries are
+keyed by the corpus version watermark (see backend/db/corpus_version.sql)
+plus the query vector hash and the query options. Ingestion bumps the
+watermark after its commit (postprocessing_helpers.database_loading); the
+next request reads the new version, misses, and old entries simply age out
+of the LRU. No TTL is involved.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+import numpy as np
+
+from backend.settings import settings
+from backend.utils.cache import LRUCache
+from backend.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+result_cache = LRUCache(maxsize=settings.result_cache_size)
+
+# When the corpus_version table was found missing; caching is then disabled
+# until the next lookup, RESULT_CACHE_RETRY_SECONDS later
+_watermark_missing_at: Optional[float] = None
+
+
+def _watermark_missing() -> bool:
+    return (
+        _watermark_missing_at is not None
+        and time.monotonic() - _watermark_missing_at < settings.result_cache_retry_seconds
+    )
+
+
+def vector_hash(embedding) -> str:
+    """Stable hash of a query vector (float32 bytes)."""
+    return hashlib.sha256(np.asarray(embedding, dtype=np.float32).tobytes()).hexdigest()
+
+
+def result_key(kind: str, embedding, **options) -> tuple:
+    """Cache key of a retrieval: kind ("search", "qa"), vector hash and options."""
+    return (kind, vector_hash(embedding), json.dumps(options, sort_keys=True, default=str))
+
+
+async def corpus_version(conn) -> Optional[int]:
+    """
+    Current corpus version, or None if the watermark table does not exist.
+
+    A missing table is looked up again every RESULT_CACHE_RETRY_SECONDS, so
+    caching starts once backend/db/corpus_version.sql has been applied.
+    """
+    global _watermark_missing_at
+    if _watermark_missing():
+        return None
+    try:
+        version = await conn.fetchval("SELECT version FROM corpus_version")
+    except asyncpg.UndefinedTableError:
+        if _watermark_missing_at is None:
+            logger.warning("corpus_version table not found; result cache disabled (see backend/db/corpus_version.sql)")
+        _watermark_missing_at = time.monotonic()
+        return None
+    if _watermark_missing_at is not None:
+        _watermark_missing_at = None
+        logger.info("corpus_version table found; result cache enabled")
+    return version
+
+
+async def fetch_cached(conn, key: Optional[tuple], fetch: Callable[[], Awaitable[list]]) -> List[dict]:
+    """
+    Return the rows of `key` at the current corpus version, running `fetch` on a miss.
+
+    Args:
+        conn: asyncpg connection (used for the watermark lookup)
+        key: Cache key from `result_key`, or None to bypass the cache
+        fetch: Coroutine function running the query
+
+    Returns:
+        Rows as dicts
+    """
+    version = await corpus_version(conn) if key is not None and settings.result_cache_size > 0 else None
+    if version is None:
+        return [dict(r) for r in await fetch()]
+
+    full_key = (version,) + key
+    rows = result_cache.get(full_key)
+    if rows is None:
+        rows = [dict(r) for r in await fetch()]
+        result_cache.put(full_key, rows)
+    return rows
+
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters of the result cache."""
+    return {**result_cache.stats(), "enabled": settings.result_cache_size > 0 and not _watermark_missing()}
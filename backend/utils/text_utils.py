@@ -1,4 +1,5 @@
 import re
+import unicodedata
 from typing import Tuple, Optional
 
 # Keywords typically found in role/position texts (Spanish). Used for heuristics.
@@ -218,6 +219,37 @@ def parse_speaker_raw(sraw: Optional[str]) -> Tuple[Optional[str], Optional[str]
     return original, name_normalized, role_normalized
 
 
+def normalize_cache_text(text: Optional[str]) -> str:
+    """Normalize free text for use as a cache key.
+
+    Lowercases, strips accents and collapses whitespace, so that
+    'Seguridad  Pública' and 'seguridad publica' map to the same key.
+    """
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text)
+    s = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(s.lower().split())
+
+
+# Minimum length thresholds for meaningful content (search results, analytics)
+MIN_TEXT_LENGTH = 150  # characters
+MIN_WORD_COUNT = 20    # words
+
+
+def text_quality(text: Optional[str]) -> Tuple[int, int, bool]:
+    """Return (char_len, word_count, is_meaningful) for a speech turn.
+
+    These values are stored on speech_turns at ingestion, so the
+    "meaningful" filter runs in SQL (and a partial index) instead of Python.
+    """
+    if not text:
+        return 0, 0, False
+    char_len = len(text.strip())
+    word_count = len(text.split())
+    return char_len, word_count, char_len >= MIN_TEXT_LENGTH and word_count >= MIN_WORD_COUNT
+
+
 if __name__ == "__main__":
     examples = [
         "SECRETARIA DE TURISMO, JOSEFINA RODRÍGUEZ ZAMORA",
@@ -0,0 +1,84 @@
+"""
+Shared tiktoken encoder for token counting and chunking.
+
+The BPE file is read from a local cache directory instead of being
+downloaded on first use, so ingestion works without network access:
+
+- TIKTOKEN_CACHE_DIR selects the directory (default: backend/resources/tiktoken).
+- `python -m backend.utils.tokenizer` (or `make tiktoken-cache`) fills it once
+  from a machine with network access. The repository only ships the empty
+  directory; the Docker image fills it at build time.
+
+tiktoken itself is imported and the encoder built on the first call to
+`get_encoder`, never at import time.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+# Encoding of the text-embedding-3 and text-embedding-ada-002 models
+ENCODING_NAME = "cl100k_base"
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "resources" / "tiktoken"
+
+_encoder = None
+_lock = threading.Lock()
+
+
+def cache_dir() -> str:
+    """Directory holding the cached encoding files."""
+    return os.environ.get("TIKTOKEN_CACHE_DIR") or str(DEFAULT_CACHE_DIR)
+
+
+@contextmanager
+def _tiktoken_cache_env():
+    """
+    Point tiktoken at `cache_dir()` while the encoding is loaded.
+
+    tiktoken only reads the directory from TIKTOKEN_CACHE_DIR, so it is set
+    for the duration of the load and the previous value restored after.
+    """
+    previous = os.environ.get("TIKTOKEN_CACHE_DIR")
+    os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir()
+    try:
+        yield
+    finally:
+        if previous is None:
+            del os.environ["TIKTOKEN_CACHE_DIR"]
+        else:
+            os.environ["TIKTOKEN_CACHE_DIR"] = previous
+
+
+def get_encoder():
+    """
+    Returns the shared encoder, creating it on first use.
+
+    Raises:
+        RuntimeError: If the encoding is not cached and cannot be downloaded
+    """
+    global _encoder
+    if _encoder is None:
+        with _lock:
+            if _encoder is None:
+                import tiktoken
+                try:
+                    with _tiktoken_cache_env():
+                        _encoder = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception as e:
+                    raise RuntimeError(
+                        f"Could not load the {ENCODING_NAME} encoding from {cache_dir()}. "
+                        f"Run `python -m backend.utils.tokenizer` with network access "
+                        f"to cache it: {e}"
+                    ) from e
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text`."""
+    return len(get_encoder().encode(text))
+
+
+if __name__ == "__main__":
+    # Download the encoding into the cache directory (run once, with network access)
+    encoder = get_encoder()
+    print(f"✅ {ENCODING_NAME} cached in {cache_dir()} ({encoder.n_vocab} tokens)")
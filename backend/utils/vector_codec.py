@@ -0,0 +1,41 @@
+"""
+Binary wire format of the pgvector `vector` type.
+
+Used by the asyncpg pool (see dbpool.py) so vectors travel as raw float4
+values instead of '[0.1,0.2,...]' text: query vectors are sent without string
+formatting and returned embeddings decode straight into numpy arrays.
+
+Format (vector_send / vector_recv): uint16 dimension, uint16 unused (0), then
+`dimension` big-endian float4 values.
+"""
+import json
+import struct
+
+import numpy as np
+
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+
+def encode_vector(value) -> bytes:
+    """
+    Encode a vector parameter.
+
+    Args:
+        value: numpy array, sequence of floats or a pgvector text literal
+
+    Returns:
+        Binary representation expected by vector_recv
+    """
+    if isinstance(value, str):
+        value = json.loads(value)
+    vec = np.asarray(value, dtype=_WIRE_DTYPE)
+    if vec.ndim != 1:
+        raise ValueError(f"Expected a 1-d vector, got shape {vec.shape}")
+    return _HEADER.pack(vec.shape[0], 0) + vec.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decode a vector column into a float32 numpy array."""
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size).astype(np.float32)
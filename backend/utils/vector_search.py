@@ -0,0 +1,558 @@
+"""
+Shared building blocks for vector retrieval SQL.
+
+Services compose their queries from these helpers so every endpoint supports
+the same retrieval modes:
+
+- exact:  ORDER BY the full-precision `embedding` column.
+- shadow: first-pass candidate search on `embedding_short` (a truncated,
+          re-normalized copy of `embedding`, see backend/db/shadow_embeddings.sql),
+          then exact re-rank of the candidates on the full vector.
+- halfvec: coarse search on the half-precision expression index,
+           then exact re-rank (see backend/db/quantized_indexes.sql).
+- binary: coarse Hamming search on the binary-quantized expression index,
+          then exact re-rank of a larger candidate set.
+- hybrid: (search and QA only) lexical full-text candidates and vector
+          candidates fused with reciprocal rank fusion in one query
+          (see backend/db/lexical_search.sql).
+- memmap: (search and QA only) exact top-k computed in process over the
+          shared memory-mapped index (see backend/utils/memmap_index.py);
+          PostgreSQL only returns the rows' metadata.
+- ivfpq:  (search and QA only) shortlist from the compressed in-process
+          IVF-PQ index (see backend/utils/ivfpq_index.py), re-ranked with the
+          exact vectors fetched by speech_id.
+
+Vector columns are compared with the cosine distance `<=>` by default. Once
+stored embeddings are unit-normalized (backend/db/normalize_embeddings.py) and
+the inner-product indexes exist (backend/db/inner_product_indexes.sql),
+VECTOR_DISTANCE=inner_product switches to the negative inner product `<#>`:
+the same ranking as cosine without the norm computations. Services build their
+distance, similarity and threshold SQL with `vector_distance`,
+`similarity_sql` and `max_distance`.
+
+Queries are written so the HNSW index drives them (ORDER BY distance LIMIT k,
+thresholds and metadata filters applied while the index is scanned) and run
+through `fetch_ann`, which sets the per-request HNSW search parameters.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Any, List, Literal, Optional, Tuple
+
+import numpy as np
+
+from backend.settings import settings
+
+RetrievalMode = Literal["exact", "shadow", "halfvec", "binary"]
+RETRIEVAL_MODES = ("exact", "shadow", "halfvec", "binary")
+
+# Modes that rank individual passages for a text query (search, QA)
+SearchMode = Literal["exact", "shadow", "halfvec", "binary", "hybrid", "memmap", "ivfpq"]
+SEARCH_MODES = RETRIEVAL_MODES + ("hybrid", "memmap", "ivfpq")
+
+# Modes whose candidates come from an index searched in process
+IN_PROCESS_MODES = ("memmap", "ivfpq")
+
+# Modes ranked by exact distance over the whole index, which keyset cursors can resume
+CURSOR_MODES = RETRIEVAL_MODES
+
+# pgvector operator of each VECTOR_DISTANCE setting
+DISTANCE_OPERATORS = {"inner_product": "<#>", "cosine": "<=>"}
+
+# speech_turns.type values accepted as a search filter
+TurnType = Literal["speech_turn", "moderator_intro", "stage_action"]
+
+# Text search configuration of speech_turns.text_tsv
+TEXT_SEARCH_CONFIG = "spanish"
+ITERATIVE_SCAN_MODES = ("off", "strict_order", "relaxed_order")
+
+# Upper bound of hnsw.ef_search accepted by pgvector
+MAX_EF_SEARCH = 1000
+
+# In-process indexes of this worker (opened on first use)
+_memmap_index = None
+_ivfpq_index = None
+
+
+class QueryParams:
+    """
+    Collects positional query parameters for asyncpg.
+
+    `add` returns the placeholder ($1, $2, ...) to interpolate in the SQL.
+    """
+
+    def __init__(self):
+        self.values: List[Any] = []
+
+    def add(self, value: Any) -> str:
+        self.values.append(value)
+        return f"${len(self.values)}"
+
+
+def as_vector(embedding) -> np.ndarray:
+    """
+    Query vector parameter (sent with the pool's binary `vector` codec).
+
+    With VECTOR_DISTANCE=inner_product the vector is L2-normalized like the
+    stored rows, so `-(embedding <#> q)` is the cosine similarity and
+    similarity thresholds (max_distance) hold.
+    """
+    vec = np.asarray(embedding, dtype=np.float32)
+    if settings.vector_distance == "inner_product":
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+    return vec
+
+
+def distance_operator() -> str:
+    """pgvector distance operator for the configured VECTOR_DISTANCE."""
+    try:
+        return DISTANCE_OPERATORS[settings.vector_distance]
+    except KeyError:
+        raise ValueError(
+            f"Unknown vector_distance '{settings.vector_distance}'. Expected one of {tuple(DISTANCE_OPERATORS)}"
+        )
+
+
+def vector_distance(column: str, query: str) -> str:
+    """SQL distance between a vector column/expression and a query vector."""
+    return f"{column} {distance_operator()} {query}"
+
+
+def similarity_sql(distance: str) -> str:
+    """
+    Cosine similarity from a distance expression.
+
+    `<#>` returns the negative inner product, which for unit vectors is minus
+    the cosine similarity; `<=>` returns 1 - cosine similarity.
+    """
+    if settings.vector_distance == "inner_product":
+        return f"-({distance})"
+    return f"1 - ({distance})"
+
+
+def max_distance(similarity_threshold: float) -> float:
+    """Distance bound equivalent to `similarity > similarity_threshold`."""
+    if settings.vector_distance == "inner_product":
+        return -similarity_threshold
+    return 1 - similarity_threshold
+
+
+def shadow_vector(embedding, dimensions: Optional[int] = None) -> np.ndarray:
+    """
+    Truncate a text-embedding-3 vector and re-normalize it to unit length.
+
+    This matches what the API returns for the `dimensions` parameter, so shadow
+    vectors can be derived from stored embeddings without new API calls.
+    """
+    dims = dimensions or settings.shadow_dimensions
+    vec = np.asarray(embedding, dtype=np.float32)[:dims]
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec = vec / norm
+    return vec
+
+
+def resolve_mode(mode: Optional[str], allowed: tuple = RETRIEVAL_MODES) -> str:
+    """Return the requested retrieval mode or the configured default."""
+    mode = mode or settings.retrieval_mode
+    if mode not in allowed:
+        raise ValueError(f"Unknown retrieval mode '{mode}'. Expected one of {allowed}")
+    return mode
+
+
+def filter_mode(mode: str, filtered: bool) -> str:
+    """
+    Retrieval mode to use for a query with metadata filters.
+
+    The in-process indexes only know is_meaningful, so filtering their hits
+    would be post-filtering; filtered queries fall back to the exact HNSW scan.
+    """
+    return "exact" if filtered and mode in IN_PROCESS_MODES else mode
+
+
+def filter_sql(
+    params: QueryParams,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    speaker: Optional[str] = None,
+    role: Optional[str] = None,
+    turn_type: Optional[str] = None
+) -> str:
+    """
+    WHERE condition of the optional search filters.
+
+    It goes into the candidate CTE and the outer query, so the ANN scan itself
+    skips non-matching rows (iterative scans keep it going until enough rows
+    pass) instead of filtering a fixed top-k afterwards. Dates compare the
+    denormalized st.published_at, so month partitions outside the range are
+    pruned (backend/db/partition_speech_turns.sql); the other columns are
+    indexed in backend/db/search_filters.sql.
+
+    Args:
+        params: Query parameters (placeholders are appended)
+        start_date: First publication date (inclusive)
+        end_date: Last publication date (inclusive)
+        speaker: speech_turns.speaker_normalized
+        role: speech_turns.role
+        turn_type: speech_turns.type
+
+    Returns:
+        SQL condition; "TRUE" without filters
+    """
+    conditions = []
+    if start_date:
+        conditions.append(f"st.published_at >= {params.add(datetime.combine(start_date, time.min))}")
+    if end_date:
+        end = datetime.combine(end_date + timedelta(days=1), time.min)
+        conditions.append(f"st.published_at < {params.add(end)}")
+    if speaker:
+        conditions.append(f"st.speaker_normalized = {params.add(speaker)}")
+    if role:
+        conditions.append(f"st.role = {params.add(role)}")
+    if turn_type:
+        conditions.append(f"st.type = {params.add(turn_type)}")
+    return " AND ".join(conditions) or "TRUE"
+
+
+def candidate_limit(top_k: int, mode: str = "shadow") -> int:
+    """Number of first-pass candidates to re-rank for `top_k` results."""
+    factor = settings.binary_rerank_factor if mode == "binary" else settings.rerank_factor
+    return max(top_k * factor, settings.rerank_min_candidates)
+
+
+def coarse_distance(mode: str, params: QueryParams, query_vec: str, embedding) -> str:
+    """
+    SQL distance expression used for the first pass of an approximate mode.
+
+    Each expression matches the definition of its index exactly, otherwise
+    PostgreSQL cannot use the index. The casts use the dimension of the query
+    vector, which is the stored one (see embedding_cache.active_embedding_model).
+    """
+    dims = len(embedding)
+    if mode == "shadow":
+        short = params.add(shadow_vector(embedding))
+        return vector_distance("st.embedding_short", f"{short}::vector")
+    if mode == "halfvec":
+        return vector_distance(f"(st.embedding::halfvec({dims}))", f"({query_vec}::vector)::halfvec({dims})")
+    if mode == "binary":
+        return f"(binary_quantize(st.embedding)::bit({dims})) <~> binary_quantize({query_vec}::vector)"
+    raise ValueError(f"Retrieval mode '{mode}' has no coarse distance")
+
+
+def hybrid_cte(
+    params: QueryParams,
+    query_vec: str,
+    query_text: str,
+    limit: int,
+    joins: str = "",
+    where: str = "TRUE"
+) -> str:
+    """
+    Lexical + vector candidates fused with reciprocal rank fusion.
+
+    Each leg returns its best `limit` rows; a row scores
+    sum(1 / (RRF_K + rank)) over the legs it appears in. The result is a
+    `candidates` CTE with (speech_id, score), in one round trip.
+    """
+    text = params.add(query_text)
+    rrf_k = params.add(settings.rrf_k)
+    limit = params.add(limit)
+    tsquery = f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', {text})"
+    distance = vector_distance("st.embedding", f"{query_vec}::vector")
+
+    return f"""
+    WITH vector_hits AS (
+      SELECT speech_id, row_number() OVER (ORDER BY distance) AS rank
+      FROM (
+        SELECT st.speech_id, {distance} AS distance
+        FROM speech_turns st
+        {joins}
+        WHERE {where}
+        ORDER BY {distance}
+        LIMIT {limit}
+      ) v
+    ),
+    lexical_hits AS (
+      SELECT speech_id, row_number() OVER (ORDER BY score DESC) AS rank
+      FROM (
+        SELECT st.speech_id, ts_rank_cd(st.text_tsv, {tsquery}) AS score
+        FROM speech_turns st
+        {joins}
+        WHERE {where}
+          AND st.text_tsv @@ {tsquery}
+        ORDER BY score DESC
+        LIMIT {limit}
+      ) l
+    ),
+    candidates AS (
+      SELECT speech_id, SUM(1.0 / ({rrf_k} + rank)) AS score
+      FROM (
+        SELECT speech_id, rank FROM vector_hits
+        UNION ALL
+        SELECT speech_id, rank FROM lexical_hits
+      ) hits
+      GROUP BY speech_id
+    )"""
+
+
+def get_memmap_index():
+    """Return this worker's memory-mapped index, opening it on first use."""
+    global _memmap_index
+    if _memmap_index is None:
+        from backend.utils.memmap_index import MemmapIndex
+        _memmap_index = MemmapIndex(settings.memmap_index_dir, block_rows=settings.memmap_block_rows)
+    return _memmap_index
+
+
+def get_ivfpq_index():
+    """Return this worker's IVF-PQ index, opening it (memory-mapped) on first use."""
+    global _ivfpq_index
+    if _ivfpq_index is None:
+        from backend.utils.ivfpq_index import IVFPQIndex
+        _ivfpq_index = IVFPQIndex.load(settings.ivfpq_index_dir)
+    return _ivfpq_index
+
+
+async def in_process_hits(
+    mode: str,
+    embedding,
+    top_k: int,
+    meaningful_only: bool = False
+) -> Optional[List[Tuple[str, float]]]:
+    """
+    Candidates from the in-process index of `mode` (None for SQL-only modes).
+
+    - memmap: exact top-k (speech_id, similarity)
+    - ivfpq:  shortlist of candidate_limit(top_k) (speech_id, ADC distance)
+
+    The numpy work runs in a thread (it releases the GIL) so the event loop
+    keeps serving other requests.
+    """
+    if mode == "memmap":
+        return await asyncio.to_thread(get_memmap_index().search, embedding, top_k, meaningful_only)
+    if mode == "ivfpq":
+        return await asyncio.to_thread(
+            get_ivfpq_index().search, embedding, candidate_limit(top_k, mode),
+            settings.ivfpq_nprobe, meaningful_only
+        )
+    return None
+
+
+def hits_cte(params: QueryParams, hits: List[Tuple[str, float]]) -> str:
+    """`candidates` CTE (speech_id, score) from in-process search hits."""
+    ids = params.add([speech_id for speech_id, _ in hits])
+    scores = params.add([score for _, score in hits])
+    return f"""
+    WITH candidates AS (
+      SELECT * FROM unnest({ids}::text[], {scores}::float8[]) AS c(speech_id, score)
+    )"""
+
+
+def candidate_cte(
+    mode: str,
+    params: QueryParams,
+    query_vec: str,
+    embedding,
+    limit: int,
+    joins: str = "",
+    where: str = "TRUE",
+    query_text: Optional[str] = None,
+    hits: Optional[List[Tuple[str, float]]] = None
+) -> str:
+    """
+    Build the first-pass candidate CTE for approximate and hybrid modes.
+
+    Args:
+        mode: Retrieval mode
+        params: Query parameters (placeholders are appended)
+        query_vec: Placeholder of the full-precision query vector
+        embedding: Full-precision query embedding
+        limit: Number of candidates
+        joins: Extra JOIN clauses (speech_turns is aliased `st`)
+        where: Filter applied to candidates (same as the outer query)
+        query_text: Query text (hybrid mode)
+        hits: (speech_id, score) pairs from `in_process_hits` (memmap, ivfpq)
+
+    Returns:
+        'WITH candidates AS (...)' or '' in exact mode
+    """
+    if mode == "exact":
+        return ""
+    if mode == "hybrid":
+        if not query_text:
+            raise ValueError("Hybrid retrieval requires the query text")
+        return hybrid_cte(params, query_vec, query_text, limit, joins, where)
+    if mode in IN_PROCESS_MODES:
+        if hits is None:
+            raise ValueError(f"Retrieval mode '{mode}' requires the in-process search hits")
+        return hits_cte(params, hits)
+
+    distance = coarse_distance(mode, params, query_vec, embedding)
+
+    return f"""
+    WITH candidates AS (
+      SELECT st.speech_id
+      FROM speech_turns st
+      {joins}
+      WHERE {where}
+      ORDER BY {distance}
+      LIMIT {params.add(limit)}
+    )"""
+
+
+def candidate_filter(mode: str) -> str:
+    """SQL condition restricting the outer query to first-pass candidates."""
+    if mode in ("exact", "hybrid") + IN_PROCESS_MODES:
+        return "TRUE"
+    return "st.speech_id IN (SELECT speech_id FROM candidates)"
+
+
+def candidate_join(mode: str) -> str:
+    """JOIN of candidates that carry a score (hybrid and in-process modes)."""
+    if mode in ("hybrid",) + IN_PROCESS_MODES:
+        return "JOIN candidates c ON c.speech_id = st.speech_id"
+    return ""
+
+
+def result_order(mode: str, query_vec: str) -> str:
+    """
+    ORDER BY expression of the final results.
+
+    Fused (hybrid) and exact in-process (memmap) scores are final; everything
+    else, including the IVF-PQ shortlist, is ranked by the exact distance.
+    The distance is the only sort key, so an HNSW index can drive the scan
+    (keyset pages break ties outside the scan, see `keyset_page_sql`).
+    """
+    if mode in ("hybrid", "memmap"):
+        return "c.score DESC"
+    return vector_distance("st.embedding", f"{query_vec}::vector")
+
+
+def query_fingerprint(*parts) -> str:
+    """Short hash of a query (text, filters, mode) that a cursor is bound to."""
+    data = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(distance: float, speech_id: str, fingerprint: str) -> str:
+    """Opaque keyset cursor: position (distance, speech_id) of the last result."""
+    data = json.dumps({"d": distance, "id": speech_id, "q": fingerprint})
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Tuple[float, str]:
+    """
+    Return (distance, speech_id) of a cursor.
+
+    Raises:
+        ValueError: if the cursor is malformed or belongs to another query
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        distance, speech_id, owner = float(data["d"]), str(data["id"]), data["q"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if owner != fingerprint:
+        raise ValueError("Cursor does not belong to this query")
+    return distance, speech_id
+
+
+def keyset_sql(params: QueryParams, query_vec: str, distance: float, speech_id: str) -> str:
+    """
+    Condition selecting the rows after a cursor position.
+
+    The condition goes into the candidate CTE and the outer query, so the
+    index scan continues from the cursor (iterative scans skip the rows of
+    earlier pages) and only the new page is joined to its metadata. Rows at
+    exactly the cursor distance are told apart by speech_id.
+    """
+    d, sid = params.add(distance), params.add(speech_id)
+    distance_sql = f"({vector_distance('st.embedding', f'{query_vec}::vector')})"
+    return f"({distance_sql} > {d} OR ({distance_sql} = {d} AND st.speech_id > {sid}))"
+
+
+def keyset_page_sql(cte: str, page: str, select: str, joins: str = "") -> str:
+    """
+    Query of one keyset page.
+
+    An HNSW index only serves an ORDER BY on the distance expression alone,
+    so the index-driven `page` query (ordered by distance, LIMIT top_k + 1)
+    runs as a MATERIALIZED CTE and only its rows are re-sorted by
+    (distance, speech_id), the order `keyset_sql` resumes in.
+
+    Args:
+        cte: Candidate CTE ('WITH candidates AS (...)' or '')
+        page: Page query, selecting speech_id and `distance`
+        select: Output columns, the page rows being aliased `p`
+        joins: JOIN clauses for the output columns
+    """
+    prefix = f"{cte}," if cte else "WITH"
+    return f"""
+    {prefix} page AS MATERIALIZED ({page}
+    )
+    SELECT {select}
+    FROM page p
+    {joins}
+    ORDER BY p.distance, p.speech_id"""
+
+
+def keyset_iterative_scan() -> str:
+    """
+    Iterative scan mode of keyset-paginated queries.
+
+    relaxed_order can return rows slightly out of distance order, which
+    would make consecutive pages skip or repeat rows at their boundary.
+    """
+    return "off" if settings.hnsw_iterative_scan == "off" else "strict_order"
+
+
+def ann_settings_sql(limit: int, ef_search: Optional[int] = None, iterative_scan: Optional[str] = None) -> str:
+    """
+    SET LOCAL statements for an index-driven query returning `limit` rows.
+
+    ef_search is raised to the LIMIT (up to pgvector's maximum) so a plain
+    HNSW scan can return enough rows; with iterative scans (pgvector >= 0.8)
+    the index keeps scanning while filters (dates, thresholds) reject rows.
+    `iterative_scan` overrides settings.hnsw_iterative_scan.
+    """
+    ef = min(max(ef_search or settings.hnsw_ef_search, limit), MAX_EF_SEARCH)
+    statements = [f"SET LOCAL hnsw.ef_search = {int(ef)}"]
+
+    iterative = iterative_scan or settings.hnsw_iterative_scan
+    if iterative not in ITERATIVE_SCAN_MODES:
+        raise ValueError(f"Unknown hnsw_iterative_scan '{iterative}'. Expected one of {ITERATIVE_SCAN_MODES}")
+    if iterative != "off":
+        statements.append(f"SET LOCAL hnsw.iterative_scan = {iterative}")
+        statements.append(f"SET LOCAL hnsw.max_scan_tuples = {int(settings.hnsw_max_scan_tuples)}")
+    return "; ".join(statements)
+
+
+async def fetch_ann(
+    conn,
+    sql: str,
+    params: QueryParams,
+    limit: int,
+    ef_search: Optional[int] = None,
+    iterative_scan: Optional[str] = None
+):
+    """
+    Run a vector query with per-request HNSW settings.
+
+    The settings are applied with SET LOCAL inside a transaction, so they never
+    leak to other requests sharing the pooled connection.
+
+    Args:
+        conn: asyncpg connection
+        sql: Query
+        params: Query parameters
+        limit: Number of rows the query asks the index for
+        ef_search: Optional override of settings.hnsw_ef_search
+        iterative_scan: Optional override of settings.hnsw_iterative_scan
+    """
+    async with conn.transaction():
+        await conn.execute(ann_settings_sql(limit, ef_search, iterative_scan))
+        return await conn.fetch(sql, *params.values)
@@ -0,0 +1,85 @@
+"""
+Microbenchmark of period grouping + centroids (narrative_evolution) against
+the previous per-row implementation (Python lists per period, np.mean each).
+
+Rows are synthetic: 1536-d float32 embeddings spread over 24 monthly periods,
+either as numpy arrays (binary codec) or as text literals (--text).
+
+Usage:
+    python -m dev.scripts.benchmark_period_grouping [--rows 10000 100000] [--repeat 3] [--text]
+"""
+import argparse
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from backend.analytics.narrative_evolution import compute_centroids, group_embeddings_by_period
+
+DIM = 1536
+PERIODS = [datetime(2024 + m // 12, m % 12 + 1, 1) for m in range(24)]
+
+
+def legacy_centroids(rows, granularity):
+    """Previous implementation: one array per row, lists per period, np.mean of each list."""
+    embeddings_by_period = defaultdict(list)
+    counts_by_period = defaultdict(int)
+    for row in rows:
+        key = row["period"].strftime("%Y-%m" if granularity == "month" else "%Y-%m-%d")
+        data = row["embedding"]
+        if isinstance(data, str):
+            embedding = np.fromstring(data.strip('[]'), sep=',', dtype=np.float32)
+        else:
+            embedding = np.asarray(data)
+        embeddings_by_period[key].append(embedding)
+        counts_by_period[key] += 1
+    centroids = {p: np.mean(v, axis=0) for p, v in embeddings_by_period.items()}
+    return centroids, dict(counts_by_period)
+
+
+def vectorized_centroids(rows, granularity):
+    return compute_centroids(*group_embeddings_by_period(rows, granularity))
+
+
+def make_rows(n, text, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, DIM)).astype(np.float32)
+    periods = rng.integers(0, len(PERIODS), n)
+    rows = []
+    for vec, p in zip(vectors, periods):
+        embedding = "[" + ",".join(map(str, vec)) + "]" if text else vec
+        rows.append({"period": PERIODS[p], "embedding": embedding})
+    return rows
+
+
+def timed(fn, rows, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(rows, "month")
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main(sizes, repeat, text):
+    print(f"{'rows':>8} {'legacy ms':>12} {'vectorized ms':>15} {'speedup':>9}")
+    for n in sizes:
+        rows = make_rows(n, text)
+        legacy_ms, (legacy, legacy_counts) = timed(legacy_centroids, rows, repeat)
+        new_ms, (new, new_counts) = timed(vectorized_centroids, rows, repeat)
+
+        assert legacy_counts == new_counts
+        for period in legacy:
+            np.testing.assert_allclose(legacy[period], new[period], rtol=1e-4, atol=1e-5)
+        print(f"{n:>8} {legacy_ms:>12.1f} {new_ms:>15.1f} {legacy_ms / new_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--text", action="store_true", help="Embeddings as text literals instead of arrays")
+    args = parser.parse_args()
+    main(args.rows, args.repeat, args.text)
@@ -0,0 +1,69 @@
+"""
+Benchmark retrieval modes: latency vs recall@k against exact search.
+
+The result cache (backend/utils/result_cache.py) is disabled, so every
+repeat runs the retrieval query; query embeddings stay cached.
+
+Usage:
+    python -m dev.scripts.benchmark_retrieval_modes [--top-k 10] [--repeat 3]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.app.services.search_service import semantic_search
+from backend.settings import settings
+from backend.utils.dbpool import close_pool
+from backend.utils.vector_search import SEARCH_MODES
+
+QUERIES = [
+    "seguridad pública",
+    "reforma judicial",
+    "Sembrando Vida",
+    "IMSS-Bienestar",
+    "Guardia Nacional",
+    "precio de la gasolina",
+    "aranceles de Estados Unidos",
+    "programas sociales para adultos mayores",
+]
+
+
+async def main(top_k: int, repeat: int):
+    # Time the retrieval modes, not result cache hits
+    settings.result_cache_size = 0
+    print("Result cache disabled: every call runs its query (query embeddings are cached)\n")
+
+    # Exact results are the ground truth (embeddings are cached after this pass)
+    exact = {}
+    for q in QUERIES:
+        rows, _ = await semantic_search(q, top_k, mode="exact")
+        exact[q] = {r["speech_id"] for r in rows}
+
+    print(f"{'mode':<10} {'p50 ms':>10} {'p95 ms':>10} {'recall@' + str(top_k):>12}")
+    for mode in SEARCH_MODES:
+        latencies = []
+        recalls = []
+        for q in QUERIES:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows, _ = await semantic_search(q, top_k, mode=mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+            found = {r["speech_id"] for r in rows}
+            if exact[q]:
+                recalls.append(len(found & exact[q]) / len(exact[q]))
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{mode:<10} {statistics.median(latencies):>10.1f} {p95:>10.1f} "
+              f"{statistics.mean(recalls) if recalls else 0.0:>12.3f}")
+
+    await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.top_k, args.repeat))
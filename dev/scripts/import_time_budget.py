@@ -0,0 +1,90 @@
+"""
+Check the API import time against the recorded budget.
+
+Runs `python -X importtime -c "import <module>"` several times in fresh
+interpreters, takes the median cumulative time of the module and compares it
+with dev/import_time_budget.json. Also fails if a module that must stay off
+the API path (scipy, pandas, tiktoken, ...) gets imported.
+
+Usage:
+    python -m dev.scripts.import_time_budget            # check, exit 1 on overrun
+    python -m dev.scripts.import_time_budget --update   # record a new baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BUDGET_FILE = Path(__file__).resolve().parents[1] / "import_time_budget.json"
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def measure(module: str):
+    """Return (cumulative ms of `module`, set of imported top-level packages)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    cumulative_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        imported.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, imported
+
+
+def main(update: bool, runs: int) -> int:
+    budget = json.loads(BUDGET_FILE.read_text())
+    module = budget["module"]
+
+    samples = []
+    imported = set()
+    for _ in range(runs):
+        ms, imported = measure(module)
+        samples.append(ms)
+    median_ms = statistics.median(samples)
+
+    if update:
+        budget["baseline_ms"] = round(median_ms, 1)
+        BUDGET_FILE.write_text(json.dumps(budget, indent=2) + "\n")
+        print(f"Baseline for {module}: {median_ms:.1f} ms (budget {budget['budget_ms']} ms)")
+        return 0
+
+    print(f"{module}: median {median_ms:.1f} ms over {runs} runs "
+          f"(baseline {budget['baseline_ms']} ms, budget {budget['budget_ms']} ms)")
+
+    failed = False
+    if median_ms > budget["budget_ms"]:
+        print(f"❌ Import time over budget by {median_ms - budget['budget_ms']:.1f} ms")
+        failed = True
+
+    leaked = sorted(imported & set(budget["forbidden"]))
+    if leaked:
+        print(f"❌ Modules that must be lazy were imported: {', '.join(leaked)}")
+        failed = True
+
+    if not failed:
+        print("✅ Within import-time budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update", action="store_true", help="Record the measured median as the new baseline")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(main(args.update, args.runs))